@@ -6,6 +6,31 @@
 # For the original pseucode the algorithm is based on:
 # http://www.vergenet.net/~conrad/boids/pseudocode.html
 
+# The positions and velocities of a flock are stored in arrays,
+# each Boid is a view of its place in the arrays.
+# Boids.update calculates the rules for the whole flock at once,
+# with NumPy if it is installed.
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _stored(name):
+    """A Boid attribute stored in the flock's array called name."""
+
+    def get(self):
+        return getattr(self.boids, name)[self._i]
+
+    def set(self, value):
+        getattr(self.boids, name)[self._i] = value
+
+    return property(get, set)
 
 
 class Boid:
@@ -14,22 +39,31 @@ class Boid:
         
         self.boids = boids
         self.flock = boids
+        self._i = boids._allocate(x, y, z)
     
-        self.x = 1.0 * x
-        self.y = 1.0 * y
-        self.z = 1.0 * z
-        
-        self.vx = 0
-        self.vy = 0
-        self.vz = 0
-        
-        self.is_perching = False
-        self._perch_t = 0
+    x = _stored("_x")
+    y = _stored("_y")
+    z = _stored("_z")
+    vx = _stored("_vx")
+    vy = _stored("_vy")
+    vz = _stored("_vz")
+    _perch_t = _stored("_perch_ts")
+        
+    def _get_is_perching(self):
+        return bool(self.boids._perching[self._i])
+        
+    def _set_is_perching(self, value):
+        self.boids._perching[self._i] = bool(value)
 	        
+    is_perching = property(_get_is_perching, _set_is_perching)
         
-    def copy(self):
+    def copy(self, boids=None):
         
-        b = Boid(self.boids, self.x, self.y, self.z)
+        """Returns a copy of the boid, in the given flock or its own."""
+
+        if boids is None:
+            boids = self.boids
+        b = Boid(boids, self.x, self.y, self.z)
         b.vx = self.vx
         b.vy = self.vy
         b.vz = self.vz
@@ -124,6 +158,16 @@ class Boids(list):
     
     def __init__(self, n, x, y, w, h):
         
+        # Storage for the boids, indexed by Boid._i.
+        self._x = array("d")
+        self._y = array("d")
+        self._z = array("d")
+        self._vx = array("d")
+        self._vy = array("d")
+        self._vz = array("d")
+        self._perching = array("b")
+        self._perch_ts = array("d")
+
         for i in range(n):
             dx = _ctx.random(w)
             dy = _ctx.random(h)
@@ -151,6 +195,34 @@ class Boids(list):
         self._gy = 0
         self._gz = 0
 	
+    def _allocate(self, x, y, z):
+
+        """Stores a new boid at x, y, z and returns its index."""
+
+        self._x.append(x)
+        self._y.append(y)
+        self._z.append(z)
+        self._vx.append(0)
+        self._vy.append(0)
+        self._vz.append(0)
+        self._perching.append(False)
+        self._perch_ts.append(0)
+        return len(self._x) - 1
+
+    def _indices(self):
+
+        """Returns the index of each boid in the flock.
+
+        Boids appended from another flock are moved into this one.
+        """
+
+        indices = []
+        for b in self:
+            if b.boids is not self:
+                moved = b.copy(self)
+                b.boids, b.flock, b._i = self, self, moved._i
+            indices.append(b._i)
+        return indices
         
     def copy(self):
         
@@ -172,7 +244,7 @@ class Boids(list):
         boids._gz = self._gz
         
         for boid in self:
-            boids.append(boid.copy())
+            boids.append(boid.copy(boids))
             
         return boids
 
@@ -225,23 +297,25 @@ class Boids(list):
         dx = self.w * 0.1
         dy = self.h * 0.1 
         
-        for b in self:
+        bx, by, bz = self._x, self._y, self._z
+        bvx, bvy, bvz = self._vx, self._vy, self._vz
+        for i in self._indices():
             
-            if b.x < self.x-dx: b.vx += _ctx.random(dx)
-            if b.y < self.y-dy: b.vy += _ctx.random(dy)
-            if b.x > self.x+self.w+dx: b.vx -= _ctx.random(dx)
-            if b.y > self.y+self.h+dy: b.vy -= _ctx.random(dy)
-            if b.z < 0: b.vz += 10
-            if b.z > 100: b.vz -= 10
+            if bx[i] < self.x-dx: bvx[i] += _ctx.random(dx)
+            if by[i] < self.y-dy: bvy[i] += _ctx.random(dy)
+            if bx[i] > self.x+self.w+dx: bvx[i] -= _ctx.random(dx)
+            if by[i] > self.y+self.h+dy: bvy[i] -= _ctx.random(dy)
+            if bz[i] < 0: bvz[i] += 10
+            if bz[i] > 100: bvz[i] -= 10
             
-            if b.y > self._perch_y and _ctx.random() < self._perch:
-                b.y = self._perch_y
-                b.vy = -abs(b.vy) * 0.2
-                b.is_perching = True
+            if by[i] > self._perch_y and _ctx.random() < self._perch:
+                by[i] = self._perch_y
+                bvy[i] = -abs(bvy[i]) * 0.2
+                self._perching[i] = True
                 try:
-                    b._perch_t = self._perch_t()
+                    self._perch_ts[i] = self._perch_t()
                 except:
-                    b._perch_t = self._perch_t
+                    self._perch_ts[i] = self._perch_t
             
     def update(
         self, 
@@ -253,7 +327,11 @@ class Boids(list):
         limit=30,
     ):
         
-        """Calculates the next motion frame for the flock."""
+        """Calculates the next motion frame for the flock.
+
+        Every boid moves at once, based on where the flock was in the
+        previous frame.
+        """
         
         # Shuffling the list of boids ensures fluid movement.
         # If you need the boids to retain their position in the list
@@ -288,33 +366,131 @@ class Boids(list):
         if self.flee:
             m4 = -m4
         
-        for b in self:
-            
-            # A boid that is perching will continue to do so
-            # until Boid._perch_t reaches zero.
-            if b.is_perching:
-                if b._perch_t > 0:
-                    b._perch_t -= 1
-                    continue
-                else:
-                    b.is_perching = False
-            
-            vx1, vy1, vz1 = b.cohesion(cohesion)
-            vx2, vy2, vz2 = b.separation(separation)
-            vx3, vy3, vz3 = b.alignment(alignment)
-            vx4, vy4, vz4 = b.goal(self._gx, self._gy, self._gz, goal)
-            
-            b.vx += m1*vx1 + m2*vx2 + m3*vx3 + m4*vx4
-            b.vy += m1*vy1 + m2*vy2 + m3*vy3 + m4*vy4
-            b.vz += m1*vz1 + m2*vz2 + m3*vz3 + m4*vz4
-            
-            b.limit(limit)
-        
-            b.x += b.vx
-            b.y += b.vy
-            b.z += b.vz
+        indices = self._indices()
+        if indices:
+            if np is not None:
+                move = self._move_numpy
+            else:
+                move = self._move
+            move(
+                indices,
+                (m1, m2, m3, m4),
+                cohesion,
+                separation,
+                alignment,
+                goal,
+                limit,
+            )
         
         self.constrain()
+
+    def _move(self, indices, m, cohesion, separation, alignment, goal, limit):
+
+        """Applies the rules to the boids at indices, see update."""
+
+        m1, m2, m3, m4 = m
+        n = len(indices)
+        positions = [[p[i] for i in indices] for p in (self._x, self._y, self._z)]
+        velocities = [[v[i] for i in indices] for v in (self._vx, self._vy, self._vz)]
+
+        # A boid that is perching will continue to do so
+        # until Boid._perch_t reaches zero.
+        active = []
+        for i in indices:
+            if self._perching[i]:
+                if self._perch_ts[i] > 0:
+                    self._perch_ts[i] -= 1
+                    active.append(False)
+                    continue
+                self._perching[i] = False
+            active.append(True)
+
+        goals = (self._gx, self._gy, self._gz)
+        stored = zip(
+            (self._x, self._y, self._z), (self._vx, self._vy, self._vz),
+        )
+        for axis, (p, v) in enumerate(stored):
+            ps, vs = positions[axis], velocities[axis]
+            # Cohesion and alignment use the average of the other boids.
+            p_total, v_total = sum(ps), sum(vs)
+            separations = _separation(ps, separation)
+            for j, i in enumerate(indices):
+                if not active[j]:
+                    continue
+                dv = m2 * separations[j] + m4 * (goals[axis] - ps[j]) / goal
+                if n > 1:
+                    dv += m1 * ((p_total - ps[j]) / (n - 1) - ps[j]) / cohesion
+                    dv += m3 * ((v_total - vs[j]) / (n - 1) - vs[j]) / alignment
+                vi = max(-limit, min(vs[j] + dv, limit))
+                v[i] = vi
+                p[i] = ps[j] + vi
+
+    def _move_numpy(self, indices, m, cohesion, separation, alignment, goal, limit):
+
+        """The same as _move, using NumPy."""
+
+        m1, m2, m3, m4 = m
+        n = len(indices)
+        indices = np.array(indices)
+
+        perching = np.frombuffer(self._perching, dtype=np.int8)
+        perch_ts = np.frombuffer(self._perch_ts)
+        waiting = (perching[indices] != 0) & (perch_ts[indices] > 0)
+        perch_ts[indices[waiting]] -= 1
+        perching[indices] = 0
+        perching[indices[waiting]] = 1
+        active = indices[~waiting]
+
+        goals = (self._gx, self._gy, self._gz)
+        stored = zip(
+            (self._x, self._y, self._z), (self._vx, self._vy, self._vz),
+        )
+        for axis, (p, v) in enumerate(stored):
+            p = np.frombuffer(p)
+            v = np.frombuffer(v)
+            ps, vs = p[indices], v[indices]
+            # Cohesion and alignment use the average of the other boids.
+            p_total, v_total = ps.sum(), vs.sum()
+            separations = _separation_numpy(ps, separation)[~waiting]
+            ps, vs = ps[~waiting], vs[~waiting]
+
+            dv = m2 * separations + m4 * (goals[axis] - ps) / goal
+            if n > 1:
+                dv += m1 * ((p_total - ps) / (n - 1) - ps) / cohesion
+                dv += m3 * ((v_total - vs) / (n - 1) - vs) / alignment
+            vs = np.clip(vs + dv, -limit, limit)
+            v[active] = vs
+            p[active] = ps + vs
+
+
+def _separation(values, r):
+
+    """Returns for each value, the sum of its distance to the other values
+    closer than r, as Boid.separation for one axis.
+
+    The values closer than r are found in a sorted copy of the values.
+    """
+
+    ordered = sorted(values)
+    totals = [0.0] + list(accumulate(ordered))
+    separations = []
+    for value in values:
+        lo = bisect_right(ordered, value - r)
+        hi = bisect_left(ordered, value + r)
+        separations.append(value * (hi - lo) - (totals[hi] - totals[lo]))
+    return separations
+
+
+def _separation_numpy(values, r):
+
+    """The same as _separation, using NumPy."""
+
+    ordered = np.sort(values)
+    totals = np.concatenate(([0.0], np.cumsum(ordered)))
+    lo = np.searchsorted(ordered, values - r, "right")
+    hi = np.searchsorted(ordered, values + r, "left")
+    return values * (hi - lo) - (totals[hi] - totals[lo])
+
         
 def flock(n, x, y, w, h):
     return Boids(n, x, y, w, h)
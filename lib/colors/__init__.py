@@ -28,13 +28,13 @@ __license__ = "GPL"
 # * Color themes: groups of ranges.
 # * Depth: lighting, shadows and gradients.
 
-# Gradient fills uses the CIImage object so if you experience issues with Core Image
-# you may also experience issues with gradient fills.
+# Gradient fills and drop shadows are drawn with cairo gradients and an offscreen blur.
 
 ######################################################################################################
 
 import difflib
 import os
+from bisect import bisect_left
 import re
 import zipfile
 from copy import deepcopy
@@ -43,12 +43,16 @@ from math import degrees, radians, sin, cos, atan2, sqrt
 from math import floor
 from operator import attrgetter
 from random import random, choice
-from xml.dom.minidom import parseString
+from xml.etree import ElementTree
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 try:
     from shoebot.grammar import NodeBot
-    from shoebot.graphics import Grob
-    from shoebot import _restore, _save
+    from shoebot.graphics import ARC, CLOSE, CURVETO, Grob
 except ImportError:
     class Grob:
         def __init__(self, _ctx):
@@ -458,6 +462,12 @@ def import_palette(path=None):
 
 # The context is a dictionary of colors mapped to associated words,
 # e.g. "red" is commonly associated with passion, love, heat, etc.
+# It is loaded the first time it is used, together with an index
+# of the colors associated with each word.
+
+_context = None
+_context_index = None
+
 
 # __file__ = ""
 def _load_color_context():
@@ -473,7 +483,31 @@ def _load_color_context():
     return context
 
 
-context = _load_color_context()
+def _color_context():
+    """Returns the color context, loading it the first time."""
+    global _context
+    if _context is None:
+        _context = _load_color_context()
+    return _context
+
+
+def _color_context_index():
+    """Returns a sorted list of context words, and a dictionary of the
+    colors associated with each word."""
+    global _context_index
+    if _context_index is None:
+        colors = {}
+        for name, tags in _color_context().items():
+            for tag in tags:
+                colors.setdefault(tag, set()).add(name)
+        _context_index = (sorted(colors), colors)
+    return _context_index
+
+
+def __getattr__(name):
+    if name == "context":
+        return _color_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 from shoebot.graphics import Color as BaseColor
 
@@ -877,23 +911,40 @@ named_color = color
 
 ### NAMED COLOR OBJECTS ##############################################################################
 def _build_named_colors():
-    code = ""
+    functions = {}
+
+    def named_color_function(name, *value, mode):
+        return lambda: Color(*value, mode=mode, name=name)
 
     for name, value in named_colors.items():
-        code += f"{name} = lambda: Color(*{value}, mode='rgb', name='{name}')\n"
+        functions[name] = named_color_function(name, *value, mode="rgb")
 
     for name, h in named_hues.items():
-        code += f"{name} = lambda: Color({h}, 1, 1, 1, mode='hsb', name='{name}')\n"
+        functions[name] = named_color_function(name, h, 1, 1, 1, mode="hsb")
 
-    return code
+    return functions
 
-eval(compile(_build_named_colors(), "<string>", "exec"))
+globals().update(_build_named_colors())
 
 
 # background(green().darken())
 
 ### COLOR LIST #######################################################################################
 
+def _blend_rows(rows, d):
+
+    """Returns RGBA rows where each row is blended with the blended row
+    before it, and the first row with the last."""
+
+    blended = []
+    if rows:
+        previous = rows[-1]
+        for row in rows:
+            previous = [v * (1 - d) + p * d for v, p in zip(row, previous)]
+            blended.append(previous)
+    return blended
+
+
 class ColorList(_list):
 
     def __init__(self, *args, **kwargs):
@@ -989,16 +1040,20 @@ class ColorList(_list):
         For example, the word "anger" appears in black, orange and red
         contexts, so the list will contain those three colors.
         """
-        matches = []
-        for clr in context:
-            tags = context[clr]
-            for tag in tags:
-                if tag.startswith(str) \
-                        or str.startswith(tag):
-                    matches.append(clr)
-                    break
+        words, colors = _color_context_index()
+        names = set()
+
+        # Words that start with str.
+        i = bisect_left(words, str)
+        while i < len(words) and words[i].startswith(str):
+            names.update(colors[words[i]])
+            i += 1
+
+        # Words that str starts with.
+        for j in _range(len(str) + 1):
+            names.update(colors.get(str[:j], ()))
 
-        matches = [color(name) for name in matches]
+        matches = [color(name) for name in _color_context() if name in names]
         return matches
 
     def _context(self):
@@ -1022,7 +1077,7 @@ class ColorList(_list):
                 name = clr.nearest_hue(primary=True)
             if name == "orange" and clr.brightness < 0.6:
                 name = "brown"
-            tags2 = context[name]
+            tags2 = _color_context()[name]
             if tags1 is None:
                 tags1 = tags2
             else:
@@ -1095,11 +1150,17 @@ class ColorList(_list):
 
     def blend(self, d=0.1):
 
-        clrs = self.copy()
-        for i in _range(len(clrs)):
-            clrs[i] = clrs[i].blend(clrs[i - 1], d)
+        """Returns a copy where each color is blended with the one before it.
 
-        return clrs
+        Each color is blended with the already blended color before it,
+        so the values are calculated first and the colors created once.
+        """
+        rows = _blend_rows([(clr.r, clr.g, clr.b, clr.a) for clr in self], d)
+        return ColorList(
+            [color(r, g, b, a, mode="rgb") for r, g, b, a in rows],
+            name=self.name,
+            tags=self.tags,
+        )
 
     smooth = smoothen = blend
 
@@ -1112,6 +1173,12 @@ class ColorList(_list):
         if not len(self):
             return ColorList()
 
+        if np is not None:
+            sorted_colors = [self[i] for i in ColorArray(self)._distance_order()]
+            if reversed:
+                _list.reverse(sorted_colors)
+            return ColorList(sorted_colors)
+
         # Find the darkest color in the list.
         root = self[0]
         for _color in self[1:]:
@@ -1135,50 +1202,54 @@ class ColorList(_list):
                     closest, distance = _color, d
             stack.remove(closest)
             sorted_colors.append(closest)
-        sorted_colors.append(stack[0])
+        sorted_colors.extend(stack)
 
         if reversed:
             _list.reverse(sorted_colors)
         return ColorList(sorted_colors)
 
-    def _sorted_copy(self, comparison, reversed=False):
+    def _sorted_copy(self, attribute, reversed=False):
         """Returns a sorted copy with the colors arranged according to the
-        given comparison."""
-        sorted_colors = ColorList(*sorted(self.copy(), key=comparison, reverse=reversed))
+        given color attribute."""
+        if np is not None and attribute in ColorArray.columns:
+            order = ColorArray(self)._order(attribute, reversed)
+            return ColorList([self[i].copy() for i in order])
+        colors = [clr.copy() for clr in self]
+        sorted_colors = ColorList(*sorted(colors, key=attrgetter(attribute), reverse=reversed))
         return sorted_colors
 
     def sort_by_hue(self, reversed=False):
-        return self._sorted_copy(attrgetter("h"), reversed)
+        return self._sorted_copy("h", reversed)
 
     def sort_by_saturation(self, reversed=False):
-        return self._sorted_copy(attrgetter("s"), reversed)
+        return self._sorted_copy("s", reversed)
 
     def sort_by_brightness(self, reversed=False):
-        return self._sorted_copy(attrgetter("brightness"), reversed)
+        return self._sorted_copy("brightness", reversed)
 
     def sort_by_red(self, reversed=False):
-        return self._sorted_copy(attrgetter("r"), reversed)
+        return self._sorted_copy("r", reversed)
 
     def sort_by_green(self, reversed=False):
-        return self._sorted_copy(attrgetter("g"), reversed)
+        return self._sorted_copy("g", reversed)
 
     def sort_by_blue(self, reversed=False):
-        return self._sorted_copy(attrgetter("b"), reversed)
+        return self._sorted_copy("b", reversed)
 
     def sort_by_alpha(self, reversed=False):
-        return self._sorted_copy(attrgetter("a"), reversed)
+        return self._sorted_copy("a", reversed)
 
     def sort_by_cyan(self, reversed=False):
-        return self._sorted_copy(attrgetter("c"), reversed)
+        return self._sorted_copy("c", reversed)
 
     def sort_by_magenta(self, reversed=False):
-        return self._sorted_copy(attrgetter("m"), reversed)
+        return self._sorted_copy("m", reversed)
 
     def sort_by_yellow(self, reversed=False):
-        return self._sorted_copy(attrgetter("y"), reversed)
+        return self._sorted_copy("y", reversed)
 
     def sort_by_black(self, reversed=False):
-        return self._sorted_copy(attrgetter("k"), reversed)
+        return self._sorted_copy("k", reversed)
 
     def sort(self, comparison="hue", reversed=False):
 
@@ -1200,25 +1271,55 @@ class ColorList(_list):
         e.g. cmp1=brightness and n=3 will cluster colors by brightness >= 0.66,
         0.33, 0.0
         """
-        sorted_colors = self.sort(cmp1)
-        clusters = ColorList()
+        if np is not None and cmp1 in ColorArray.columns and cmp2 in ColorArray.columns:
+            clusters = self._cluster_sort_numpy(cmp1, cmp2, n)
+        else:
+            sorted_colors = self.sort(cmp1)
+            clusters = ColorList()
+
+            d = 1.0
+            i = 0
+            for j in _range(len(sorted_colors)):
+                if getattr(sorted_colors[j], cmp1) < d:
+                    if not sorted_colors[i: j]:
+                        continue
+                    clusters.extend(sorted_colors[i:j].sort(cmp2))
+                    d -= 1.0 / n
+                    i = j
+            clusters.extend(sorted_colors[i:].sort(cmp2))
+        if reversed:
+            # _list.reverse(clusters)
+            clusters.reverse()
+        return clusters
+
+    cluster = clustersort = cluster_sort
+
+    def _cluster_sort_numpy(self, cmp1, cmp2, n):
+
+        """The same clusters as cluster_sort, sorted as arrays so the
+        colors are only copied once."""
+
+        colors = ColorArray(self)
+        sorted_indices = colors._order(cmp1)
+        values = colors.column(cmp1)[sorted_indices].tolist()
+        keys = colors.column(cmp2)
 
+        def sort_cluster(indices):
+            return indices[np.argsort(keys[indices], kind="stable")]
+
+        clusters = []
         d = 1.0
         i = 0
-        for j in _range(len(sorted_colors)):
-            if getattr(sorted_colors[j], cmp1) < d:
-                if not sorted_colors[i: j]:
+        for j in _range(len(values)):
+            if values[j] < d:
+                if i == j:
                     continue
-                clusters.extend(sorted_colors[i:j].sort(cmp2))
+                clusters.append(sort_cluster(sorted_indices[i:j]))
                 d -= 1.0 / n
                 i = j
-        clusters.extend(sorted_colors[i:].sort(cmp2))
-        if reversed:
-            # _list.reverse(clusters)
-            clusters.reverse()
-        return clusters
+        clusters.append(sort_cluster(sorted_indices[i:]))
 
-    cluster = clustersort = cluster_sort
+        return ColorList([self[i].copy() for i in np.concatenate(clusters)])
 
     def reverse(self):
         """Returns a reversed copy of the list."""
@@ -1366,6 +1467,195 @@ def colorlist(*args, **kwargs):
 list = colorlist
 
 
+#### COLOR ARRAY #####################################################################################
+
+# A color array stores a list of colors as rows of RGBA values in a NumPy array,
+# so a whole palette can be sorted, measured and blended at once.
+# ColorList and Gradient use it when NumPy is installed.
+
+class ColorArray:
+    # Columns that can be sorted on, by ColorList attribute and sort names.
+    columns = {
+        "r": ("rgba", 0), "red": ("rgba", 0),
+        "g": ("rgba", 1), "green": ("rgba", 1),
+        "b": ("rgba", 2), "blue": ("rgba", 2),
+        "a": ("rgba", 3), "alpha": ("rgba", 3),
+        "h": ("hsb", 0), "hue": ("hsb", 0),
+        "s": ("hsb", 1), "saturation": ("hsb", 1),
+        "brightness": ("hsb", 2),
+    }
+
+    def __init__(self, colors=None):
+
+        """Construct an array of colors.
+
+        Colors can be supplied as a list of colors (e.g. a ColorList),
+        another ColorArray, or an array of N x 3 RGB or N x 4 RGBA values.
+
+        HSB values are calculated for all the colors the first time they
+        are used. Color objects are only created when a color is taken
+        from the array.
+        """
+
+        if np is None:
+            raise ImportError("ColorArray requires NumPy.")
+
+        self._hsb = None
+        if isinstance(colors, ColorArray):
+            self.rgba = colors.rgba
+            self._hsb = colors._hsb
+            return
+
+        if colors is None or not len(colors):
+            self.rgba = np.zeros((0, 4))
+            return
+
+        if isinstance(colors, np.ndarray):
+            rgba = np.clip(np.asarray(colors, dtype=float), 0, 1)
+        else:
+            rgba = np.array([(clr.r, clr.g, clr.b, clr.a) for clr in colors], dtype=float)
+        if rgba.shape[1] == 3:
+            rgba = np.hstack((rgba, np.ones((len(rgba), 1))))
+        self.rgba = rgba
+
+    @property
+    def hsb(self):
+        """N x 3 array of the hue, saturation and brightness of each color."""
+        if self._hsb is None:
+            self._hsb = _rgb_to_hsb_numpy(self.rgba)
+        return self._hsb
+
+    def column(self, name):
+        """Returns the given attribute of each color, e.g. "hue" or "r"."""
+        values, i = self.columns[name]
+        return getattr(self, values)[:, i]
+
+    def __len__(self):
+        return len(self.rgba)
+
+    def __getitem__(self, i):
+        if isinstance(i, (int, np.integer)):
+            r, g, b, a = self.rgba[i].tolist()
+            return color(r, g, b, a, mode="rgb")
+        colors = ColorArray()
+        colors.rgba = self.rgba[i]
+        if self._hsb is not None:
+            colors._hsb = self._hsb[i]
+        return colors
+
+    def __iter__(self):
+        for r, g, b, a in self.rgba.tolist():
+            yield color(r, g, b, a, mode="rgb")
+
+    def __repr__(self):
+        return f"ColorArray({len(self)} colors)"
+
+    def colorlist(self, **kwargs):
+        """Returns the colors as a ColorList."""
+        return ColorList(_list(self), **kwargs)
+
+    def _coordinates(self):
+        """Returns the position of each color in the HSB cone used by
+        Color.distance."""
+        h, s, brightness = self.hsb.T
+        angle = np.radians(h * 360)
+        return np.column_stack((np.cos(angle) * s, np.sin(angle) * s, brightness))
+
+    def distance(self, clr):
+        """Returns the Euclidean distance of each color to clr, as
+        Color.distance."""
+        h = radians(clr.h * 360)
+        x, y, z = (self._coordinates() - (cos(h) * clr.s, sin(h) * clr.s, clr.brightness)).T
+        return np.sqrt(x ** 2 + y ** 2 + z ** 2)
+
+    def _order(self, name, reversed=False):
+        """Returns the indices of the colors sorted by the given attribute.
+
+        Equal colors stay in the same order, as with sorted().
+        """
+        values = self.column(name)
+        if reversed:
+            values = -values
+        return np.argsort(values, kind="stable")
+
+    def _distance_order(self):
+        """Returns the indices of the colors in ColorList.sort_by_distance
+        order.
+
+        Starting with the darkest color, each next color is the nearest
+        color not yet used.
+        """
+        if not len(self):
+            return []
+        coordinates = self._coordinates()
+        remaining = np.arange(len(self))
+
+        i = int(np.argmin(self.hsb[:, 2]))
+        order = [i]
+        remaining = np.delete(remaining, i)
+        while len(remaining):
+            x, y, z = (coordinates[remaining] - coordinates[order[-1]]).T
+            i = int(np.argmin(np.sqrt(x ** 2 + y ** 2 + z ** 2)))
+            order.append(int(remaining[i]))
+            remaining = np.delete(remaining, i)
+        return order
+
+    def sort_by_distance(self, reversed=False):
+        order = self._distance_order()
+        if reversed:
+            order.reverse()
+        return self[np.array(order, dtype=int)]
+
+    def sort(self, comparison="hue", reversed=False):
+        """Returns a copy sorted by the given color attribute, e.g. "hue"."""
+        return self[self._order(comparison, reversed)]
+
+    def blend(self, d=0.1):
+        """Returns a copy where each color is blended with the one before it,
+        as ColorList.blend."""
+        blended = ColorArray()
+        if len(self):
+            blended.rgba = np.array(_blend_rows(self.rgba.tolist(), d))
+        return blended
+
+
+def _rgb_to_hsb_numpy(rgba):
+
+    """The same as rgb_to_hsb for each row of an array, using NumPy."""
+
+    r, g, b = rgba[:, 0], rgba[:, 1], rgba[:, 2]
+    v = np.maximum(np.maximum(r, g), b)
+    d = v - np.minimum(np.minimum(r, g), b)
+    s = np.divide(d, v, out=np.zeros_like(v), where=v != 0)
+
+    d = np.where(s != 0, d, 1.0)
+    h = np.where(
+        r == v, (g - b) / d,
+        np.where(g == v, 2 + (b - r) / d, 4 + (r - g) / d),
+    )
+    h = np.where(s != 0, h, 0.0) * (60.0 / 360)
+    h = np.where(h < 0, h + 1.0, h)
+
+    return np.column_stack((h, s, v))
+
+
+def _interpolate_numpy(rgba, n=100):
+
+    """The same as Gradient._interpolate for an array of RGBA values,
+    using NumPy."""
+
+    l = len(rgba) - 1
+    i = np.arange(max(n, 0))
+    x = np.minimum((1.0 * i / n * l).astype(int), l)
+    y = np.minimum(x + 1, l)
+
+    base = 1.0 * n / l * x
+    d = ((i - base) / (1.0 * n / l))[:, None]
+    gradient = rgba[x] * (1 - d) + rgba[y] * d
+
+    return np.vstack((gradient, rgba[-1:]))
+
+
 # clrs = list("anger")
 # print red() in clrs
 # print clrs.darkest == black
@@ -1776,6 +2066,10 @@ class Gradient(ColorList):
             ColorList.__init__(self, [self._colors[0] for i in _range(n)])
             return
 
+        if np is not None:
+            ColorList.__init__(self, _list(self._cache_numpy()))
+            return
+
         # Expand the base list so we can chop more accurately.
         colors = self._interpolate(self._colors, 40)
 
@@ -1796,6 +2090,27 @@ class Gradient(ColorList):
         if self.spread < 0: gradient = gradient[-n:]
         ColorList.__init__(self, gradient)
 
+    def _cache_numpy(self):
+
+        """The same gradient colors as _cache, as a ColorArray."""
+
+        n = self.steps
+        colors = _interpolate_numpy(ColorArray(self._colors).rgba, 40)
+
+        left = colors[:len(colors) // 2]
+        right = colors[len(colors) // 2:]
+        left = np.vstack((left, right[:1]))
+        right = np.vstack((left[-1:], right))
+
+        gradient = np.vstack((
+            _interpolate_numpy(left, int(n * self.spread))[:-1],
+            _interpolate_numpy(right, n - int(n * self.spread))[1:],
+        ))
+
+        if self.spread > 1: gradient = gradient[:n]
+        if self.spread < 0: gradient = gradient[-n:]
+        return ColorArray(gradient)
+
 
 # gradient([clr1, clr2], steps=100, spread=0.5)
 # gradient(clr1, clr2, clr3, steps=100, spread=0.5)
@@ -1807,6 +2122,69 @@ def gradient(*colors, **kwargs):
 # g.spread = 0.4
 # g.swatch(10, 10, h=7)
 
+def pathpoints(path, t):
+    """Returns the (x, y) coordinates of the points at t on the path.
+
+    t is a list of times (0.0-1.0) on the whole of the path,
+    the same as the x and y of path.point() for each of them.
+    With NumPy installed, all of the points are calculated at once
+    and returned as an array with a row for each point.
+    """
+    if np is not None:
+        return _pathpoints_numpy(path, np.asarray(t, dtype=float))
+    return [(pt.x, pt.y) for pt in [path.point(ti) for ti in t]]
+
+
+def _pathpoints_numpy(path, t):
+    """The same as pathpoints, using NumPy."""
+    # Locate t on a segment, as BezierPath._locate_in_table does.
+    segments, ends, closeto = path._get_arc_lengths()
+    segments = np.asarray(segments, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    last = len(segments) - 1
+    i = np.minimum(np.searchsorted(ends, t, side="left"), last)
+    t = t - np.where(i > 0, ends[i - 1], 0.0)
+    length = segments[i]
+    t = np.divide(t, length, out=t, where=length != 0)
+    closeto = np.asarray(closeto)[i]
+    if segments[last] == 0:
+        i[i == last] -= 1
+
+    elements = _list(path)
+    cmds = [el.cmd for el in elements]
+    xy = np.array([(el.x, el.y) for el in elements], dtype=float)
+    handles = np.array(
+        [
+            (el.c1x, el.c1y, el.c2x, el.c2y) if el.cmd == CURVETO else (0, 0, 0, 0)
+            for el in elements
+        ],
+        dtype=float,
+    )
+
+    cmd = np.array(cmds, dtype=object)[i + 1]
+    t = t[:, None]
+    p0 = xy[i]
+    p3 = xy[i + 1]
+    p3 = np.where((cmd == CLOSE)[:, None], xy[closeto], p3)
+    points = p0 + t * (p3 - p0)
+
+    # The point for an arc is its center.
+    arcs = cmd == ARC
+    points[arcs] = p3[arcs]
+
+    # Points on curves, as BezierPath._curvepoint calculates them.
+    curves = cmd == CURVETO
+    if curves.any():
+        t, p0, p3 = t[curves], p0[curves], p3[curves]
+        p1, p2 = handles[i + 1][curves, :2], handles[i + 1][curves, 2:]
+        mint = 1 - t
+        p01 = p0 * mint + p1 * t
+        p12 = p1 * mint + p2 * t
+        p23 = p2 * mint + p3 * t
+        points[curves] = (p01 * mint + p12 * t) * mint + (p12 * mint + p23 * t) * t
+    return points
+
+
 def outline(path, colors, precision=0.4, continuous=True):
     """Outlines each contour in a path with the colors in the list.
 
@@ -1821,46 +2199,53 @@ def outline(path, colors, precision=0.4, continuous=True):
     def _point_count(path, precision):
         return max(int(path.length * precision * 0.5), 10)
 
+    # The points on a contour, plus a point just before its end.
+    def _points(contour, j):
+        if np is None:
+            pt = contour.point(0.9999999)  # Fix in pathmatics!
+            return contour.coordinates(j) + [(pt.x, pt.y)]
+        t = np.append(np.arange(j) * (1.0 / (j - 1)), 0.9999999)
+        return _pathpoints_numpy(contour, t).tolist()
+
     # The total count of points in the path.
-    n = sum([_point_count(contour, precision) for contour in path.contours])
+    contours = path.contours
+    n = sum([_point_count(contour, precision) for contour in contours])
 
     # For a continuous gradient,
     # we need to calculate a subrange in the list of colors
     # for each contour to draw colors from.
     contour_i = 0
-    contour_n = len(path.contours) - 1
+    contour_n = len(contours) - 1
     if contour_n == 0: continuous = False
 
     i = 0
-    for contour in path.contours:
+    for contour in contours:
 
         if not continuous: i = 0
 
         # The number of points for each contour.
         j = _point_count(contour, precision)
-
-        first = True
-        for pt in contour.points(j):
-            if first:
-                first = False
+        points = _points(contour, j)
+
+        x0, y0 = points[0]
+        i += 1
+        for x, y in points[1:-1]:
+            if not continuous:
+                # If we have a list of 100 colors and 50 points,
+                # point i maps to color i*2.
+                clr = float(i) / j * len(colors)
             else:
-                if not continuous:
-                    # If we have a list of 100 colors and 50 points,
-                    # point i maps to color i*2.
-                    clr = float(i) / j * len(colors)
-                else:
-                    # In a continuous gradient of 100 colors,
-                    # the 2nd contour in a path with 10 contours
-                    # draws colors between 10-20
-                    clr = float(i) / n * len(colors) - 1 * contour_i / contour_n
-                _ctx.stroke(colors[int(clr)])
-                _ctx.line(x0, y0, pt.x, pt.y)
-            x0 = pt.x
-            y0 = pt.y
+                # In a continuous gradient of 100 colors,
+                # the 2nd contour in a path with 10 contours
+                # draws colors between 10-20
+                clr = float(i) / n * len(colors) - 1 * contour_i / contour_n
+            _ctx.stroke(colors[int(clr)])
+            _ctx.line(x0, y0, x, y)
+            x0, y0 = x, y
             i += 1
 
-        pt = contour.point(0.9999999)  # Fix in pathmatics!
-        _ctx.line(x0, y0, pt.x, pt.y)
+        x, y = points[-1]
+        _ctx.line(x0, y0, x, y)
         contour_i += 1
 
 
@@ -2355,7 +2740,19 @@ def shader(x, y, dx, dy, radius=300, angle=0, spread=90):
 
     The radius influences the strength of the light,
     angle and spread control the direction of the light.
+
+    x and y can also be lists of coordinates,
+    the brightness for each of the points is then returned
+    (as an array, with NumPy installed).
     """
+    if not isinstance(x, (int, float)):
+        if np is not None:
+            return _shader_numpy(
+                np.asarray(x, dtype=float), np.asarray(y, dtype=float),
+                dx, dy, radius, angle, spread
+            )
+        return [shader(xi, yi, dx, dy, radius, angle, spread) for xi, yi in zip(x, y)]
+
     if angle != None:
         radius *= 2
 
@@ -2406,15 +2803,44 @@ def shader(x, y, dx, dy, radius=300, angle=0, spread=90):
     return 1 - max(0, min(d2, 1))
 
 
+def _shader_numpy(x, y, dx, dy, radius=300, angle=0, spread=90):
+    """The same as shader for arrays of x and y, using NumPy."""
+    if angle != None:
+        radius *= 2
+
+    d = np.sqrt((dx - x) ** 2 + (dy - y) ** 2)
+    a = np.degrees(np.arctan2(dy - y, dx - x)) + 180
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1 = np.where(d <= radius, d / radius, 1.0)
+    if angle is None:
+        return 1 - d1
+
+    angle = 360 - angle % 360
+    spread = max(0, min(spread, 360))
+    if spread == 0:
+        return np.zeros(np.shape(d))
+
+    def _illuminated(d, d2):
+        return np.where(d <= spread / 2, d / spread + d1, d2)
+
+    d2 = _illuminated(np.abs(a - angle), 1.0)
+    if 360 - angle <= spread / 2:
+        d2 = _illuminated(np.abs(360 - angle + a), d2)
+    if angle < spread / 2:
+        d2 = _illuminated(np.abs(360 + angle - a), d2)
+
+    return 1 - np.clip(d2, 0, 1)
+
+
 # size(500, 500)
 # background(0.1,0,0.05)
 # colormode(HSB)
 # shadow()
-# for i in _range(4000):
-#    x = WIDTH*random()
-#    y = HEIGHT*random()
+# xs = [WIDTH*random() for i in _range(4000)]
+# ys = [HEIGHT*random() for i in _range(4000)]
+# for x, y, d in zip(xs, ys, shader(xs, ys, 450, 450, angle=135)):
 #    r = 10 + 20*random()
-#    d = shader(x, y, 450, 450, angle=135)
 #    # HSB is brighter and opaque in the centre of the light.
 #    fill(0.84+d*0.1, 1, 0.2+0.8*d, d)
 #    oval(x, y, r, r)
@@ -2423,8 +2849,13 @@ def shader(x, y, dx, dy, radius=300, angle=0, spread=90):
 
 DEFAULT_CACHE = os.path.join(os.path.dirname(__file__), "aggregated")
 
-_aggregated_name = ""
-_aggregated_dict = {}
+# Themes are parsed once and kept in memory, by the cache they were loaded from.
+# A zip archive of themes is indexed by file name the first time it is used,
+# and stays open while themes are loaded from it.
+
+_aggregated_dicts = {}
+_archives = {}
+_themes = {}
 
 
 def aggregated(cache=DEFAULT_CACHE):
@@ -2435,17 +2866,77 @@ def aggregated(cache=DEFAULT_CACHE):
     is the name of an XML-file in the subfolder. The XML-file contains
     color information harvested from the web (or handmade).
     """
-    global _aggregated_name, _aggregated_dict
-    if _aggregated_name != cache:
-        _aggregated_name = cache
-        _aggregated_dict = {}
+    if cache not in _aggregated_dicts:
+        aggregated_dict = {}
         for path in glob(os.path.join(cache, "*")):
             if os.path.isdir(path):
                 p = os.path.basename(path)
-                _aggregated_dict[p] = glob(os.path.join(path, "*"))
-                _aggregated_dict[p] = [os.path.basename(f)[:-4] for f in _aggregated_dict[p]]
+                aggregated_dict[p] = glob(os.path.join(path, "*"))
+                aggregated_dict[p] = [os.path.basename(f)[:-4] for f in aggregated_dict[p]]
+        _aggregated_dicts[cache] = aggregated_dict
 
-    return _aggregated_dict
+    return _aggregated_dicts[cache]
+
+
+def _archive(path):
+    """Returns an open ZipFile and a dictionary of its members by file name,
+    or None if path is not a zip file.
+
+    The archive is opened again if the file changed.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (st.st_mtime_ns, st.st_size)
+    if path not in _archives or _archives[path][0] != key:
+        if not zipfile.is_zipfile(path):
+            return None
+        zf = zipfile.ZipFile(path, "r")
+        members = {}
+        for fn in zf.namelist():
+            members.setdefault(os.path.basename(fn), fn)
+        _archives[path] = (key, zf, members)
+    return _archives[path][1:]
+
+
+def _parse_theme(xml):
+    """Returns the colors in Prism XML as a list of
+    (weight, rgba, name, [(shade name, weight), ...]) tuples.
+
+    rgba is None for colors that are only named.
+    """
+    colors = []
+    for e in ElementTree.fromstring(xml).iter("color"):
+        w = float(e.attrib["weight"])
+        try:
+            rgb = next(e.iter("rgb"))
+            rgba = tuple(float(rgb.attrib[v]) for v in "rgba")
+            name = e.attrib.get("name")
+        except (StopIteration, KeyError, ValueError):
+            rgba = None
+            name = e.attrib["name"]
+        shades = [(s.attrib["name"], float(s.attrib["weight"])) for s in e.iter("shade")]
+        colors.append((w, rgba, name, shades))
+    return colors
+
+
+def _theme_data(path, archive=None, member=None):
+    """Returns the parsed theme in the file at path, or member of archive,
+    parsing it the first time."""
+    if archive is None:
+        st = os.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size)
+    else:
+        key = (archive.filename, member)
+    if key not in _themes:
+        if archive is None:
+            with open(path, "rb") as f:
+                xml = f.read()
+        else:
+            xml = archive.read(member)
+        _themes[key] = _parse_theme(xml)
+    return _themes[key]
 
 
 class ColorThemeNotFound(Exception): pass
@@ -2487,23 +2978,17 @@ class ColorTheme(_list):
         path = os.path.join(self.cache, self.name + ".xml")
         if os.path.exists(path):
             self._load(self.top, self.blue)
-        elif name and zipfile.is_zipfile(os.path.join(self.cache + '.zip')):
+        elif name and _archive(self.cache + '.zip'):
             # Handle colors in a zipfile... the top level folder should be named the same
             # as the folder, e.g. 'aggregated'
-            archive = self.cache + '.zip'
-            zf = zipfile.ZipFile(archive, 'r')
+            zf, members = _archive(self.cache + '.zip')
             zpath = os.path.join(os.path.basename(self.cache), self.name + ".xml")
-            try:
+            if zpath not in zf.NameToInfo:
+                zpath = members.get(self.name + ".xml")
+            if zpath is not None:
                 zi = zf.getinfo(zpath)
                 self.cache = zi
                 self._load(self.top, self.blue, archive=zf, member=zi.filename)
-            except KeyError:
-                for fn in zf.namelist():
-                    if os.path.basename(fn) == self.name + '.xml':
-                        zi = zf.getinfo(fn)
-                        self.cache = zi
-                        self._load(self.top, self.blue, archive=zf, member=zi.filename)
-                        break
         else:
             a = aggregated(self.cache)
             for key in a:
@@ -2655,40 +3140,26 @@ class ColorTheme(_list):
         """
         if archive is None:
             path = os.path.join(self.cache, self.name + ".xml")
-            xml = open(path).read()
+            colors = _theme_data(path)
         else:
             assert member is not None
-            xml = archive.read(member)
-        dom = parseString(xml).documentElement
-
-        attr = lambda e, a: e.attributes[a].value
+            colors = _theme_data(None, archive, member)
 
-        for e in dom.getElementsByTagName("color")[:top]:
-            w = float(attr(e, "weight"))
-            try:
-                rgb = e.getElementsByTagName("rgb")[0]
-                clr = color(
-                    float(attr(rgb, "r")),
-                    float(attr(rgb, "g")),
-                    float(attr(rgb, "b")),
-                    float(attr(rgb, "a")),
-                    mode="rgb",
-                )
-                try:
-                    clr.name = attr(e, "name")
+        for w, rgba, name, shades in colors[:top]:
+            if rgba is not None:
+                clr = color(*rgba, mode="rgb")
+                if name is not None:
+                    clr.name = name
                     if clr.name == "blue": clr = color(blue)
-                except:
-                    pass
-            except:
-                name = attr(e, "name")
+            else:
                 if name == "blue": name = blue
                 clr = color(name)
 
-            for s in e.getElementsByTagName("shade"):
+            for shade_name, weight in shades:
                 self.ranges.append((
                     clr,
-                    shade(attr(s, "name")),
-                    w * float(attr(s, "weight")),
+                    shade(shade_name),
+                    w * weight,
                 ))
 
     def color(self, d=0.035):
@@ -3004,8 +3475,8 @@ class shadow(Grob):
         """Sets the dropshadow for all onscreen elements.
 
         Both the fill and stroke of a path get a dropshadow.
-
-        TODO - Implement shadow, could work as a postprocessing effect
+        The shadow is offset by dx, dy and blurred by blur pixels,
+        and is not affected by transformations.
         """
 
         Grob.__init__(self, _ctx)
@@ -3016,29 +3487,18 @@ class shadow(Grob):
         self.blur = blur
         self.clr = clr.copy()
         self.clr.alpha = alpha
-        # self._shadow = NSShadow.alloc().init()
-        # self._shadow.setShadowOffset_((dx, -dy))
-        # self._shadow.setShadowColor_(clr._rgb)
-        # self._shadow.setShadowBlurRadius_(blur)
-        # self.draw()
+        self._draw()
 
         global _shadow
         _shadow = self
 
     def _draw(self):
-
-        try:
-            # The shadow offset is not affected by transformations.
-            # With zoom=True, we respect the current zoom level in NodeBox.
-            # However: exported artwork will now use the current zoom level too.
-            if ZOOM_SHADOWS == True:
-                from AppKit import NSDocumentController
-                doc = NSDocumentController.sharedDocumentController().currentDocument()
-                z = doc.currentView.zoom
-                self._shadow.setShadowOffset_((self.dx * z, -self.dy * z))
-        except:
-            pass
-        self._shadow.set()
+        # New paths get the shadow from the canvas.
+        if self.clr.alpha > 0:
+            clr = self.clr
+            _ctx._canvas.shadow = (self.dx, self.dy, self.blur, clr.r, clr.g, clr.b, clr.a)
+        else:
+            _ctx._canvas.shadow = None
 
 
 def noshadow():
@@ -3046,33 +3506,25 @@ def noshadow():
 
 
 class gradientpath(Grob):
-    #
-    # This is heavily based on Core Image + will need to be reimplemented in Cairo.
-    #
+
     def __init__(self, path, clr1, clr2, type="radial", dx=0, dy=0, spread=1.0, angle=0, alpha=1.0):
         """Fills a path with a smooth gradient between two colors.
 
-        Creates a Core Image gradient and clips it to the given path.
+        The path is filled with a cairo gradient.
         The type can be radial or linear.
         The spread is the distance between the two colors (0.0-1.0 or absolute).
         The angle is useful for linear gradients, setting it to 90 degrees
         creates a horizontal instead of a vertical gradient.
 
         The gradient is in RGB color.
-        If shadows are being used, it is rendered in a clipping area
-        with a background that is the average of the two gradient colors
-        (we need a fill to render a shadow).
-        You can tweak this background's opacity with the alpha parameter.
+        If shadows are being used, the shadow is cast by the average
+        of the two gradient colors (we need a fill to render a shadow).
+        You can tweak this shadow's opacity with the alpha parameter.
         """
-        raise NotImplementedError("gradientpath not implemented yet.")
-        # gradientpath is not implemented, code below is from Nodebox
-        # and implemented with CoreImage
-        # this will need to be re-implemented in Cairo to work in Shoebot.
-
+        Grob.__init__(self, _ctx)
         self.path = path
-        self.path.inheritFromContext()
-        self.path.fillcolor = colorlist(clr1, clr2).average
-        self.path.fillcolor.alpha *= alpha
+        self.path.fill = colorlist(clr1, clr2).average
+        self.path.fill.alpha *= alpha
 
         self.clr1 = clr1
         self.clr2 = clr2
@@ -3083,41 +3535,15 @@ class gradientpath(Grob):
         self.spread = spread
         self.angle = angle
 
-        _ctx.canvas.append(self)
-
-        if _shadow:
-            self._shadow_alpha = _shadow.clr.alpha
-        else:
-            self._shadow_alpha = 0
+        self._draw()
 
     def _draw(self):
 
-        global _shadow
-
-        _save()
-
-        self.path.transform.concat()
-        (x, y), (w, h) = self.path.bounds
-
-        # When a gradient fill falls outside of the canvas,
-        # Core Graphics will produce a division by zero.
-        # This crashes NodeBox when exporting to PDF.
-        # Here we check if the transformed path (e.g.
-        # with scaling and rotation applied) will fall within the canvas bounds.
-        p = self.path.transform.transformBezierPath(self.path)
-        (tx, ty), (tw, th) = p.bounds
-        if tx + tw > 0 and ty + th > 0 and tx < _ctx.WIDTH and ty < _ctx.HEIGHT and tw > 0 and th > 0:
-            pass
-        else:
-            _restore()
+        (x1, y1, x2, y2) = self.path.bounds
+        x, y, w, h = x1, y1, x2 - x1, y2 - y1
+        if w <= 0 or h <= 0:
             return
 
-        # Set a fill to cast a shadow.
-        if _shadow and self._shadow_alpha > 0 \
-                and self.path.fillcolor:
-            self.path.fillcolor.set()
-            self.path._nsBezierPath.fill()
-
         # A relative spread fills the area as best as possible:
         # maximum of width/height for radial, minimum for linear.
         spread = max(0.1, self.spread)
@@ -3125,52 +3551,19 @@ class gradientpath(Grob):
             if self.type == "radial": spread *= max(w, h)
             if self.type == "linear": spread *= min(w, h)
 
-        # Don't render a dropshadow for the gradient overlay.
-        if _shadow:
-            _shadow._shadow.setShadowColor_(transparent()._rgb)
-            _shadow._shadow.set()
-
+        stops = ((0, *self.clr2), (1, *self.clr1))
         if self.type == "radial":
-            filter = CIFilter.filterWithName_("CIRadialGradient")
-            filter.setDefaults()
-            filter.setValue_forKey_(CIVector.vectorWithX_Y_(x + w / 2 + self.dx, y + h / 2 + self.dy), "inputCenter")
-            filter.setValue_forKey_(spread, "inputRadius1")
+            cx, cy = x + w / 2 + self.dx, y + h / 2 + self.dy
+            self.path.fillgradient = ("radial", cx, cy, 0, cx, cy, spread, stops)
 
         if self.type == "linear":
-            filter = CIFilter.filterWithName_("CILinearGradient")
-            filter.setDefaults()
             dx = cos(radians(90 - self.angle)) * spread
             dy = sin(radians(90 - self.angle)) * spread
-            filter.setValue_forKey_(CIVector.vectorWithX_Y_(x + self.dx, y + self.dy), "inputPoint0")
-            filter.setValue_forKey_(CIVector.vectorWithX_Y_(x + self.dx + dx, y + self.dy + dy), "inputPoint1")
-
-        if self.type in ["radial", "linear"]:
-            clr1 = CIColor.colorWithRed_green_blue_alpha_(
-                self.clr1.r, self.clr1.g, self.clr1.b, self.clr1.a,
-            )
-            clr2 = CIColor.colorWithRed_green_blue_alpha_(
-                self.clr2.r, self.clr2.g, self.clr2.b, self.clr2.a,
-            )
-            filter.setValue_forKey_(clr2, "inputColor0")
-            filter.setValue_forKey_(clr1, "inputColor1")
-            NSGraphicsContext.currentContext().saveGraphicsState()
-            context = NSGraphicsContext.currentContext().CIContext()
-            self.path._nsBezierPath.addClip()
-            context.drawImage_atPoint_fromRect_(
-                filter.valueForKey_("outputImage"), (x, y), ((x, y), (w, h)),
+            self.path.fillgradient = (
+                "linear", x + self.dx, y + self.dy, x + self.dx + dx, y + self.dy + dy, stops,
             )
-            NSGraphicsContext.currentContext().restoreGraphicsState()
 
-        if _shadow:
-            _shadow._shadow.setShadowColor_(_shadow.clr._rgb)
-            _shadow._shadow.set()
-
-        if self.path._strokecolor:
-            self.path._strokecolor.set()
-            self.path._nsBezierPath.setLineWidth_(self.path._strokewidth)
-            self.path._nsBezierPath.stroke()
-
-        _restore()
+        self.path.draw()
 
 
 gradientfill = gradientpath
@@ -3178,7 +3571,7 @@ gradientfill = gradientpath
 
 def gradientbackground(clr1, clr2, type="radial", dx=0, dy=0, spread=1.0, angle=0, alpha=1.0):
     gradientfill(
-        _ctx.rect(0, 0, _ctx.WIDTH, _ctx.HEIGHT),
+        _ctx.rect(0, 0, _ctx.WIDTH, _ctx.HEIGHT, draw=False),
         clr1, clr2, type, dx, dy, spread, angle, alpha,
     )
 
@@ -3239,6 +3632,9 @@ def colorwheel(x, y, r=250, labels=True, scope=1.0, shift=0.0):
 
     _ctx.reset()
 
+# 1.9.4.7-sb.5
+# Implement gradientpath() and shadow() with cairo.
+
 # 1.9.4.7-sb 2020-21-1
 # Fix HSB colors.
 
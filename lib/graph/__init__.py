@@ -57,9 +57,6 @@ class node:
 
         self._visited = False
 
-        self._betweenness = None
-        self._eigenvalue = None
-
         for k, v in list(properties.items()):
             if not k in self.__dict__:
                 self.__dict__[k] = v
@@ -88,17 +85,17 @@ class node:
         )
 
     def _get_betweenness(self):
-        if self._betweenness == None:
+        if self.graph._betweenness is None:
             self.graph.betweenness_centrality()
-        return self._betweenness
+        return self.graph._betweenness[self.id]
 
     betweenness = property(_get_betweenness)
     traffic = betweenness
 
     def _get_eigenvalue(self):
-        if self._eigenvalue == None:
+        if self.graph._eigenvalue is None:
             self.graph.eigenvector_centrality()
-        return self._eigenvalue
+        return self.graph._eigenvalue[self.id]
 
     eigenvalue = property(_get_eigenvalue)
     weight = eigenvalue
@@ -112,6 +109,26 @@ class node:
     x = property(_x)
     y = property(_y)
 
+    # Moving a node invalidates the graph's index of node positions.
+    def _get_vx(self):
+        return self._vx
+
+    def _set_vx(self, vx):
+        self._vx = vx
+        if self.graph is not None:
+            self.graph.events.invalidate()
+
+    def _get_vy(self):
+        return self._vy
+
+    def _set_vy(self, vy):
+        self._vy = vy
+        if self.graph is not None:
+            self.graph.events.invalidate()
+
+    vx = property(_get_vx, _set_vx)
+    vy = property(_get_vy, _set_vy)
+
     def __contains__(self, pt):
         """True if pt.x, pt.y is inside the node's absolute position."""
         return (
@@ -215,6 +232,11 @@ class graph(dict):
         self.edges = []
         self.root = None
 
+        # Centrality of each node, calculated when needed.
+        self._betweenness = None
+        self._betweenness_args = None
+        self._eigenvalue = None
+
         # Calculates positions for nodes.
         self.layout = layout_.__dict__[layout + "_layout"](self, iterations)
         self.d = node(None).r * 2.5 * distance
@@ -287,10 +309,18 @@ class graph(dict):
         self.nodes = []
         self.edges = []
         self.root = None
+        self._changed()
 
         self.layout.i = 0
         self.alpha = 0
 
+    def _changed(self):
+        """Called when nodes or edges are added or removed, so centrality
+        is recalculated next time it is needed."""
+        self._betweenness = None
+        self._eigenvalue = None
+        self.events.invalidate()
+
     def add_node(
         self,
         id,
@@ -313,6 +343,7 @@ class graph(dict):
         self.nodes.append(n)
         if root:
             self.root = n
+        self._changed()
 
         return n
 
@@ -352,6 +383,7 @@ class graph(dict):
         self.edges.append(e)
         n1.links.append(n2, e)
         n2.links.append(n1, e)
+        self._changed()
 
         return e
 
@@ -361,6 +393,7 @@ class graph(dict):
             n = self[id]
             self.nodes.remove(n)
             del self[id]
+            self._changed()
 
             # Remove all edges involving id and all links to it.
             for e in list(self.edges):
@@ -378,6 +411,7 @@ class graph(dict):
                 e.node1.links.remove(e.node2)
                 e.node2.links.remove(e.node1)
                 self.edges.remove(e)
+                self._changed()
 
     def node(self, id):
         """Returns the node in the graph associated with the given id."""
@@ -480,15 +514,12 @@ class graph(dict):
         if s.edges:
             s.edges(s, self.edges, self.alpha, weighted, directed)
 
-        # Draw each node in the graph.
+        # Draw the nodes in the graph, grouped by style.
         # Apply individual style to each node (or default).
-        for n in self.nodes:
-            try:
-                s = self.styles[n.style]
-            except:
-                s = self.styles.default
+        nodes_by_style = self._nodes_by_style()
+        for s, nodes in nodes_by_style:
             if s.node:
-                s.node(s, n, self.alpha)
+                s.nodes(s, nodes, self.alpha)
 
         # Highlight the given shortest path.
         try:
@@ -499,13 +530,9 @@ class graph(dict):
             s.path(s, self, highlight)
 
         # Draw node id's as labels on each node.
-        for n in self.nodes:
-            try:
-                s = self.styles[n.style]
-            except:
-                s = self.styles.default
+        for s, nodes in nodes_by_style:
             if s.node_label:
-                s.node_label(s, n, self.alpha)
+                s.node_labels(s, nodes, self.alpha)
 
         # Events for clicked and dragged nodes.
         # Nodes will resist being dragged by attraction and repulsion,
@@ -514,6 +541,18 @@ class graph(dict):
 
         _ctx.pop()
 
+    def _nodes_by_style(self):
+        """Returns a list of (style, nodes) for the styles used by nodes,
+        in the order they are first used."""
+        groups = {}
+        for n in self.nodes:
+            try:
+                groups[n.style].append(n)
+            except KeyError:
+                groups[n.style] = [n]
+        default = self.styles.default
+        return [(self.styles.get(name, default), nodes) for name, nodes in groups.items()]
+
     def prune(self, depth=0):
         """Removes all nodes with less or equal links than depth."""
         for n in list(self.nodes):
@@ -529,16 +568,23 @@ class graph(dict):
         except:
             return None
 
-    def betweenness_centrality(self, normalized=True):
+    def betweenness_centrality(self, normalized=True, processes=None, pivots=None):
         """Calculates betweenness centrality and returns an node id -> weight
         dictionary.
 
         Node betweenness weights are updated in the process.
+        The result is cached until nodes or edges are added or removed.
+        With processes, the calculation is split across that many processes.
+        With pivots, it is estimated from shortest paths starting at that
+        many nodes, which is much faster for large graphs.
         """
-        bc = proximity.brandes_betweenness_centrality(self, normalized)
-        for id, w in bc.items():
-            self[id]._betweenness = w
-        return bc
+        args = (normalized, pivots)
+        if self._betweenness is None or self._betweenness_args != args:
+            self._betweenness = proximity.brandes_betweenness_centrality(
+                self, normalized, processes, pivots,
+            )
+            self._betweenness_args = args
+        return self._betweenness
 
     def eigenvector_centrality(
         self,
@@ -557,8 +603,7 @@ class graph(dict):
         ec = proximity.eigenvector_centrality(
             self, normalized, reversed, rating, start, iterations, tolerance,
         )
-        for id, w in ec.items():
-            self[id]._eigenvalue = w
+        self._eigenvalue = ec
         return ec
 
     def nodes_by_betweenness(self, treshold=0.0):
@@ -1,6 +1,8 @@
 # Copyright (c) 2007 Tom De Smedt.
 # See LICENSE.txt for details.
 
+from math import floor, sqrt
+
 try:
     from en import wordnet
 except:
@@ -16,6 +18,44 @@ class Point:
         self.y = y
 
 
+#### SPATIAL INDEX ##################################################################################
+
+
+class grid:
+    """Nodes arranged in a uniform grid by their layout position (vx, vy).
+
+    Finds the nodes near a point by only looking in the cells around it,
+    instead of checking every node in the graph.
+    """
+
+    def __init__(self, nodes, size):
+        self.size = size
+        self.cells = {}
+        for i, n in enumerate(nodes):
+            cell = (floor(n.vx / size), floor(n.vy / size))
+            self.cells.setdefault(cell, []).append((i, n))
+
+    def candidates(self, x, y, radius):
+        """Returns nodes that may be within radius of x, y, in the order
+        they were given."""
+        x0, x1 = floor((x - radius) / self.size), floor((x + radius) / self.size)
+        y0, y1 = floor((y - radius) / self.size), floor((y + radius) / self.size)
+        nodes = []
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                nodes.extend(self.cells.get((cx, cy), ()))
+        nodes.sort(key=lambda i_n: i_n[0])
+        return [n for i, n in nodes]
+
+    def within(self, x, y, radius):
+        """Returns nodes within radius of x, y."""
+        return [
+            n
+            for n in self.candidates(x, y, radius)
+            if sqrt((n.vx - x) ** 2 + (n.vy - y) ** 2) <= radius
+        ]
+
+
 #### GRAPH HOVER/CLICK/DRAG EVENTS ###################################################################
 
 
@@ -35,6 +75,10 @@ class events:
         self.popup = False
         self.popup_text = {}
 
+        # Spatial index of the nodes, rebuilt when the nodes move.
+        self._grid = None
+        self._grid_key = None
+
     def copy(self, graph):
         """Returns a copy of the event handler, remembering the last node
         clicked."""
@@ -55,6 +99,32 @@ class events:
 
     mousedown = property(_mousedown)
 
+    def invalidate(self):
+        """Rebuild the spatial index of the nodes before it is next used."""
+        self._grid = None
+
+    def node_at(self, pt):
+        """Returns the first node containing pt, or None."""
+        nodes = self.graph.nodes
+        if not nodes or not self.graph.d:
+            return None
+
+        # The index is in layout coordinates, setting a node's vx or vy
+        # invalidates it, so a settled graph reuses it every frame.
+        key = (self.graph.layout.i, self.graph.d)
+        if self._grid is None or self._grid_key != key:
+            # A node contains points up to twice its radius away.
+            size = max(n.r for n in nodes) * 2.0 / self.graph.d
+            self._grid = grid(nodes, size)
+            self._grid_key = key
+
+        x = (pt.x - self.graph.x) / self.graph.d
+        y = (pt.y - self.graph.y) / self.graph.d
+        for n in self._grid.candidates(x, y, self._grid.size):
+            if pt in n:
+                return n
+        return None
+
     def update(self):
         """Interacts with the graph by clicking or dragging nodes.
 
@@ -64,10 +134,7 @@ class events:
         if self.mousedown:
             # When not pressing or dragging, check each node.
             if not self.pressed and not self.dragged:
-                for n in self.graph.nodes:
-                    if self.mouse in n:
-                        self.pressed = n
-                        break
+                self.pressed = self.node_at(self.mouse)
 
             # If a node is pressed, check if a drag is started.
             elif self.pressed and not self.mouse in self.pressed:
@@ -93,11 +160,10 @@ class events:
             self.dragged = None
 
             # Hovering over a node?
-            for n in self.graph.nodes:
-                if self.mouse in n:
-                    self.hovered = n
-                    self.hover(n)
-                    break
+            n = self.node_at(self.mouse)
+            if n is not None:
+                self.hovered = n
+                self.hover(n)
 
     def drag(self, node):
         """Drags given node to mouse location."""
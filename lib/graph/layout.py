@@ -1,6 +1,21 @@
 from random import random
 from math import pi, sin, cos
-from math import sqrt
+from math import floor, sqrt
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Graphs with at least this many nodes use NumPy for the spring layout, if it is installed.
+NUMPY_MIN_NODES = 64
+# Maximum number of node pairs handled at once by NumPy, limits memory use
+# when many nodes are close together.
+NUMPY_PAIRS_CHUNK = 1 << 20
+
+# Offsets to the cells around a cell that come after it, so each pair of
+# neighbouring cells is visited once.
+_NEIGHBOUR_CELLS = ((1, 0), (-1, 1), (0, 1), (1, 1))
 
 
 class Point:
@@ -174,7 +189,7 @@ class spring_layout(layout):
 
     def tweak(self, k=2, m=0.01, w=15, d=0.5, r=15):
         self.k = k
-        self.m = (m,)
+        self.m = m
         self.w = w
         self.d = d
         self.r = r
@@ -202,12 +217,12 @@ class spring_layout(layout):
         return l
 
     def iterate(self):
+        if np is not None and len(self.graph.nodes) >= NUMPY_MIN_NODES:
+            self._iterate_numpy()
+            return layout.iterate(self)
+
         # Forces on all nodes due to node-node repulsions.
-        for i in range(len(self.graph.nodes)):
-            n1 = self.graph.nodes[i]
-            for j in range(i + 1, len(self.graph.nodes)):
-                n2 = self.graph.nodes[j]
-                self._repulse(n1, n2)
+        self._repulse_nearby()
 
         # Forces on nodes due to edge attractions.
         for e in self.graph.edges:
@@ -224,6 +239,74 @@ class spring_layout(layout):
 
         return layout.iterate(self)
 
+    def _repulse_nearby(self):
+        """Repulse all pairs of nodes closer than the repulsion radius.
+
+        Nodes are put in a grid of cells the size of the radius, so only
+        nodes in the same or neighbouring cells need to be compared.
+        """
+        if self.r <= 0:
+            return
+        cells = {}
+        for n in self.graph.nodes:
+            cell = (floor(n.vx / self.r), floor(n.vy / self.r))
+            cells.setdefault(cell, []).append(n)
+
+        for (cx, cy), cell in cells.items():
+            for i, n1 in enumerate(cell):
+                for n2 in cell[i + 1 :]:
+                    self._repulse(n1, n2)
+            for ox, oy in _NEIGHBOUR_CELLS:
+                neighbours = cells.get((cx + ox, cy + oy))
+                if neighbours:
+                    for n1 in cell:
+                        for n2 in neighbours:
+                            self._repulse(n1, n2)
+
+    def _iterate_numpy(self):
+        """The same as iterate, with the forces calculated by NumPy on
+        arrays of node positions."""
+        nodes = self.graph.nodes
+        count = len(nodes)
+        x = np.fromiter((n.vx for n in nodes), float, count)
+        y = np.fromiter((n.vy for n in nodes), float, count)
+        fx = np.fromiter((n.force.x for n in nodes), float, count)
+        fy = np.fromiter((n.force.y for n in nodes), float, count)
+
+        # Forces on all nodes due to node-node repulsions.
+        if self.r > 0:
+            for i, j in _grid_pairs(x, y, self.r):
+                dx, dy, d = _distances(x, y, i, j)
+                near = d < self.r
+                i, j, dx, dy, d = i[near], j[near], dx[near], dy[near], d[near]
+                f = self.k ** 2 / d ** 2
+                _add_forces(fx, fy, j, i, f * dx, f * dy)
+
+        # Forces on nodes due to edge attractions.
+        edges = self.graph.edges
+        if edges:
+            index = {id(n): i for i, n in enumerate(nodes)}
+            i = np.fromiter((index[id(e.node1)] for e in edges), int, len(edges))
+            j = np.fromiter((index[id(e.node2)] for e in edges), int, len(edges))
+            weight = self.w * np.fromiter((e.weight for e in edges), float, len(edges))
+            length = 1.0 / np.fromiter((e.length for e in edges), float, len(edges))
+
+            dx, dy, d = _distances(x, y, i, j)
+            d = np.minimum(d, self.r)
+            f = (d ** 2 - self.k ** 2) / self.k * length
+            f *= weight * 0.5 + 1
+            f /= d
+            _add_forces(fx, fy, i, j, f * dx, f * dy)
+
+        # Move by given force.
+        x += np.clip(self.m * fx, -self.d, self.d)
+        y += np.clip(self.m * fy, -self.d, self.d)
+        for n, vx, vy in zip(nodes, x.tolist(), y.tolist()):
+            n.vx = vx
+            n.vy = vy
+            n.force.x = 0
+            n.force.y = 0
+
     def _distance(self, n1, n2):
         dx = n2.vx - n1.vx
         dy = n2.vy - n1.vy
@@ -260,3 +343,80 @@ class spring_layout(layout):
         n2.force.y -= f * dy
         n1.force.x += f * dx
         n1.force.y += f * dy
+
+
+def _distances(x, y, i, j):
+    """NumPy version of spring_layout._distance, for the pairs of nodes
+    i[n], j[n]."""
+    dx = x[j] - x[i]
+    dy = y[j] - y[i]
+    d2 = dx ** 2 + dy ** 2
+
+    close = d2 < 0.01
+    if close.any():
+        dx[close] = np.random.random(close.sum()) * 0.1 + 0.1
+        dy[close] = np.random.random(close.sum()) * 0.1 + 0.1
+        d2[close] = dx[close] ** 2 + dy[close] ** 2
+
+    return dx, dy, np.sqrt(d2)
+
+
+def _add_forces(fx, fy, add, subtract, dx, dy):
+    """Add dx, dy to the forces on nodes add, and subtract them from the
+    forces on nodes subtract."""
+    count = len(fx)
+    fx += np.bincount(add, dx, count) - np.bincount(subtract, dx, count)
+    fy += np.bincount(add, dy, count) - np.bincount(subtract, dy, count)
+
+
+def _grid_pairs(x, y, r):
+    """Yield arrays i, j of the pairs of nodes in the same or neighbouring
+    cells of a grid with cells of size r, at most NUMPY_PAIRS_CHUNK pairs
+    at a time.
+
+    These are all the pairs of nodes that may be closer than r.
+    """
+    count = len(x)
+    cx = np.floor(x / r).astype(np.int64)
+    cy = np.floor(y / r).astype(np.int64)
+    cx -= cx.min()
+    cy -= cy.min()
+    # Leave a column either side of the grid, for neighbours of the
+    # cells at the edges.
+    width = int(cx.max()) + 3
+    keys = cy * width + cx + 1
+
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    # Position of each node in the sorted order.
+    position = np.empty(count, np.int64)
+    position[order] = np.arange(count)
+
+    for ox, oy in ((0, 0),) + _NEIGHBOUR_CELLS:
+        neighbour_keys = keys + oy * width + ox
+        end = np.searchsorted(sorted_keys, neighbour_keys, "right")
+        if (ox, oy) == (0, 0):
+            # Nodes in the same cell, each pair once.
+            start = position + 1
+        else:
+            start = np.searchsorted(sorted_keys, neighbour_keys, "left")
+        counts = np.maximum(end - start, 0)
+
+        # Split the nodes into chunks with a bounded number of pairs.
+        total = np.cumsum(counts)
+        bounds = np.searchsorted(
+            total, np.arange(NUMPY_PAIRS_CHUNK, total[-1], NUMPY_PAIRS_CHUNK), "right",
+        )
+        for first, last in zip(
+            np.concatenate(([0], bounds)), np.concatenate((bounds, [count])),
+        ):
+            chunk_counts = counts[first:last]
+            pairs = int(chunk_counts.sum())
+            if not pairs:
+                continue
+            i = np.repeat(np.arange(first, last), chunk_counts)
+            # Index in sorted order of the first neighbour of each node,
+            # then step through the neighbours.
+            offsets = start[first:last] - (np.cumsum(chunk_counts) - chunk_counts)
+            j = order[np.arange(pairs) + np.repeat(offsets, chunk_counts)]
+            yield i, j
@@ -1,5 +1,6 @@
 import heapq
-from random import random
+from collections import deque
+from random import random, sample
 from warnings import warn
 
 # --- PRIORITY QUEUE ----------------------------------------------------------------------------------
@@ -131,7 +132,7 @@ def dijkstra_shortest_path(graph, id1, id2, heuristic=None):
 # --- BRANDES BETWEENNESS CENTRALITY ------------------------------------------------------------------
 
 
-def brandes_betweenness_centrality(graph, normalized=True):
+def brandes_betweenness_centrality(graph, normalized=True, processes=None, pivots=None):
     """Betweenness centrality for nodes in the graph.
 
     Betweenness centrality is a measure of the number of shortests paths that pass through a node.
@@ -141,43 +142,73 @@ def brandes_betweenness_centrality(graph, normalized=True):
     from NetworkX 0.35.1: Aric Hagberg, Dan Schult and Pieter Swart,
     based on Dijkstra's algorithm for shortest paths modified from Eppstein.
     https://networkx.lanl.gov/wiki
+
+    If all edges have the same weight, shortest paths are found with a
+    breadth-first search instead of Dijkstra's algorithm.
+    With processes, the shortest paths from each node are split across
+    a pool of that many processes, node id's must be picklable.
+    With pivots, only shortest paths from that many randomly chosen nodes
+    are counted, giving an estimate for large graphs.
     """
     G = list(graph.keys())
     W = adjacency(graph)
+    weighted = len(set(e.weight for e in graph.edges)) > 1
+
+    sources = G
+    if pivots is not None and pivots < len(G):
+        sources = sample(G, pivots)
+
+    if processes and processes > 1 and len(sources) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunks = [sources[i::processes] for i in range(processes)]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(
+                executor.map(
+                    _betweenness_from_sources,
+                    [W] * len(chunks),
+                    chunks,
+                    [weighted] * len(chunks),
+                ),
+            )
+        betweenness = dict.fromkeys(G, 0.0)
+        for result in results:
+            for id, w in result.items():
+                betweenness[id] += w
+    else:
+        betweenness = _betweenness_from_sources(W, sources, weighted)
+
+    if sources is not G:
+        # Scale the estimate up to all the nodes.
+        scale = float(len(G)) / len(sources)
+        betweenness = dict([(id, w * scale) for id, w in betweenness.items()])
+
+    if normalized:
+        # Normalize between 0.0 and 1.0.
+        m = max(betweenness.values()) if betweenness else 0
+        if m == 0:
+            m = 1
+    else:
+        m = 1
 
-    betweenness = dict.fromkeys(G, 0.0)  # b[v]=0 for v in G
-    for s in G:
-        S = []
-        P = {}
-        for v in G:
-            P[v] = []
-        sigma = dict.fromkeys(G, 0)  # sigma[v]=0 for v in G
-        D = {}
-        sigma[s] = 1
-        seen = {s: 0}
-        Q = []  # use Q as heap with (distance, node id) tuples
-        heapq.heappush(Q, (0, s, s))
-        while Q:
-            (dist, pred, v) = heapq.heappop(Q)
-            if v in D:
-                continue  # already searched this node
-            sigma[v] = sigma[v] + sigma[pred]  # count paths
-            S.append(v)
-            D[v] = seen[v]
-            for w in graph[v].links:
-
-                w = w.id
-                vw_dist = D[v] + W[v][w]
-
-                if w not in D and (w not in seen or vw_dist < seen[w]):
-                    seen[w] = vw_dist
-                    heapq.heappush(Q, (vw_dist, v, w))
-                    P[w] = [v]
-                elif vw_dist == seen[w]:  # handle equal paths
-                    sigma[w] = sigma[w] + sigma[v]
-                    P[w].append(v)
-
-        delta = dict.fromkeys(G, 0)
+    betweenness = dict([(id, w / m) for id, w in betweenness.items()])
+    return betweenness
+
+
+def _betweenness_from_sources(W, sources, weighted=True):
+    """Unnormalized betweenness, counting only shortest paths that start at
+    the sources.
+
+    W is the adjacency of the graph.
+    """
+    betweenness = dict.fromkeys(W, 0.0)
+    for s in sources:
+        if weighted:
+            S, P, sigma = _dijkstra_paths(W, s)
+        else:
+            S, P, sigma = _breadth_first_paths(W, s)
+
+        delta = dict.fromkeys(S, 0)
         while S:
             w = S.pop()
             for v in P[w]:
@@ -186,18 +217,65 @@ def brandes_betweenness_centrality(graph, normalized=True):
                 )
             if w != s:
                 betweenness[w] = betweenness[w] + delta[w]
+    return betweenness
 
-        # -----------------------------------
-        if normalized:
-            # Normalize between 0.0 and 1.0.
-            m = max(betweenness.values())
-            if m == 0:
-                m = 1
-        else:
-            m = 1
 
-        betweenness = dict([(id, w / m) for id, w in betweenness.items()])
-        return betweenness
+def _dijkstra_paths(W, s):
+    """Shortest paths from s, using edge weights.
+
+    :return: nodes in order of distance from s, predecessors of each node
+             on shortest paths and the number of shortest paths to each node.
+    """
+    S = []
+    P = {s: []}
+    sigma = {s: 1}
+    D = {}
+    seen = {s: 0}
+    Q = []  # use Q as heap with (distance, node id) tuples
+    heapq.heappush(Q, (0, s, s))
+    while Q:
+        (dist, pred, v) = heapq.heappop(Q)
+        if v in D:
+            continue  # already searched this node
+        if v != s:
+            sigma[v] = sigma[v] + sigma[pred]  # count paths
+        S.append(v)
+        D[v] = seen[v]
+        for w, vw_weight in W[v].items():
+            vw_dist = D[v] + vw_weight
+
+            if w not in D and (w not in seen or vw_dist < seen[w]):
+                seen[w] = vw_dist
+                heapq.heappush(Q, (vw_dist, v, w))
+                sigma[w] = 0
+                P[w] = [v]
+            elif vw_dist == seen[w]:  # handle equal paths
+                sigma[w] = sigma[w] + sigma[v]
+                P[w].append(v)
+    return S, P, sigma
+
+
+def _breadth_first_paths(W, s):
+    """Shortest paths from s when all edges have the same weight, like
+    _dijkstra_paths."""
+    S = []
+    P = {s: []}
+    sigma = {s: 1}
+    D = {s: 0}
+    Q = deque([s])
+    while Q:
+        v = Q.popleft()
+        S.append(v)
+        for w in W[v]:
+            if w not in D:
+                D[w] = D[v] + 1
+                sigma[w] = 0
+                P[w] = []
+                Q.append(w)
+            if D[w] == D[v] + 1:  # count paths
+                sigma[w] = sigma[w] + sigma[v]
+                P[w].append(v)
+    return S, P, sigma
 
 
 # --- EIGENVECTOR CENTRALITY --------------------------------------------------------------------------
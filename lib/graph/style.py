@@ -145,7 +145,9 @@ class style:
         self.graph_background = graph_background
         self.graph_traffic = graph_traffic
         self.node = node
+        self.nodes = nodes
         self.node_label = node_label
+        self.node_labels = node_labels
         self.edges = edges
         self.edge = edge
         self.edge_arrow = edge_arrow
@@ -231,6 +233,39 @@ def node(s, node, alpha=1.0):
     s._ctx.oval(node.x - r, node.y - r, r * 2, r * 2)
 
 
+def nodes(s, nodes, alpha=1.0):
+    """Visualization of all the nodes with the same style.
+
+    Default nodes are drawn as a single BezierPath for speed, nodes with
+    their own node function are drawn one by one.
+    """
+    if s.node is not node:
+        for n in nodes:
+            s.node(s, n, alpha)
+        return
+
+    if s.depth:
+        try:
+            colors.shadow(dx=5, dy=5, blur=10, alpha=0.5 * alpha)
+        except:
+            pass
+
+    s._ctx.nofill()
+    s._ctx.nostroke()
+    if s.fill:
+        s._ctx.fill(s.fill.r, s.fill.g, s.fill.b, s.fill.a * alpha)
+    if s.stroke:
+        s._ctx.strokewidth(s.strokewidth)
+        s._ctx.stroke(s.stroke.r, s.stroke.g, s.stroke.b, s.stroke.a * alpha * 3)
+
+    # The path takes the colors set above.
+    p = s._ctx.BezierPath()
+    for n in nodes:
+        r = n.r
+        p.ellipse(n.x - r, n.y - r, r * 2, r * 2)
+    p.draw()
+
+
 # --- NODE LABEL -------------------------------------------------------------------------------------
 
 
@@ -276,10 +311,38 @@ def node_label(s, node, alpha=1.0):
         s._ctx.push()
         s._ctx.translate(node.x, node.y)
         s._ctx.scale(alpha)
-        s._ctx.drawpath(p.copy())
+        s._ctx.drawpath(p)
         s._ctx.pop()
 
 
+def node_labels(s, nodes, alpha=1.0):
+    """Visualization of the id's of all the nodes with the same style."""
+    if s.node_label is not node_label:
+        for n in nodes:
+            s.node_label(s, n, alpha)
+        return
+
+    if s.text:
+        s._ctx.font(s.font)
+        s._ctx.fontsize(s.fontsize)
+        s._ctx.nostroke()
+        s._ctx.fill(s.text.r, s.text.g, s.text.b, s.text.a * alpha)
+
+        for n in nodes:
+            # Labels are outlined once by node_label, then translated.
+            try:
+                p = n._textpath
+            except AttributeError:
+                node_label(s, n, alpha)
+                continue
+
+            s._ctx.push()
+            s._ctx.translate(n.x, n.y)
+            s._ctx.scale(alpha)
+            s._ctx.drawpath(p)
+            s._ctx.pop()
+
+
 # --- EDGES -------------------------------------------------------------------------------------------
 
 
@@ -297,11 +360,9 @@ def edges(s, edges, alpha=1.0, weighted=False, directed=False):
     # depending on their weight rounded between 0 and 10.
     if len(edges) == 0:
         return
-    for e in edges:
-        try:
-            s2 = e.node1.graph.styles[e.node1.style]
-        except:
-            s2 = s
+    styles = edges[0].node1.graph.styles
+    edge_styles = [styles.get(e.node1.style, s) for e in edges]
+    for e, s2 in zip(edges, edge_styles):
         if s2.edge:
             s2.edge(s2, p, e, alpha)
             if directed and s.stroke:
@@ -319,7 +380,7 @@ def edges(s, edges, alpha=1.0, weighted=False, directed=False):
         s._ctx.stroke(s.fill.r, s.fill.g, s.fill.b, s.fill.a * 0.65 * alpha)
         for w in range(1, len(pw)):
             s._ctx.strokewidth(r * w * 0.1)
-            s._ctx.drawpath(pw[w].copy())
+            s._ctx.drawpath(pw[w])
 
     # All edges use the default stroke.
     if s.stroke:
@@ -327,7 +388,7 @@ def edges(s, edges, alpha=1.0, weighted=False, directed=False):
 
         s._ctx.stroke(s.stroke.r, s.stroke.g, s.stroke.b, s.stroke.a * 0.65 * alpha)
 
-    s._ctx.drawpath(p.copy())
+    s._ctx.drawpath(p)
 
     if directed and s.stroke:
         # clr = s._ctx.stroke().copy()
@@ -338,13 +399,9 @@ def edges(s, edges, alpha=1.0, weighted=False, directed=False):
         clr.a *= 1.3
 
         s._ctx.stroke(clr)
-        s._ctx.drawpath(pd.copy())
+        s._ctx.drawpath(pd)
 
-    for e in edges:
-        try:
-            s2 = self.styles[e.node1.style]
-        except:
-            s2 = s
+    for e, s2 in zip(edges, edge_styles):
         if s2.edge_label:
             s2.edge_label(s2, e, alpha)
 
@@ -451,7 +508,7 @@ def edge_label(s, edge, alpha=1.0):
             s._ctx.rotate(180)
             s._ctx.transform(CORNER)
 
-        s._ctx.drawpath(p.copy())
+        s._ctx.drawpath(p)
         s._ctx.pop()
 
 
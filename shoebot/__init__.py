@@ -75,6 +75,7 @@ def create_canvas(
     title=None,
     fullscreen=None,
     show_vars=False,
+    framerate=None,
 ):
     """Create canvas and sink for attachment to a bot.
 
@@ -85,14 +86,17 @@ def create_canvas(
     :param format: CairoImageSink image format, if using buff instead of outputfile
     :param buff: CairoImageSink buffer object to send output to
 
-    :param outputfile: CairoImageSink output filename e.g. "hello.svg"
+    :param outputfile: CairoImageSink output filename e.g. "hello.svg",
+                       or CairoVideoSink filename e.g. "hello.mp4"
     :param multifile: CairoImageSink if True,
 
     :param title: ShoebotWindow - set window title
     :param fullscreen: ShoebotWindow - set window title
     :param show_vars: ShoebotWindow - display variable window
 
-    Two kinds of sink are provided: CairoImageSink and ShoebotWindow
+    :param framerate: CairoVideoSink frames per second, defaults to the bot speed.
+
+    Three kinds of sink are provided: CairoImageSink, CairoVideoSink and ShoebotWindow
 
     ShoebotWindow
 
@@ -102,11 +106,18 @@ def create_canvas(
     CairoImageSink
 
     Output to a filename (or files if multifile is set), or a buffer object.
+
+
+    CairoVideoSink
+
+    Encode every frame to a single video file using ffmpeg.
     """
     from shoebot.core import (
         CairoCanvas,
         CairoImageSink,
+        CairoVideoSink,
     )  # https://github.com/shoebot/shoebot/issues/206
+    from shoebot.core.cairo_sink import VIDEO_FORMATS
 
     if window or show_vars:
         from shoebot.gui import ShoebotWindow
@@ -119,6 +130,8 @@ def create_canvas(
         sink = ShoebotWindow(
             title, show_vars, fullscreen=fullscreen, outputfile=outputfile,
         )
+    elif outputfile and os.path.splitext(outputfile)[1][1:].lower() in VIDEO_FORMATS:
+        sink = CairoVideoSink(outputfile, framerate=framerate)
     elif outputfile:
         sink = CairoImageSink(outputfile, format, multifile, buff)
     else:
@@ -151,6 +164,7 @@ def create_bot(
     show_vars=False,
     vars=None,
     namespace=None,
+    framerate=None,
 ):
     """Create a canvas and a bot with the same canvas attached to it.
 
@@ -173,6 +187,7 @@ def create_bot(
         title=title,
         fullscreen=fullscreen,
         show_vars=show_vars,
+        framerate=framerate,
     )
 
     bot = NodeBot(canvas, namespace=namespace, vars=vars)
@@ -262,11 +277,23 @@ def run(
     args=[],
     verbose=False,
     background_thread=True,
+    processes=1,
+    frame_stats=False,
+    frame_trace=None,
+    frame_policy="skip",
+    framerate=None,
 ):
     """Create and run a bot, the arguments all correspond to sanitized
     commandline options.
 
     :param background_thread: If True then use a background thread.
+    :param processes: Number of processes to render frames with, only used when
+                      several frames are output to files without a window.
+    :param frame_stats: If True print frame timing statistics when the bot finishes.
+    :param frame_trace: Filename to write a Chrome trace of frame timings to.
+    :param frame_policy: What to do when animation frames run late, "skip" or
+                         "catchup".
+    :param framerate: Frames per second of video output, defaults to the bot speed.
 
 
     Other args are split into create_args and run_args
@@ -306,7 +333,7 @@ def run(
         port,
         show_vars,
     ]
-    create_kwargs = dict(vars=vars, namespace=namespace)
+    create_kwargs = dict(vars=vars, namespace=namespace, framerate=framerate)
     run_args = [src]
     run_kwargs = dict(
         max_iterations=max_iterations,
@@ -315,8 +342,27 @@ def run(
         # run forever except 1. windowed mode is off 2. if --close-window was specified and
         # 3. if an output file was indicated
         run_forever=window and not (close_window or bool(outputfile)),
+        frame_stats=frame_stats,
+        frame_trace=frame_trace,
+        frame_policy=frame_policy,
     )
 
+    from shoebot.core.cairo_sink import VIDEO_FORMATS
+
+    multiple_files = (
+        outputfile
+        and not window
+        and (max_iterations or 1) > 1
+        and os.path.splitext(outputfile)[1][1:].lower() not in VIDEO_FORMATS
+    )
+    if processes > 1 and multiple_files:
+        # Multiple frames to numbered files: split rendering across processes.
+        from shoebot.parallel import run_parallel
+
+        return run_parallel(
+            create_args, create_kwargs, run_args, run_kwargs, processes=processes,
+        )
+
     # Run shoebot in a background thread so we can run a cmdline shell in the current thread
     if background_thread:
         sbot_thread = ShoebotThread(
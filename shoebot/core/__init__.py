@@ -38,6 +38,6 @@ from .cairo_canvas import CairoCanvas
 
 from .drawqueue import DrawQueue
 from .drawqueue_sink import DrawQueueSink
-from .cairo_sink import CairoImageSink
+from .cairo_sink import CairoImageSink, CairoVideoSink
 
 from .input_device import InputDeviceMixin
@@ -36,6 +36,7 @@ from .backend import cairo
 from .input_device import InputDeviceMixin
 from .canvas import Canvas
 from .drawqueue import DrawQueue
+from .tiled_png import write_png_tiled
 
 
 class CairoCanvas(Canvas):
@@ -46,7 +47,7 @@ class CairoCanvas(Canvas):
         self.size = None
 
     def initial_drawqueue(self):
-        return DrawQueue()
+        return DrawQueue(scene_cache=self.scene_cache)
 
     def initial_transform(self):
         """Return an identity matrix."""
@@ -169,7 +170,11 @@ class CairoCanvas(Canvas):
             extension = extension.lower()
             if extension == ".png":
                 surface = ctx.get_target()
-                surface.write_to_png(target)
+                if isinstance(surface, cairo.RecordingSurface):
+                    # Large PNG output is recorded, see CairoImageSink.
+                    write_png_tiled(surface, *self.size_or_default(), target)
+                else:
+                    surface.write_to_png(target)
             elif extension == ".pdf":
                 target_ctx = cairo.Context(
                     cairo.PDFSurface(filename, *self.size_or_default()),
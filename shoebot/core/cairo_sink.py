@@ -28,13 +28,37 @@
 #   OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
 #   ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 import os
+import subprocess
+import sys
+import threading
+from queue import Queue
 
 from .backend import cairo
 from .drawqueue_sink import DrawQueueSink
+from .tiled_png import write_png_tiled
+
+VIDEO_FORMATS = ("mp4", "mov", "mkv", "webm", "gif")
+DEFAULT_VIDEO_FRAMERATE = 30
+
+# ffmpeg encoder options for each video format.
+VIDEO_ENCODER_ARGS = {
+    "mp4": ["-c:v", "libx264", "-crf", "20", "-movflags", "faststart"],
+    "mov": ["-c:v", "libx264", "-crf", "20", "-movflags", "faststart"],
+    "mkv": ["-c:v", "libx264", "-crf", "20"],
+    "webm": ["-c:v", "libvpx-vp9", "-crf", "30", "-b:v", "0"],
+    "gif": [],
+}
 
 
 class CairoImageSink(DrawQueueSink):
-    """DrawQueueSink that uses cairo contexts as the render context."""
+    """DrawQueueSink that uses cairo contexts as the render context.
+
+    PNG images larger than tile_threshold pixels are recorded, then
+    rasterized in bands on tile_workers threads, see shoebot.core.tiled_png.
+    """
+
+    tile_threshold = 32 * 1024 * 1024
+    tile_workers = None  # Defaults to the number of CPUs.
 
     def __init__(self, target=None, format=None, multifile=False, buff=None):
         """
@@ -87,14 +111,26 @@ class CairoImageSink(DrawQueueSink):
             surface.restrict_to_version(cairo.SVGVersion.VERSION_1_2)
         elif self.format == "surface":
             surface = self.target
+        elif self._tiled(size):
+            surface = cairo.RecordingSurface(
+                cairo.CONTENT_COLOR_ALPHA, (0, 0) + tuple(size),
+            )
         else:
             surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, *size)
         return cairo.Context(surface)
 
+    def _tiled(self, size):
+        width, height = size
+        return self.format == "png" and width * height > self.tile_threshold
+
     def rendering_finished(self, size, frame, cairo_ctx):
         """Called when CairoCanvas has rendered a bot."""
         surface = cairo_ctx.get_target()
-        if self.format == "png":
+        if self.format == "png" and self._tiled(size):
+            write_png_tiled(
+                surface, *size, self._output_file(frame), workers=self.tile_workers,
+            )
+        elif self.format == "png":
             surface.write_to_png(self._output_file(frame))
         surface.finish()
         surface.flush()
@@ -102,3 +138,123 @@ class CairoImageSink(DrawQueueSink):
     def set_title(self, title):
         # Does nothing, only relevant to GUI
         pass
+
+
+class CairoVideoSink(DrawQueueSink):
+    """DrawQueueSink that encodes frames to a video file using ffmpeg.
+
+    Each frame is rendered to an image surface, its pixel data is piped
+    to ffmpeg as raw video from a background thread.  At most max_pending
+    frames are buffered, after that rendering waits for the encoder to
+    catch up.
+    """
+
+    def __init__(self, target, framerate=None, max_pending=8, ffmpeg="ffmpeg"):
+        """
+        :param target:      output filename, e.g. "output.mp4"
+        :param framerate:   frames per second of the video, defaults to the bot speed.
+        :param max_pending: maximum number of rendered frames waiting to be encoded.
+        :param ffmpeg:      ffmpeg executable to run.
+        """
+        DrawQueueSink.__init__(self)
+        self.target = target
+        self.format = os.path.splitext(target)[1][1:].lower()
+        self.framerate = framerate
+        self.ffmpeg = ffmpeg
+        self._pending = Queue(maxsize=max_pending)
+        self._encoder = None
+        self._writer = None
+        self._error = None
+
+    def _get_framerate(self):
+        if self.framerate:
+            return self.framerate
+        speed = getattr(getattr(self, "bot", None), "_speed", None)
+        if speed and speed > 0:
+            return speed
+        return DEFAULT_VIDEO_FRAMERATE
+
+    def _start_encoder(self, size):
+        width, height = size
+        # Cairo ARGB32 is stored native-endian.
+        pix_fmt = "bgra" if sys.byteorder == "little" else "argb"
+        cmd = [
+            self.ffmpeg,
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            pix_fmt,
+            "-s",
+            f"{width}x{height}",
+            "-r",
+            str(self._get_framerate()),
+            "-i",
+            "-",
+            *VIDEO_ENCODER_ARGS.get(self.format, []),
+        ]
+        if self.format != "gif":
+            # yuv420p needs even dimensions.
+            cmd += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p"]
+        cmd.append(self.target)
+
+        self._encoder = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        self._writer = threading.Thread(target=self._write_frames, daemon=True)
+        self._writer.start()
+
+    def _write_frames(self):
+        """Background thread, send rendered surfaces to the encoder."""
+        while True:
+            surface = self._pending.get()
+            if surface is None:
+                break
+            if self._error is None:
+                try:
+                    self._encoder.stdin.write(surface.get_data())
+                except OSError as e:
+                    # Keep consuming frames so rendering does not block.
+                    self._error = e
+            surface.finish()
+
+    def create_rcontext(self, size, frame):
+        """Called when CairoCanvas needs a cairo context to draw on."""
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, *size)
+        return cairo.Context(surface)
+
+    def rendering_finished(self, size, frame, cairo_ctx):
+        """Called when CairoCanvas has rendered a bot, queue the frame for
+        encoding."""
+        if self._error is not None:
+            raise IOError(f"Error writing video to {self.ffmpeg}: {self._error}")
+        if self._encoder is None:
+            self._start_encoder(size)
+
+        surface = cairo_ctx.get_target()
+        surface.flush()
+        self._pending.put(surface)
+
+    def run_finished(self):
+        """Wait for pending frames to be encoded and close the video file."""
+        if self._encoder is None:
+            return
+        self._pending.put(None)
+        self._writer.join()
+        encoder, self._encoder = self._encoder, None
+        try:
+            encoder.stdin.close()
+        except BrokenPipeError as e:
+            # ffmpeg exited before reading everything.
+            self._error = self._error or e
+        returncode = encoder.wait()
+        if self._error is not None:
+            raise IOError(f"Error writing video to {self.ffmpeg}: {self._error}")
+        if returncode != 0:
+            raise IOError(
+                f"{self.ffmpeg} failed to encode {self.target}, exit status {returncode}",
+            )
+
+    def set_title(self, title):
+        # Does nothing, only relevant to GUI
+        pass
@@ -68,6 +68,8 @@ class Canvas(metaclass=abc.ABCMeta):
         self.color_mode = 1
         self.path_mode = CORNER
         self.size = None
+        # Set to a SceneCache to reuse unchanged primitives between frames.
+        self.scene_cache = None
         self.reset_canvas()
 
     def set_bot(self, bot):
@@ -81,7 +83,7 @@ class Canvas(metaclass=abc.ABCMeta):
 
     def initial_drawqueue(self):
         """Override to create use special kinds of draw queue."""
-        return DrawQueue()
+        return DrawQueue(scene_cache=self.scene_cache)
 
     def initial_transform(self):
         """Must be overriden to create initial transform matrix."""
@@ -160,9 +162,14 @@ class Canvas(metaclass=abc.ABCMeta):
         self.sink.render(self.size_or_default(), frame, self._drawqueue)
         self.reset_drawqueue()
 
-    def deferred_render(self, render_func):
+    def deferred_render(self, render_func, key=None):
         """Add a render function to the queue for rendering later."""
-        self._drawqueue.append(render_func)
+        self._drawqueue.append(render_func, key)
+
+    def deferred_render_path(self, matrix, ops, coords, render_func, key=None):
+        """Add a path to the queue for rendering later, see
+        DrawQueue.append_path."""
+        self._drawqueue.append_path(matrix, ops, coords, render_func, key)
 
     width = property(get_width)
     height = property(get_height)
@@ -28,36 +28,174 @@
 #   OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
 #   ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-from collections import deque
+from array import array
+from math import pi as _pi
+
+from .backend import cairo
+
+# Opcodes for the draw operations recorded in a DrawQueue.
+#
+# Every op except OP_CALL reads its parameters from a flat array of
+# coordinates, OP_COORDS lists how many each op takes.
+OP_CALL = 0  # Call the next render function.
+OP_MATRIX = 1  # Set the transform matrix: xx, yx, xy, yy, x0, y0
+OP_MOVETO = 2  # x, y
+OP_RMOVETO = 3  # x, y
+OP_LINETO = 4  # x, y
+OP_RLINETO = 5  # x, y
+OP_CURVETO = 6  # x1, y1, x2, y2, x3, y3
+OP_RCURVETO = 7  # x1, y1, x2, y2, x3, y3
+OP_ARC = 8  # x, y, radius, angle1, angle2
+OP_ELLIPSE = 9  # x, y, w, h
+OP_CLOSE = 10
+
+OP_COORDS = bytes([0, 6, 2, 2, 2, 2, 6, 6, 5, 4, 0])
+
+
+def render_ops(ctx, ops, coords, render_funcs=()):
+    """Replay recorded ops on a cairo context.
+
+    :param ctx: cairo context to render on.
+    :param ops: sequence of opcodes.
+    :param coords: flat array of coordinates used by the ops.
+    :param render_funcs: callables used, in order, by each OP_CALL.
+    """
+    move_to = ctx.move_to
+    line_to = ctx.line_to
+    curve_to = ctx.curve_to
+    close_path = ctx.close_path
+    render_funcs = iter(render_funcs)
+
+    i = 0
+    for op in ops:
+        if op == OP_LINETO:
+            line_to(coords[i], coords[i + 1])
+            i += 2
+        elif op == OP_CURVETO:
+            curve_to(
+                coords[i],
+                coords[i + 1],
+                coords[i + 2],
+                coords[i + 3],
+                coords[i + 4],
+                coords[i + 5],
+            )
+            i += 6
+        elif op == OP_MOVETO:
+            move_to(coords[i], coords[i + 1])
+            i += 2
+        elif op == OP_CLOSE:
+            close_path()
+        elif op == OP_CALL:
+            next(render_funcs)(ctx)
+        elif op == OP_MATRIX:
+            ctx.set_matrix(cairo.Matrix(*coords[i : i + 6]))
+            i += 6
+        elif op == OP_RLINETO:
+            ctx.rel_line_to(coords[i], coords[i + 1])
+            i += 2
+        elif op == OP_RMOVETO:
+            ctx.rel_move_to(coords[i], coords[i + 1])
+            i += 2
+        elif op == OP_RCURVETO:
+            ctx.rel_curve_to(*coords[i : i + 6])
+            i += 6
+        elif op == OP_ARC:
+            ctx.arc(*coords[i : i + 5])
+            i += 5
+        elif op == OP_ELLIPSE:
+            x, y, w, h = coords[i : i + 4]
+            if w != 0.0 and h != 0.0:
+                ctx.save()
+                ctx.translate(x + w / 2.0, y + h / 2.0)
+                ctx.scale(w * 0.5, h * 0.5)
+                ctx.arc(0.0, 0.0, 1.0, 0.0, 2 * _pi)
+                ctx.close_path()
+                ctx.restore()
+            i += 4
+        else:
+            raise ValueError(f"Unknown draw op {op}")
 
 
 class DrawQueue:
-    """A list of draw commands, stored as callables that, are passed a set of
-    parameters to draw on from the canvas implementation."""
+    """A list of draw commands.
+
+    Paths are recorded as opcodes, with their coordinates in a flat
+    array, so rendering them is a single loop over the ops.
+
+    Other commands are stored as callables, that are passed a set of
+    parameters to draw on from the canvas implementation.
 
-    def __init__(self, render_funcs=None):
-        self.render_funcs = render_funcs or deque()
+    If a scene_cache is set, the end of each command is recorded in marks
+    with its key, so unchanged commands can be reused between frames,
+    see shoebot.core.scene_cache.
+    """
+
+    def __init__(self, render_funcs=None, scene_cache=None):
+        self.ops = bytearray()
+        self.coords = array("d")
+        self.render_funcs = []
+        self.scene_cache = scene_cache
+        self.marks = []
+        for render_func in render_funcs or ():
+            self.append(render_func)
 
     def append_immediate(self, render_func):
         """In implementations of drawqueue that use buffering this will run the
         whole queue up to this point."""
         raise NotImplementedError("Not supported in DrawQueue")
 
-    def append(self, render_func):
-        """Add a render function to the queue."""
+    def append(self, render_func, key=None):
+        """Add a render function to the queue.
+
+        :param key: hashable description of everything render_func draws,
+                    or None if the output can't be reused.
+        """
+        self.ops.append(OP_CALL)
+        self.render_funcs.append(render_func)
+        if self.scene_cache is not None:
+            self._mark(key)
+
+    def _mark(self, key):
+        self.marks.append(
+            (len(self.ops), len(self.coords), len(self.render_funcs), key),
+        )
+
+    def append_path(self, matrix, ops, coords, render_func, key=None):
+        """Add a path to the queue.
+
+        When rendered the matrix is set, the path is built from ops and
+        coords and then render_func is called to fill or stroke it.
+
+        :param matrix: transform matrix for the path
+        :param ops: path opcodes, e.g. OP_MOVETO, OP_LINETO
+        :param coords: array("d") of coordinates for the ops
+        :param render_func: called with the render context to paint the path.
+        :param key: hashable description of how render_func paints the path,
+                    or None if the output can't be reused.
+        """
+        self.ops.append(OP_MATRIX)
+        self.coords.extend(matrix)
+        self.ops += ops
+        self.coords += coords
+        self.ops.append(OP_CALL)
         self.render_funcs.append(render_func)
+        if self.scene_cache is not None:
+            if key is not None:
+                key = (tuple(matrix), bytes(ops), coords.tobytes(), key)
+            self._mark(key)
 
     def render(self, r_context):
-        """Call all the render functions with r_context.
+        """Render all the ops and call the render functions with r_context.
 
         r_context, is the render_context - Set of
         keyword args that should make sense to the
         canvas implementation
         """
-        for render_func in self.render_funcs:
-            render_func(r_context)
-
+        if self.scene_cache is not None:
+            return self.scene_cache.render(r_context, self)
+        render_ops(r_context, self.ops, self.coords, self.render_funcs)
         return r_context
 
     def __str__(self):
-        return f"<DrawQueue render_funcs={self.render_funcs}>"
+        return f"<DrawQueue ops={len(self.ops)} render_funcs={self.render_funcs}>"
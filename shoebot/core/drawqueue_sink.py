@@ -1,3 +1,6 @@
+from contextlib import nullcontext
+
+
 class DrawQueueSink:
     """DrawQueueSink, creates parameters for use by the draw queue. (the
     render_context).
@@ -6,15 +9,32 @@ class DrawQueueSink:
     implementations of the drawqueue, canvas, and sink.
     """
 
+    # FrameTimer of the bot, render and sink phases are timed here.
+    frame_timer = None
+
+    # Seconds between calls to main_iteration while the bot waits for the
+    # next frame, None if it only needs calling once per frame or event.
+    main_iteration_interval = None
+
     def set_bot(self, bot):
         self.bot = bot
+        self.frame_timer = bot._frame_timer
+
+    def _phase(self, name):
+        if self.frame_timer is None:
+            return nullcontext()
+        return self.frame_timer.phase(name)
 
     def render(self, size, frame, drawqueue):
         """Calls implmentation to get a render context, passes it to the
         drawqueues render function then calls self.rendering_finished."""
-        r_context = self.create_rcontext(size, frame)
-        drawqueue.render(r_context)
-        self.rendering_finished(size, frame, r_context)
+        with self._phase("render"):
+            r_context = self.create_rcontext(size, frame)
+            drawqueue.render(r_context)
+        if self.frame_timer is not None:
+            self.frame_timer.set_primitives(len(drawqueue.render_funcs))
+        with self._phase("sink"):
+            self.rendering_finished(size, frame, r_context)
         return r_context
 
     def create_rcontext(self, size, frame):
@@ -24,6 +44,11 @@ class DrawQueueSink:
     def rendering_finished(self, size, frame, cairo_ctx):
         pass
 
+    def run_finished(self):
+        """Called when the bot has finished running, sinks that keep files
+        or processes open should close them here."""
+        pass
+
     def main_iteration(self):
         """Called from main loop, if your sink needs to handle GUI events do it
         here.
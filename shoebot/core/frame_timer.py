@@ -0,0 +1,240 @@
+"""Per-frame timing of the main loop.
+
+Each frame is split into phases:
+
+- draw:   running the bot code, setup() and draw()
+- render: replaying the drawqueue on the sinks cairo context
+- sink:   the sink consuming the rendered frame, e.g. writing a file
+- sleep:  waiting for the next frame and handling events
+
+Statistics are kept over a rolling window of recent frames and can be shown
+with `sbot --frame-stats` or the `stats` shell command.
+
+With `sbot --frame-trace FILE` every phase is also recorded to a timeline in
+the Chrome trace event format, which can be opened in chrome://tracing or
+https://ui.perfetto.dev
+
+FramePacer decides when each frame of an animation is due, see
+`sbot --frame-policy`.
+"""
+import json
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from math import ceil, floor
+from time import perf_counter
+
+PHASES = ("draw", "render", "sink", "sleep")
+
+# Number of recent frames statistics are calculated from.
+DEFAULT_WINDOW = 300
+
+# What FramePacer does when frames run late.
+SKIP = "skip"
+CATCH_UP = "catchup"
+FRAME_POLICIES = (SKIP, CATCH_UP)
+
+# Most frames FramePacer will run late to catch up, with the CATCH_UP policy.
+DEFAULT_MAX_CATCH_UP = 5
+
+
+def percentile(values, p):
+    """Nearest rank percentile of a sorted list of values.
+
+    >>> percentile([1, 2, 3, 4], 50)
+    2
+    """
+    if not values:
+        return 0
+    rank = max(1, ceil(p / 100.0 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+class FrameTimer:
+    """Record how long each phase of each frame takes."""
+
+    def __init__(self, window=DEFAULT_WINDOW, trace=False):
+        """
+        :param window: number of recent frames to calculate statistics from.
+        :param trace: if True record a timeline of every phase, see write_trace.
+        """
+        self.window = window
+        self.trace = trace
+        self.reset()
+
+    def reset(self):
+        """Forget all recorded frames."""
+        self.frames = deque(maxlen=self.window)
+        self.frame_count = 0
+        self.dropped_frames = 0
+        self.skipped_frames = 0
+        self.trace_events = []
+        self._origin = perf_counter()
+        self._frame = None
+
+    def begin_frame(self, iteration):
+        self._frame = {"iteration": iteration, "primitives": 0}
+        self._frame_start = perf_counter()
+        for phase in PHASES:
+            self._frame[phase] = 0.0
+
+    @contextmanager
+    def phase(self, name):
+        """Context manager that adds the time spent inside it to phase name of
+        the current frame."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            end = perf_counter()
+            if self._frame is not None:
+                self._frame[name] += end - start
+                if self.trace:
+                    self._add_trace_event(name, start, end)
+
+    def set_primitives(self, count):
+        """Set the number of primitives drawn in the current frame."""
+        if self._frame is not None:
+            self._frame["primitives"] = count
+
+    def end_frame(self, budget=None, skipped=0):
+        """Finish recording the current frame.
+
+        :param budget: time in seconds a frame should take at the current
+                       framerate, if the frame took longer it is counted as dropped.
+        :param skipped: number of frames skipped after this one because it
+                        ran late, see FramePacer.
+        """
+        frame = self._frame
+        if frame is None:
+            return
+        end = perf_counter()
+        self._frame = None
+
+        work = sum(frame[phase] for phase in PHASES if phase != "sleep")
+        frame["dropped"] = budget is not None and work > budget
+        frame["skipped"] = skipped
+        self.skipped_frames += skipped
+        self.frames.append(frame)
+        self.frame_count += 1
+        if frame["dropped"]:
+            self.dropped_frames += 1
+        if self.trace:
+            self._add_trace_event(
+                "frame", self._frame_start, end, iteration=frame["iteration"],
+            )
+
+    def stats(self):
+        """
+        :return: dict of statistics over the recent frames, times are in
+                 milliseconds.
+        """
+        frames = list(self.frames)
+        stats = {
+            "frames": self.frame_count,
+            "dropped_frames": self.dropped_frames,
+            "skipped_frames": self.skipped_frames,
+            "window": len(frames),
+        }
+        for phase in PHASES:
+            times = sorted(frame[phase] * 1000.0 for frame in frames)
+            stats[phase] = {
+                "p50": percentile(times, 50),
+                "p95": percentile(times, 95),
+                "max": times[-1] if times else 0,
+            }
+        primitives = sorted(frame["primitives"] for frame in frames)
+        stats["primitives"] = {
+            "p50": percentile(primitives, 50),
+            "max": primitives[-1] if primitives else 0,
+        }
+        return stats
+
+    def format_stats(self):
+        """:return: statistics as a human readable table."""
+        stats = self.stats()
+        lines = [
+            f"frames: {stats['frames']}  dropped: {stats['dropped_frames']}  "
+            f"skipped: {stats['skipped_frames']}  "
+            f"primitives/frame: p50 {stats['primitives']['p50']} "
+            f"max {stats['primitives']['max']}",
+            f"{'phase':<8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}",
+        ]
+        for phase in PHASES:
+            times = stats[phase]
+            lines.append(
+                f"{phase:<8}{times['p50']:>10.2f}{times['p95']:>10.2f}{times['max']:>10.2f}",
+            )
+        return "\n".join(lines)
+
+    def _add_trace_event(self, name, start, end, **args):
+        self.trace_events.append(
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            },
+        )
+
+    def write_trace(self, filename):
+        """Write the recorded timeline as a Chrome trace JSON file."""
+        with open(filename, "w") as f:
+            json.dump(
+                {"traceEvents": self.trace_events, "displayTimeUnit": "ms"}, f,
+            )
+
+
+class FramePacer:
+    """Decide when each frame of an animation is due.
+
+    Frames are due a fixed period after the previous deadline, rather
+    than after the previous frame finished, so the framerate does not
+    drift.
+
+    When frames run late the policy decides what happens:
+
+    - SKIP:     frames whose deadline has passed are skipped, the next frame
+                runs straight away and later frames are due on the original
+                schedule.
+    - CATCH_UP: frames run straight away until they are back on schedule,
+                frames more than max_catch_up behind are skipped.
+    """
+
+    def __init__(self, policy=SKIP, max_catch_up=DEFAULT_MAX_CATCH_UP):
+        if policy not in FRAME_POLICIES:
+            raise ValueError(f"policy must be one of {FRAME_POLICIES}, got {policy!r}")
+        self.policy = policy
+        self.max_catch_up = max_catch_up
+        self.reset()
+
+    def reset(self):
+        """Forget the schedule, the next frame is due one period from now."""
+        self.deadline = None
+        self.period = None
+
+    def next_deadline(self, period, now=None):
+        """
+        :param period: time in seconds between frames.
+        :param now: current time from perf_counter.
+        :return: (deadline, skipped) the perf_counter time the next frame is
+                 due, and the number of frames skipped to get back on schedule.
+        """
+        if now is None:
+            now = perf_counter()
+        if self.deadline is None or period != self.period:
+            # Start a new schedule.
+            self.period = period
+            self.deadline = now + period
+            return self.deadline, 0
+
+        self.deadline += period
+        behind = floor((now - self.deadline) / period)
+        allowed = self.max_catch_up if self.policy == CATCH_UP else 0
+        skipped = max(behind - allowed, 0)
+        self.deadline += skipped * period
+        return self.deadline, skipped
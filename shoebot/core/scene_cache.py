@@ -0,0 +1,114 @@
+"""Retained mode: reuse rendered primitives that did not change between frames.
+
+When enabled, each primitive in the DrawQueue may have a key describing
+everything that affects how it looks - its geometry, style and transform.
+Consecutive keyed primitives are grouped into runs, the run boundaries
+depend only on the keys, so inserting or changing one primitive only
+changes the run that contains it.
+
+The first time a run is seen it is rendered to a cairo RecordingSurface
+(rasterized to an ImageSurface when drawing to an image), later frames
+paint the cached surface instead of rendering each primitive again.
+
+Primitives without a key, such as clipping, blend modes or snapshots, are
+always rendered directly and end the current run.
+
+Runs not used in a frame are dropped from the cache.
+"""
+from math import ceil, floor
+
+from .backend import cairo
+from .drawqueue import render_ops
+
+# Average number of primitives in a cached run.
+DEFAULT_RUN_LENGTH = 16
+
+
+class SceneCache:
+    """Cache of rendered runs of primitives, shared by the drawqueues of
+    each frame."""
+
+    def __init__(self, run_length=DEFAULT_RUN_LENGTH):
+        self.run_length = run_length
+        self.hits = 0
+        self.misses = 0
+        self._runs = {}
+
+    def clear(self):
+        self._runs = {}
+
+    def render(self, ctx, drawqueue):
+        """Render drawqueue on ctx, reusing runs rendered in earlier frames."""
+        ops = drawqueue.ops
+        coords = drawqueue.coords
+        render_funcs = drawqueue.render_funcs
+        rasterize = isinstance(ctx.get_target(), cairo.ImageSurface)
+
+        previous_runs = self._runs
+        runs = {}
+        run_keys = []
+        run_start = (0, 0, 0)
+        start = (0, 0, 0)
+
+        def render_range(ctx, start, end):
+            render_ops(
+                ctx,
+                ops[start[0] : end[0]],
+                coords[start[1] : end[1]],
+                render_funcs[start[2] : end[2]],
+            )
+
+        def paint_run(end):
+            run_key = tuple(run_keys)
+            surface = runs.get(run_key) or previous_runs.get(run_key)
+            if surface is None:
+                self.misses += 1
+                surface = self._render_run(render_range, run_start, end, rasterize)
+            else:
+                self.hits += 1
+            runs[run_key] = surface
+            ctx.identity_matrix()
+            ctx.set_source_surface(surface, 0, 0)
+            ctx.paint()
+
+        for op_end, coord_end, func_end, key in drawqueue.marks:
+            end = (op_end, coord_end, func_end)
+            if key is None:
+                if run_keys:
+                    paint_run(start)
+                    run_keys = []
+                render_range(ctx, start, end)
+                run_start = end
+            else:
+                run_keys.append(key)
+                if hash(key) % self.run_length == 0:
+                    paint_run(end)
+                    run_keys = []
+                    run_start = end
+            start = end
+
+        if run_keys:
+            paint_run(start)
+
+        self._runs = runs
+        return ctx
+
+    def _render_run(self, render_range, start, end, rasterize):
+        """Render primitives between start and end to a new surface."""
+        surface = cairo.RecordingSurface(cairo.CONTENT_COLOR_ALPHA, None)
+        render_range(cairo.Context(surface), start, end)
+        if not rasterize:
+            return surface
+
+        # Only allocate pixels for the area the run covers.
+        x, y, width, height = surface.ink_extents()
+        x0, y0 = floor(x), floor(y)
+        width, height = ceil(x + width) - x0, ceil(y + height) - y0
+        if width <= 0 or height <= 0:
+            return surface
+        image = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        image.set_device_offset(-x0, -y0)
+        image_ctx = cairo.Context(image)
+        image_ctx.set_source_surface(surface, 0, 0)
+        image_ctx.paint()
+        return image
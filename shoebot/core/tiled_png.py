@@ -0,0 +1,135 @@
+"""Write very large PNG files without rasterizing the whole image at once.
+
+The drawing is recorded to a cairo RecordingSurface, then rasterized in
+horizontal bands on a thread pool; cairo releases the GIL while it draws.
+Each band is converted to PNG rows and compressed to raw deflate on its
+worker thread, the main thread writes the compressed bands to the file in
+order, so only a few bands are in memory at a time.
+"""
+import os
+import struct
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from .backend import cairo
+
+# Size of the pixels in each band.
+BAND_BYTES = 16 * 1024 * 1024
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# zlib stream header for the default compression level.
+ZLIB_HEADER = b"\x78\x9c"
+ADLER_BASE = 65521
+
+
+def _adler32_combine(adler1, adler2, length2):
+    """Combine the adler32 checksums of two blocks of data, as zlib's
+    adler32_combine."""
+    remainder = length2 % ADLER_BASE
+    sum1 = adler1 & 0xFFFF
+    sum2 = (remainder * sum1) % ADLER_BASE
+    sum1 += (adler2 & 0xFFFF) + ADLER_BASE - 1
+    sum2 += ((adler1 >> 16) & 0xFFFF) + ((adler2 >> 16) & 0xFFFF) + ADLER_BASE
+    sum2 -= remainder
+    return (sum1 % ADLER_BASE) | ((sum2 % ADLER_BASE) << 16)
+
+
+def _write_chunk(f, chunk_type, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(chunk_type)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type))))
+
+
+def _encode_band(surface, width, y, height):
+    """Rasterize rows y to y + height of surface, and compress them as PNG
+    image data.
+
+    :return: compressed data, adler32 of the uncompressed data, length of the
+             uncompressed data.
+    """
+    from PIL import Image as PILImage
+
+    band = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+    ctx = cairo.Context(band)
+    ctx.set_source_surface(surface, 0, -y)
+    ctx.paint()
+    band.flush()
+
+    # cairo pixels have premultiplied alpha, PNG does not.
+    img = PILImage.frombuffer(
+        "RGBA", (width, height), band.get_data(), "raw", "BGRa", band.get_stride(), 1,
+    )
+    pixels = img.tobytes("raw", "RGBA")
+    row_bytes = width * 4
+    # Each row starts with filter type 0 (None).
+    rows = b"".join(
+        b"\0" + pixels[offset : offset + row_bytes]
+        for offset in range(0, len(pixels), row_bytes)
+    )
+
+    compressor = zlib.compressobj(wbits=-15)
+    # A sync flush ends the band on a byte boundary, so the raw deflate
+    # data of every band can be joined into one stream.
+    data = compressor.compress(rows) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    return data, zlib.adler32(rows), len(rows)
+
+
+def write_png_tiled(surface, width, height, target, workers=None):
+    """Rasterize surface in bands on a thread pool, writing a PNG file.
+
+    :param surface: cairo surface to output, usually a RecordingSurface.
+    :param width: width of the PNG in pixels.
+    :param height: height of the PNG in pixels.
+    :param target: filename or file like object to write to.
+    :param workers: number of threads to use, defaults to the number of CPUs.
+    """
+    if sys.byteorder != "little":
+        # Band conversion assumes cairo's pixels are BGRA in memory.
+        image = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        ctx = cairo.Context(image)
+        ctx.set_source_surface(surface)
+        ctx.paint()
+        image.write_to_png(target)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    band_height = max(1, BAND_BYTES // (width * 4))
+    bands = [(y, min(band_height, height - y)) for y in range(0, height, band_height)]
+
+    if hasattr(target, "write"):
+        f, close = target, False
+    else:
+        f, close = open(target, "wb"), True
+    try:
+        f.write(PNG_SIGNATURE)
+        # 8 bit RGBA
+        _write_chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+
+        # Replay the recording once before using it from several threads, so
+        # any lazily built state in the recording surface is built first.
+        data, adler, _ = _encode_band(surface, width, *bands[0])
+        _write_chunk(f, b"IDAT", ZLIB_HEADER + data)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = []
+            next_band = 1
+            while pending or next_band < len(bands):
+                # Keep a few bands per worker in flight, to bound memory use.
+                while next_band < len(bands) and len(pending) < workers * 2:
+                    pending.append(
+                        executor.submit(_encode_band, surface, width, *bands[next_band]),
+                    )
+                    next_band += 1
+                data, band_adler, length = pending.pop(0).result()
+                adler = _adler32_combine(adler, band_adler, length)
+                _write_chunk(f, b"IDAT", data)
+
+        # Final empty deflate block, followed by the checksum of all rows.
+        end = zlib.compressobj(wbits=-15).flush(zlib.Z_FINISH)
+        _write_chunk(f, b"IDAT", end + struct.pack(">I", adler))
+        _write_chunk(f, b"IEND", b"")
+    finally:
+        if close:
+            f.close()
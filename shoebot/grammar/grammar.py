@@ -5,12 +5,13 @@ import os
 import sys
 import traceback
 from queue import Queue, Empty
-from time import sleep, time
+from time import perf_counter, sleep
 
 from pubsub import pub
 
 from .livecode import LiveExecution
 from .variable import Variable
+from shoebot.core.frame_timer import FramePacer, FrameTimer, SKIP
 from shoebot.core.events import (
     QUIT_EVENT,
     SET_WINDOW_TITLE_EVENT,
@@ -47,6 +48,8 @@ class Grammar:
         self._oldvars = self._vars
         self._namespace = namespace or {}
         self._event_queue = Queue()
+        self._frame_timer = FrameTimer()
+        self._frame_pacer = FramePacer()
 
         input_device = canvas.get_input_device()
         if input_device:
@@ -89,17 +92,6 @@ class Grammar:
 
     #### Execute a single frame
 
-    def _calculate_frame_delay(self, speed, start_time):
-        """
-        :return in seconds time to delay, taking into account execution time
-        """
-        if not speed:
-            return 0
-
-        # If the amount of time taken is more than the FPS delay
-        # then return zero.
-        return max((1.0 / abs(speed)) - (time() - start_time), 0.0)
-
     def run(
         self,
         inputcode,
@@ -107,7 +99,22 @@ class Grammar:
         run_forever=False,
         frame_limiter=False,
         verbose=False,
+        render_iterations=None,
+        frame_stats=False,
+        frame_trace=None,
+        frame_policy=SKIP,
     ):
+        """Run the bot.
+
+        :param render_iterations: If set, only iterations in this container are
+                                  rendered, other iterations run but output nothing.
+                                  Used to split rendering across processes.
+        :param frame_stats: If True print frame timing statistics when the bot finishes.
+        :param frame_trace: Filename to write a Chrome trace of frame timings to.
+        :param frame_policy: What to do when animation frames run late, SKIP
+                             or CATCH_UP, see FramePacer.
+        """
+
         def message_listener(event=None):
             """Shoebot uses a pub/sub architecture to communicate between the
             different components such as the bot, GUI and command interface.
@@ -139,6 +146,11 @@ class Grammar:
             if max_iterations is None:
                 max_iterations = 1
 
+        frame_timer = self._frame_timer
+        frame_timer.trace = bool(frame_trace)
+        frame_timer.reset()
+        frame_pacer = self._frame_pacer = FramePacer(frame_policy)
+
         try:
             # Iterations only increment, whereas FRAME can decrement if the user sets a negative speed.
             iteration = 0
@@ -149,14 +161,18 @@ class Grammar:
                 # - Run draw function for if present.
                 # - Process events
                 # - Update state
-                start_time = time()
                 iteration += 1
+                frame_timer.begin_frame(iteration)
 
                 canvas_dirty = False
                 # Reset output graphics state
                 self._canvas.reset_canvas()
 
-                with executor.run_context() as (known_good, source, ns):
+                with frame_timer.phase("draw"), executor.run_context() as (
+                    known_good,
+                    source,
+                    ns,
+                ):
                     if not known_good:
                         # New code has been loaded, but it may have errors.
                         # Setting first_run forces the global context to be re-run
@@ -185,28 +201,38 @@ class Grammar:
                         canvas_dirty = True
 
                 if canvas_dirty:
-                    self._canvas.flush(self._frame)
+                    if render_iterations is None or iteration in render_iterations:
+                        self._canvas.flush(self._frame)
+                    else:
+                        self._canvas.reset_drawqueue()
 
+                skipped = 0
                 if frame_limiter:
                     # Frame limiting is only used when running the GUI.
-                    if is_animation:
-                        # User specifies framerate, via speed(...) or use a default.
-                        fps = self._speed
-                        timeout = self._calculate_frame_delay(
-                            fps if fps is not None else DEFAULT_ANIMATION_SPEED,
-                            start_time,
+                    # User specifies framerate, via speed(...) or use a default.
+                    fps = self._speed if self._speed is not None else DEFAULT_ANIMATION_SPEED
+                    if is_animation and fps:
+                        next_frame_due, skipped = frame_pacer.next_deadline(
+                            1.0 / abs(fps),
                         )
-                        next_frame_due = time() + timeout
                     else:
                         # Re-run the mainloop at 30fps, so that the GUI remains responsive.
-                        next_frame_due = time() + 1.0 / DEFAULT_GUI_UPDATE_SPEED
+                        frame_pacer.reset()
+                        next_frame_due = perf_counter() + 1.0 / DEFAULT_GUI_UPDATE_SPEED
                 else:
                     # Do not sleep between frames.
-                    next_frame_due = time()
+                    next_frame_due = perf_counter()
 
                 # Handle events
-                continue_running, restart = self._handle_events(
-                    iteration, is_animation, next_frame_due,
+                with frame_timer.phase("sleep"):
+                    continue_running, restart = self._handle_events(
+                        iteration, is_animation, next_frame_due,
+                    )
+                frame_timer.end_frame(
+                    budget=1.0 / abs(self._speed)
+                    if frame_limiter and is_animation and self._speed
+                    else None,
+                    skipped=skipped,
                 )
                 if not continue_running:
                     # Event handler returns False if it receives a message to quit.
@@ -227,6 +253,13 @@ class Grammar:
                 errmsg = simple_traceback(e, executor.known_good or "")
             sys.stderr.write(f"{errmsg}\n")
             return False
+        finally:
+            # Let the sink close any files or encoders it has open.
+            self._canvas.sink.run_finished()
+            if frame_stats:
+                sys.stderr.write(f"{frame_timer.format_stats()}\n")
+            if frame_trace:
+                frame_timer.write_trace(frame_trace)
 
     def _handle_events(self, iteration, is_animation, next_frame_due):
         """The Shoebot mainloop, GUI and shell communicate with each other
@@ -238,6 +271,10 @@ class Grammar:
         This handler waits for events and updates where needed, the loop also
         serves handles the delay between frames for animated bots.
 
+        It wakes when an event arrives or the next frame is due, sinks
+        with a GUI are also given a chance to handle GUI events every
+        sink.main_iteration_interval seconds.
+
         This allows the caller to act based on events:
         - Continue running
         - Whether to quit
@@ -246,10 +283,16 @@ class Grammar:
         return: continue_running, restart
         """
         restart_bot = False
+        interval = self._canvas.sink.main_iteration_interval
         while True:
-            timeout = min(next_frame_due - time(), 0.1)
+            timeout = next_frame_due - perf_counter()
+            if interval is not None:
+                timeout = min(timeout, interval)
             try:
-                event = self._event_queue.get(block=timeout > 0, timeout=timeout if timeout > 0 else None)
+                if timeout > 0:
+                    event = self._event_queue.get(timeout=timeout)
+                else:
+                    event = self._event_queue.get_nowait()
             except Empty:
                 event = None
             # Update GUI, which may in-turn generate new events.
@@ -291,7 +334,7 @@ class Grammar:
                         # bot so that the user may see the updated state.
                         return True, True
 
-            if time() >= next_frame_due:
+            if perf_counter() >= next_frame_due:
                 break
 
         if event is None:
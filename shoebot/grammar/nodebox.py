@@ -205,6 +205,7 @@ class NodeBot(Grammar):
             strokedash=None,
             dashoffset=0,
             blendmode=None,
+            shadow=None,
             background=self.color(1, 1, 1),
             fontfile="Sans",
             fontsize=16,
@@ -270,15 +271,17 @@ class NodeBot(Grammar):
         """
         kwargs = dict(kwargs)
 
+        # Instances share frozen colors, and only copy them if they are
+        # changed, see ColorMixin.
         fill = kwargs.get("fill", self._canvas.fillcolor)
         if not isinstance(fill, Color):
             fill = Color(fill, mode="rgb", color_range=1)
-        kwargs["fill"] = fill
+        kwargs["fill"] = fill.frozen()
 
         stroke = kwargs.get("stroke", self._canvas.strokecolor)
         if not isinstance(stroke, Color):
             stroke = Color(stroke, mode="rgb", color_range=1)
-        kwargs["stroke"] = stroke
+        kwargs["stroke"] = stroke.frozen()
 
         kwargs["fillrule"] = kwargs.get("fillrule", self._canvas.fillrule)
         kwargs["strokewidth"] = kwargs.get("strokewidth", self._canvas.strokewidth)
@@ -294,6 +297,7 @@ class NodeBot(Grammar):
         return self._makeColorableInstance(EndClip, args, kwargs)
 
     def BezierPath(self, *args, **kwargs):
+        kwargs.setdefault("shadow", self._canvas.shadow)
         return self._makeColorableInstance(BezierPath, args, kwargs)
 
     def ClippingPath(self, *args, **kwargs):
@@ -535,6 +539,22 @@ class NodeBot(Grammar):
         else:
             return self._speed
 
+    def retainedmode(self, enabled=True):
+        """Reuse the output of shapes, images and text that did not change
+        since the previous frame, instead of drawing them again.
+
+        Useful for animations where most of the scene stays the same, it
+        takes effect from the next frame.
+
+        :param enabled: True to enable retained mode, False to disable it.
+        """
+        if not enabled:
+            self._canvas.scene_cache = None
+        elif self._canvas.scene_cache is None:
+            from shoebot.core.scene_cache import SceneCache
+
+            self._canvas.scene_cache = SceneCache()
+
     @property
     def FRAME(self):
         return self._frame
@@ -572,7 +592,8 @@ class NodeBot(Grammar):
         :param width: image width (leave blank to use its original width)
         :param height: image height (leave blank to use its original height)
         :param alpha: opacity
-        :param data: image data to load. Use this instead of ``path`` if you want to load an image from memory or have another source (e.g. using the `web` library)
+        :param data: image data to load. Use this instead of ``path`` if you want to load an image from memory or have another source (e.g. using the `web` library).
+                     Can also be a buffer of pixels with shape (height, width, 4) such as a NumPy array, in cairo ARGB32 format (BGRA bytes on little endian machines), writable buffers are drawn without copying.
         :param draw: whether to place the image immediately on the canvas or not
         :type path: filename
         :type x: float
@@ -580,12 +601,33 @@ class NodeBot(Grammar):
         :type width: float or None
         :type height: float or None
         :type alpha: float
-        :type data: binary data
+        :type data: binary data or buffer
         :type draw: bool
         """
 
         return self.Image(path, x, y, width, height, alpha, data, **kwargs)
 
+    def imagecache(self, megabytes=None):
+        """Set the size of the image cache, decoded images are kept in memory
+        until this size is reached, then the least recently used images are
+        discarded.
+
+        :param megabytes: Maximum size of the cache, the default is 256MB.
+        :return: dict of statistics: hits, misses, evictions, entries, bytes, max_bytes
+        """
+        cache = Image._surface_cache
+        if megabytes is not None:
+            cache.set_max_bytes(int(megabytes * 1024 * 1024))
+        return cache.stats()
+
+    def preloadimages(self, paths):
+        """Decode images on a background thread, so they are ready by the
+        time image() is called.
+
+        :param paths: filenames of images to load.
+        """
+        Image._surface_cache.prefetch(paths)
+
     def imagesize(self, path):
         """
         :param path: Path to image file.
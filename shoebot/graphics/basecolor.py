@@ -27,7 +27,8 @@ class Color:
 
     Attributes (RGB and HSL) are values between 0 and 1
 
-    This stores color values as a list of 4 floats (RGBA) in a 0-1 range.
+    This stores color values as 4 floats (RGBA) in a 0-1 range, HSB values
+    are calculated from them the first time they are used.
 
     The value can come in the following flavours:
     - v
@@ -41,12 +42,12 @@ class Color:
     - RRGGBBAA
     """
 
-    def __init__(self, *args, **kwargs):
-        if isinstance(args, Color):
-            args = args.copy()
+    __slots__ = ("_r", "_g", "_b", "_a", "_hsb")
 
+    def __init__(self, *args, **kwargs):
         color_range = float(kwargs.get("color_range", 1.0))
         mode = kwargs.get("mode", "rgb").lower()
+        hsb = None
 
         # Values are supplied as a tuple.
         if len(args) == 1 and isinstance(args[0], tuple):
@@ -54,124 +55,161 @@ class Color:
 
         # No values or None, transparent black.
         if len(args) == 0 or (len(args) == 1 and args[0] is None):
-            self.r, self.g, self.b, self.a = 0, 0, 0, 0
+            r, g, b, a = 0, 0, 0, 0
 
         # One value, another color object.
         elif len(args) == 1 and isinstance(args[0], Color):
-            self.r, self.g, self.b, self.a = args[0].r, args[0].g, args[0].b, args[0].a
+            other = args[0]
+            r, g, b, a, hsb = other._r, other._g, other._b, other._a, other._hsb
 
         # One value, a hexadecimal string.
         elif len(args) == 1 and isinstance(args[0], str):
-            r, g, b, args = hex2rgb(args[0])
-            self.r, self.g, self.b, self.a = r, g, b, args
+            r, g, b, a = hex2rgb(args[0])
 
         # One value, grayscale.
         elif len(args) == 1:
-            gs = args[0]
-            self.r, self.g, self.b, self.a = (
-                gs / color_range,
-                gs / color_range,
-                gs / color_range,
-                1,
-            )
+            r = g = b = args[0] / color_range
+            a = 1
 
         # Two values, grayscale and alpha OR hex and alpha.
         elif len(args) == 2:
             if isinstance(args[0], str):
-                alpha = args[1]
-                r, g, b, args = hex2rgb(args[0])
-                self.r, self.g, self.b, self.a = r, g, b, alpha
+                r, g, b, _ = hex2rgb(args[0])
+                a = args[1]
             else:
-                gs, a = args[0], args[1]
-                self.r, self.g, self.b, self.a = (
-                    gs / color_range,
-                    gs / color_range,
-                    gs / color_range,
-                    a / color_range,
-                )
+                r = g = b = args[0] / color_range
+                a = args[1] / color_range
 
         # Three to five parameters, either RGB, RGBA, HSB, HSBA,
         # depending on the mode parameter.
-        elif len(args) >= 3:
-            alpha = 1
+        else:
+            a = 1
             if len(args) > 3:
-                alpha = args[-1] / color_range
-
-            if mode == "rgb":
-                self.r, self.g, self.b, self.a = (
-                    args[0] / color_range,
-                    args[1] / color_range,
-                    args[2] / color_range,
-                    alpha,
-                )
-            elif mode == "hsb":
-                self.h, self.s, self.brightness, self.a = (
-                    args[0] / color_range,
-                    args[1] / color_range,
-                    args[2] / color_range,
-                    alpha,
+                a = args[-1] / color_range
+
+            r, g, b = (
+                args[0] / color_range,
+                args[1] / color_range,
+                args[2] / color_range,
+            )
+            if mode == "hsb":
+                hsb = (
+                    max(0, min(r, 0.99999999)),
+                    max(0, min(g, 1)),
+                    max(0, min(b, 1)),
                 )
+                r, g, b = hsb2rgb(*hsb)
+            elif mode != "rgb":
+                r = g = b = a = 0
+
+        self._r = max(0, min(r, 1))
+        self._g = max(0, min(g, 1))
+        self._b = max(0, min(b, 1))
+        self._a = max(0, min(a, 1))
+        self._hsb = hsb
 
     def __repr__(self):
         return "%s(%.3f, %.3f, %.3f, %.3f)" % (
             self.__class__.__name__,
-            self.r,
-            self.g,
-            self.b,
-            self.a,
+            self._r,
+            self._g,
+            self._b,
+            self._a,
         )
 
-    @property
-    def red(self):
-        # Added
-        return self.r
+    def _get_r(self):
+        return self._r
 
-    @property
-    def green(self):
-        # Added
-        return self.g
+    def _set_r(self, v):
+        self._r = max(0, min(v, 1))
+        self._hsb = None
 
-    @property
-    def blue(self):
-        # Added
-        return self.a
+    def _get_g(self):
+        return self._g
 
-    @property
-    def alpha(self):
-        # Added
-        return self.a
+    def _set_g(self, v):
+        self._g = max(0, min(v, 1))
+        self._hsb = None
+
+    def _get_b(self):
+        return self._b
+
+    def _set_b(self, v):
+        self._b = max(0, min(v, 1))
+        self._hsb = None
+
+    def _get_a(self):
+        return self._a
+
+    def _set_a(self, v):
+        self._a = max(0, min(v, 1))
+
+    r = red = property(_get_r, _set_r)
+    g = green = property(_get_g, _set_g)
+    b = blue = property(_get_b, _set_b)
+    a = alpha = property(_get_a, _set_a)
+
+    def _get_hsb(self):
+        """Return h, s, brightness, calculating them from RGB the first time
+        they are used after RGB changes."""
+        hsb = self._hsb
+        if hsb is None:
+            hsb = rgb2hsb(self._r, self._g, self._b)
+            # Use object.__setattr__ so FrozenColor can cache it too.
+            object.__setattr__(self, "_hsb", hsb)
+        return hsb
+
+    def _set_hsb(self, h, s, brightness):
+        self._r, self._g, self._b = hsb2rgb(h, s, brightness)
+        self._hsb = (h, s, brightness)
+
+    def _get_h(self):
+        return self._get_hsb()[0]
+
+    def _set_h(self, v):
+        h, s, brightness = self._get_hsb()
+        self._set_hsb(max(0, min(v, 0.99999999)), s, brightness)
+
+    def _get_s(self):
+        return self._get_hsb()[1]
+
+    def _set_s(self, v):
+        h, s, brightness = self._get_hsb()
+        self._set_hsb(h, max(0, min(v, 1)), brightness)
+
+    def _get_brightness(self):
+        return self._get_hsb()[2]
+
+    def _set_brightness(self, v):
+        h, s, brightness = self._get_hsb()
+        self._set_hsb(h, s, max(0, min(v, 1)))
+
+    h = hue = property(_get_h, _set_h)
+    s = saturation = property(_get_s, _set_s)
+    brightness = property(_get_brightness, _set_brightness)
 
     @property
     def data(self):
         # Added
-        return [self.r, self.g, self.b, self.a]
+        return [self._r, self._g, self._b, self._a]
 
     def copy(self):
-        return tuple(self.data)
-
-    def _update_rgb(self, r, g, b):
-        self.__dict__["__r"] = r
-        self.__dict__["__g"] = g
-        self.__dict__["__b"] = b
-
-    def _update_hsb(self, h, s, b):
-        self.__dict__["__h"] = h
-        self.__dict__["__s"] = s
-        self.__dict__["__brightness"] = b
+        return (self._r, self._g, self._b, self._a)
 
-    def _hasattrs(self, list):
-        for a in list:
-            if a not in self.__dict__:
-                return False
-        return True
+    def frozen(self):
+        """Return an immutable version of this color, shared with other
+        users of the same color, see FrozenColor."""
+        return frozen_color(self._r, self._g, self._b, self._a)
 
     # added
     def __getitem__(self, index):
-        return (self.r, self.g, self.b, self.a)[index]
+        return (self._r, self._g, self._b, self._a)[index]
 
     def __iter__(self):
-        for i in range(len(self.data)):
-            yield self.data[i]
+        return iter((self._r, self._g, self._b, self._a))
+
+    def __len__(self):
+        return 4
 
     def __div__(self, other):
         value = float(other)
@@ -184,84 +222,50 @@ class Color:
 
     # end added
 
-    def __setattr__(self, a, v):
-        if a in ["a", "alpha"]:
-            self.__dict__["__" + a[0]] = max(0, min(v, 1))
-
-        # RGB changes, update HSB accordingly.
-        elif a in ["r", "g", "b", "red", "green", "blue"]:
-            self.__dict__["__" + a[0]] = max(0, min(v, 1))
-            if self._hasattrs(("__r", "__g", "__b")):
-                r, g, b = (
-                    self.__dict__["__r"],
-                    self.__dict__["__g"],
-                    self.__dict__["__b"],
-                )
-                self._update_hsb(*rgb2hsb(r, g, b))
-
-        # HSB changes, update RGB accordingly.
-        elif a in ["h", "s", "hue", "saturation", "brightness"]:
-            if a != "brightness":
-                a = a[0]
-            if a == "h":
-                v = min(v, 0.99999999)
-            self.__dict__["__" + a] = max(0, min(v, 1))
-            if self._hasattrs(("__h", "__s", "__brightness")):
-                r, g, b = hsb2rgb(
-                    self.__dict__["__h"],
-                    self.__dict__["__s"],
-                    self.__dict__["__brightness"],
-                )
-                self._update_rgb(r, g, b)
 
-        else:
-            self.__dict__[a] = v
-
-    def __getattr__(self, a):
-
-        """Available properties:
-
-        r, g, b, a or red, green, blue, alpha h, s or hue, saturation,
-        brightness
-        """
-        if a in self.__dict__:
-            return a
-        elif a == "brightness":
-            return self.__dict__["__brightness"]
-        elif a in [
-            "a",
-            "alpha",
-            "r",
-            "g",
-            "b",
-            "red",
-            "green",
-            "blue",
-            "h",
-            "s",
-            "hue",
-            "saturation",
-        ]:
-            return self.__dict__["__" + a[0]]
-        elif a in [
-            "a",
-            "alpha",
-            "r",
-            "g",
-            "b",
-            "red",
-            "green",
-            "blue",
-            "h",
-            "s",
-            "hue",
-            "saturation",
-        ]:
-            return self.__dict__["__" + a[0]]
-
-        raise AttributeError(
-            "'" + str(self.__class__) + "' object has no attribute '" + a + "'",
-        )
+class FrozenColor(Color):
+    """A Color that can't be changed.
+
+    Grobs drawn with the same color share one FrozenColor instead of each
+    copying it, ColorMixin replaces it with a copy when the grob's color is
+    used. Use Color(frozen_color) for a color that can be changed.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is frozen, it can't be changed")
+
+    def __reduce__(self):
+        return (frozen_color, (self._r, self._g, self._b, self._a))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def frozen(self):
+        return self
+
+
+def frozen_color(r, g, b, a):
+    """Return the FrozenColor for r, g, b, a, reusing one for recently used
+    colors."""
+    key = (r, g, b, a)
+    color = _frozen_colors.get(key)
+    if color is None:
+        if len(_frozen_colors) >= MAX_FROZEN_COLORS:
+            _frozen_colors.clear()
+        color = _frozen_colors[key] = object.__new__(FrozenColor)
+        for name, value in zip(("_r", "_g", "_b", "_a", "_hsb"), (r, g, b, a, None)):
+            object.__setattr__(color, name, value)
+    return color
+
+
+# Number of FrozenColors kept for reuse by frozen_color.
+MAX_FROZEN_COLORS = 4096
+_frozen_colors = {}
 
 
 class ColorMixin:
@@ -297,13 +301,20 @@ class ColorMixin:
         self.blendmode = self._blendmode = blendmode
 
     def _get_fill(self):
-        return self._fillcolor
+        color = self._fillcolor
+        if isinstance(color, FrozenColor):
+            # Copy a shared color, so it can be changed.
+            color = self._fillcolor = Color(color)
+        return color
 
     def _set_fill(self, *args):
         if len(args) == 1:
             if args[0] is None:
                 self._fillcolor = None
                 return
+            elif isinstance(args[0], FrozenColor):
+                self._fillcolor = args[0]
+                return
             elif isinstance(args[0], Color):
                 self._fillcolor = Color(args[0])
                 return
@@ -312,13 +323,20 @@ class ColorMixin:
     fill = property(_get_fill, _set_fill)
 
     def _get_stroke(self):
-        return self._strokecolor
+        color = self._strokecolor
+        if isinstance(color, FrozenColor):
+            # Copy a shared color, so it can be changed.
+            color = self._strokecolor = Color(color)
+        return color
 
     def _set_stroke(self, *args):
         if len(args) == 1:
             if args[0] is None:
                 self._strokecolor = None
                 return
+            elif isinstance(args[0], FrozenColor):
+                self._strokecolor = args[0]
+                return
             elif isinstance(args[0], Color):
                 self._strokecolor = Color(args[0])
                 return
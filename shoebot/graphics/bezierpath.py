@@ -1,18 +1,30 @@
 # TODO - Attempt to remove all mention of 'canvas' and 'bot' from here,
 #        making it useable outside Shoebot
 #
-# TODO - Remove the whole 'packed elements' thing, it overcomplicates
-#        the implementation.
-#
 import sys
 import locale
 import gettext
 
-from itertools import chain
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, chain
 from math import pi as _pi, sqrt
-from math import sin, cos
+from math import acos, ceil, floor, inf, sin, cos
 
 from shoebot.core.backend import cairo
+from shoebot.core.drawqueue import (
+    OP_ARC,
+    OP_CLOSE,
+    OP_COORDS,
+    OP_CURVETO,
+    OP_ELLIPSE,
+    OP_LINETO,
+    OP_MOVETO,
+    OP_RCURVETO,
+    OP_RLINETO,
+    OP_RMOVETO,
+    render_ops,
+)
 
 from .basecolor import ColorMixin
 from .grob import Grob, CENTER, CORNER, CORNERS
@@ -28,6 +40,18 @@ ARC = "arc"
 ELLIPSE = "ellipse"
 CLOSE = "close"
 
+OP_CMDS = {
+    OP_MOVETO: MOVETO,
+    OP_RMOVETO: RMOVETO,
+    OP_LINETO: LINETO,
+    OP_RLINETO: RLINETO,
+    OP_CURVETO: CURVETO,
+    OP_RCURVETO: RCURVETO,
+    OP_ARC: ARC,
+    OP_ELLIPSE: ELLIPSE,
+    OP_CLOSE: CLOSE,
+}
+
 BUTT = "butt"
 ROUND = "round"
 SQUARE = "square"
@@ -94,6 +118,14 @@ BLENDMODES = {
     SATURATE: cairo.OPERATOR_SATURATE,
 }
 
+# Gradient types for BezierPath.fillgradient.
+LINEAR = "linear"
+RADIAL = "radial"
+
+# Widest box blur in pixels either side used for shadows, shadows with more
+# blur are blurred at a lower resolution and scaled up.
+MAX_SHADOW_BOX = 4
+
 APP = "shoebot"
 DIR = sys.prefix + "/share/shoebot/locale"
 locale.setlocale(locale.LC_ALL, "")
@@ -140,14 +172,27 @@ class BezierPath(Grob, ColorMixin):
         strokedash=None,
         dashoffset=None,
         blendmode=None,
-        packed_elements=None,
+        fillgradient=None,
+        shadow=None,
     ):
-        # Stores two lists, _elements and _render_funcs that are kept syncronized
-        # _render_funcs contain functions that do the rendering
-        # _elements contains either a PathElement or the arguments that need
-        # to be passed to a PathElement when it's created.
+        # fillgradient, if set, is used to fill the path instead of the fill
+        # color, as (LINEAR, x0, y0, x1, y1, stops) or
+        # (RADIAL, cx0, cy0, r0, cx1, cy1, r1, stops) in path coordinates,
+        # stops are (offset, r, g, b, a) tuples.
         #
-        # This way PathElements are not created unless they are used in the bot
+        # shadow, if set, is a drop shadow painted under the fill and stroke,
+        # as (dx, dy, blur, r, g, b, a). The offset is in device space, the
+        # shadow is as opaque as the fill and stroke colors.
+        #
+        # The path is stored as the draw ops used for rendering, see DrawQueue:
+        # _ops has an opcode for each element, _coords has their coordinates
+        # and _offsets has where each element's coordinates start.
+        #
+        # PathElements are only created when they are used in the bot, and
+        # kept in _elements by index.
+        #
+        # Copies share the arrays until one of the paths is changed, _shared
+        # is set when the arrays may be used by another path.
         Grob.__init__(self, bot)
         ColorMixin.__init__(
             self,
@@ -162,33 +207,57 @@ class BezierPath(Grob, ColorMixin):
             blendmode=blendmode,
         )
 
-        if packed_elements is not None:
-            self._elements, self._render_funcs = packed_elements
-        else:
-            self._elements = []
-            self._render_funcs = []
+        self._elements = {}
+        self._ops = bytearray()
+        self._coords = array("d")
+        self._offsets = array("L")
+        self._shared = False
 
+        self.fillgradient = fillgradient
+        self.shadow = shadow
         self.closed = False
 
         self._drawn = False
         self._bounds = None
         self._center = None
-        self._segments = None
+        self._arc_lengths = None
+        self._extents = None
+        self._edge_index = None
 
         if isinstance(path, (tuple, list)):
             # list of path elements
             for element in path:
                 self.append(element)
         elif isinstance(path, BezierPath):
-            self._elements = list(path._elements)
-            self._render_funcs = list(path._render_funcs)
-            self.closed = path.closed
-
-    def _append_element(self, render_func, pe):
-        """Append a render function and the parameters to pass an equivilent
-        PathElement, or the PathElement itself."""
-        self._render_funcs.append(render_func)
-        self._elements.append(pe)
+            self._share(path)
+
+    def _share(self, path):
+        """Use the elements of another path, the arrays are copied by
+        whichever path is changed first."""
+        path._shared = self._shared = True
+        self._ops = path._ops
+        self._coords = path._coords
+        self._offsets = path._offsets
+        self.closed = path.closed
+
+    def _append_element(self, op, coords, pe=None):
+        """Append the draw op and coordinates used to render an element, and
+        optionally the PathElement that was appended."""
+        if self._shared:
+            self._ops = self._ops[:]
+            self._coords = self._coords[:]
+            self._offsets = self._offsets[:]
+            self._shared = False
+        if pe is not None:
+            self._elements[len(self._ops)] = pe
+        self._offsets.append(len(self._coords))
+        self._ops.append(op)
+        self._coords.extend(coords)
+        # The path changed, drop cached measurements.
+        self._bounds = None
+        self._center = None
+        self._arc_lengths = None
+        self._edge_index = None
 
     def append(self, *args):
         if len(args) == 2:
@@ -197,18 +266,16 @@ class BezierPath(Grob, ColorMixin):
         elif isinstance(args[0], PathElement):
             p = args[0]
             if p.cmd == MOVETO:
-                self._append_element(self._canvas.moveto_closure(p.x, p.y), p)
+                self._append_element(OP_MOVETO, (p.x, p.y), p)
             elif p.cmd == LINETO:
-                self._append_element(self._canvas.lineto_closure(p.x, p.y), p)
+                self._append_element(OP_LINETO, (p.x, p.y), p)
             elif p.cmd == CURVETO:
                 self._append_element(
-                    self._canvas.curveto_closure(p.x, p.y, p.c1x, p.c1y, p.c2x, p.c2y),
-                    p,
+                    OP_CURVETO, (p.c1x, p.c1y, p.c2x, p.c2y, p.x, p.y), p,
                 )
             elif p.cmd == ARC:
                 self._append_element(
-                    self._canvas.arc_closure(p.x, p.y, p.radius, p.angle1, p.angle2),
-                    p,
+                    OP_ARC, (p.x, p.y, p.radius, p.angle1, p.angle2), p,
                 )
 
     def addpoint(self, *args):
@@ -227,52 +294,44 @@ class BezierPath(Grob, ColorMixin):
             strokedash=self._strokedash,
             dashoffset=self._dashoffset,
             blendmode=self._blendmode,
-            packed_elements=(self._elements[:], self._render_funcs[:]),
+            fillgradient=self.fillgradient,
+            shadow=self.shadow,
         )
-        path.closed = self.closed
+        path._share(self)
+        path._bounds = self._bounds
+        path._extents = self._extents
+        path._edge_index = self._edge_index
         path._center = self._center
         return path
 
     def moveto(self, x, y):
-        self._append_element(self._canvas.moveto_closure(x, y), (MOVETO, x, y))
+        self._append_element(OP_MOVETO, (x, y))
 
     def relmoveto(self, x, y):
-        self._append_element(self._canvas.relmoveto_closure(x, y), (RMOVETO, x, y))
+        self._append_element(OP_RMOVETO, (x, y))
 
     def lineto(self, x, y):
-        self._append_element(self._canvas.lineto_closure(x, y), (LINETO, x, y))
+        self._append_element(OP_LINETO, (x, y))
 
     def rellineto(self, x, y):
-        self._append_element(self._canvas.rellineto_closure(x, y), (RLINETO, x, y))
+        self._append_element(OP_RLINETO, (x, y))
 
     def line(self, x1, y1, x2, y2):
         self.moveto(x1, y1)
         self.lineto(x2, y2)
 
     def curveto(self, x1, y1, x2, y2, x3, y3):
-        self._append_element(
-            self._canvas.curveto_closure(x1, y1, x2, y2, x3, y3),
-            (CURVETO, x1, y1, x2, y2, x3, y3),
-        )
+        self._append_element(OP_CURVETO, (x1, y1, x2, y2, x3, y3))
 
     def relcurveto(self, x1, y1, x2, y2, x3, y3):
-        self._append_element(
-            self._canvas.relcurveto_closure(x1, y1, x2, y2, x3, y3),
-            (RCURVETO, x1, y1, x2, y2, x3, y3),
-        )
+        self._append_element(OP_RCURVETO, (x1, y1, x2, y2, x3, y3))
 
     def arc(self, x, y, radius, angle1, angle2):
-        self._append_element(
-            self._canvas.arc_closure(x, y, radius, angle1, angle2),
-            (ARC, x, y, radius, angle1, angle2),
-        )
+        self._append_element(OP_ARC, (x, y, radius, angle1, angle2))
 
     def closepath(self):
-        if self._elements:
-            start_el = self[0]
-            self._append_element(
-                self._canvas.closepath_closure(), (CLOSE, start_el.x, start_el.y),
-            )
+        if self._ops:
+            self._append_element(OP_CLOSE, ())
             self.closed = True
 
     def ellipse(self, x, y, w, h, ellipsemode=CORNER):
@@ -283,9 +342,7 @@ class BezierPath(Grob, ColorMixin):
         elif ellipsemode == CORNERS:
             w = w - x
             h = h - y
-        self._append_element(
-            self._canvas.ellipse_closure(x, y, w, h), (ELLIPSE, x, y, w, h),
-        )
+        self._append_element(OP_ELLIPSE, (x, y, w, h))
         self.closed = True
 
     def rect(self, x, y, w, h, roundness=0.0, rectmode=CORNER):
@@ -317,48 +374,270 @@ class BezierPath(Grob, ColorMixin):
 
     def _traverse(self, cairo_ctx):
         """Traverse this path."""
-        for render_func in self._render_funcs:
-            render_func(cairo_ctx)
+        render_ops(cairo_ctx, self._ops, self._coords)
 
     def _get_bounds(self):
-        """Return cached bounds of this Grob.
+        """Return cached bounds of this path, as (x1, y1, x2, y2).
 
-        If bounds are not cached, render to a meta surface, and keep the
-        meta surface and bounds cached.
+        The bounds are the same as cairo's path_extents, calculated from
+        the coordinates of the path, see _measure_bounds.
         """
-        if self._bounds:
-            return self._bounds
+        if self._bounds is None:
+            self._bounds = self._measure_bounds()
+        return self._bounds
 
-        record_surface = cairo.RecordingSurface(
-            cairo.CONTENT_COLOR_ALPHA, (-1, -1, 1, 1),
-        )
-        dummy_ctx = cairo.Context(record_surface)
-        self._traverse(dummy_ctx)
+    def _measure_bounds(self):
+        """Return the bounds of the path, adding the elements appended since
+        the bounds were last measured.
 
-        self._bounds = dummy_ctx.path_extents()
-        return self._bounds
+        Curves and arcs are measured at their extrema, a moveto only
+        counts once something is drawn from it.
+        """
+        if self._extents is None:
+            # Number of elements measured, bounds so far, current point and
+            # start of the subpath.
+            self._extents = (0, (inf, inf, -inf, -inf), None, None)
+        index, bounds, current, start = self._extents
+        if index == len(self._ops):
+            return bounds if bounds[0] <= bounds[2] else (0.0, 0.0, 0.0, 0.0)
+
+        xs, ys = [], []
+        ops, coords, offsets = self._ops, self._coords, self._offsets
+        for i in range(index, len(ops)):
+            op = ops[i]
+            j = offsets[i]
+            if op == OP_CLOSE:
+                if current is not None:
+                    xs.append(current[0])
+                    ys.append(current[1])
+                    current = start
+                continue
+
+            if op == OP_ARC:
+                cx, cy, radius, angle1, angle2 = coords[j : j + 5]
+                if radius <= 0.0:
+                    op, x, y = OP_LINETO, cx, cy
+            elif op == OP_ELLIPSE:
+                x, y, w, h = coords[j : j + 4]
+                if w == 0.0 or h == 0.0:
+                    continue
+            else:
+                x, y = coords[j], coords[j + 1]
+                if op in (OP_RMOVETO, OP_RLINETO, OP_RCURVETO) and current:
+                    dx, dy = current
+                    x, y = x + dx, y + dy
+
+            if op == OP_MOVETO or op == OP_RMOVETO:
+                current = start = (x, y)
+                continue
+            if current is None:
+                # cairo starts a subpath where the first element begins.
+                if op == OP_LINETO:
+                    current = start = (x, y)
+                    continue
+                elif op == OP_CURVETO:
+                    current = start = (x, y)
+                elif op == OP_ARC:
+                    start = (cx + radius * cos(angle1), cy + radius * sin(angle1))
+                elif op == OP_ELLIPSE:
+                    start = (x + w, y + h / 2.0)
+            else:
+                xs.append(current[0])
+                ys.append(current[1])
+
+            if op == OP_LINETO or op == OP_RLINETO:
+                xs.append(x)
+                ys.append(y)
+                current = (x, y)
+            elif op == OP_CURVETO or op == OP_RCURVETO:
+                x0, y0 = current
+                x1, y1, x2, y2, x3, y3 = coords[j : j + 6]
+                if op == OP_RCURVETO:
+                    x1, y1, x2, y2, x3, y3 = x, y, x2 + x0, y2 + y0, x3 + x0, y3 + y0
+                xs.extend(_cubic_extrema(x0, x1, x2, x3))
+                ys.extend(_cubic_extrema(y0, y1, y2, y3))
+                current = (x3, y3)
+            elif op == OP_ARC:
+                if angle2 < angle1:
+                    angle2 += ceil((angle1 - angle2) / (2 * _pi)) * 2 * _pi
+                angle2 = min(angle2, angle1 + 2 * _pi)
+                quarter = _pi / 2
+                angles = [angle1, angle2]
+                angles.extend(
+                    k * quarter
+                    for k in range(ceil(angle1 / quarter), floor(angle2 / quarter) + 1)
+                )
+                xs.extend(cx + radius * cos(a) for a in angles)
+                ys.extend(cy + radius * sin(a) for a in angles)
+                current = (cx + radius * cos(angle2), cy + radius * sin(angle2))
+            elif op == OP_ELLIPSE:
+                xs.extend((x, x + w))
+                ys.extend((y, y + h))
+                # The ellipse is closed, back to the start of the subpath.
+                current = start
+
+        if xs:
+            x1, y1, x2, y2 = bounds
+            bounds = (min(x1, *xs), min(y1, *ys), max(x2, *xs), max(y2, *ys))
+        self._extents = (len(ops), bounds, current, start)
+        return bounds if bounds[0] <= bounds[2] else (0.0, 0.0, 0.0, 0.0)
 
     def _get_dimensions(self):
         x1, y1, x2, y2 = self._get_bounds()
         return x1, y1
 
     def contains(self, x, y):
-        """Return cached bounds of this Grob.
+        """Return True if the point x, y is inside the filled path.
 
-        If bounds are not cached, render to a meta surface, and keep the
-        meta surface and bounds cached.
+        The path is flattened to polygons once, and their edges are
+        indexed by y, so that testing many points is fast.
         """
-        if self._bounds:
-            return self._bounds
-
-        record_surface = cairo.RecordingSurface(
-            cairo.CONTENT_COLOR_ALPHA, (-1, -1, 1, 1),
-        )
-        dummy_ctx = cairo.Context(record_surface)
-        self._traverse(dummy_ctx)
+        if self._edge_index is None:
+            self._edge_index = self._build_edge_index()
+        x1, y1, x2, y2, row_height, rows = self._edge_index
+        if not (x1 <= x < x2 and y1 <= y < y2):
+            return False
 
-        in_fill = dummy_ctx.in_fill(x, y)
-        return in_fill
+        # Count the edges crossed by a ray from x, y to the right.
+        winding = 0
+        row = min(int((y - y1) / row_height), len(rows) - 1)
+        for low, high, edge_x, slope, direction in rows[row]:
+            if low <= y < high and edge_x + (y - low) * slope > x:
+                winding += direction
+        if self.fillrule in (EVENODD, cairo.FILL_RULE_EVEN_ODD):
+            return winding % 2 == 1
+        return winding != 0
+
+    def _build_edge_index(self):
+        """Return the edges of the flattened path, in rows by y, for
+        contains."""
+        edges = []
+        for polygon in self._get_polygons():
+            x0, y0 = polygon[-2], polygon[-1]
+            for i in range(0, len(polygon), 2):
+                x1, y1 = polygon[i], polygon[i + 1]
+                if y0 < y1:
+                    edges.append((y0, y1, x0, (x1 - x0) / (y1 - y0), 1))
+                elif y1 < y0:
+                    edges.append((y1, y0, x1, (x0 - x1) / (y0 - y1), -1))
+                x0, y0 = x1, y1
+        if not edges:
+            return (0.0, 0.0, 0.0, 0.0, 1.0, [])
+
+        x1 = min(min(edge[2], edge[2] + edge[3] * (edge[1] - edge[0])) for edge in edges)
+        x2 = max(max(edge[2], edge[2] + edge[3] * (edge[1] - edge[0])) for edge in edges)
+        y1 = min(edge[0] for edge in edges)
+        y2 = max(edge[1] for edge in edges)
+        row_count = min(len(edges), 1024)
+        row_height = (y2 - y1) / row_count
+        rows = [[] for _ in range(row_count)]
+        for edge in edges:
+            first = int((edge[0] - y1) / row_height)
+            last = min(int((edge[1] - y1) / row_height), row_count - 1)
+            for row in range(first, last + 1):
+                rows[row].append(edge)
+        return x1, y1, x2, y2, row_height, rows
+
+    def _get_polygons(self, tolerance=0.1):
+        """Return the path flattened to polygons, each a flat list of x, y
+        coordinates.
+
+        Curves and arcs are split into lines no further than tolerance
+        from the curve, like cairo does when filling.
+        """
+        polygons = []
+        polygon = []
+        current = start = None
+        ops, coords, offsets = self._ops, self._coords, self._offsets
+        for i in range(len(ops)):
+            op = ops[i]
+            j = offsets[i]
+            if op == OP_CLOSE:
+                if current is not None:
+                    polygons.append(polygon)
+                    polygon = list(start)
+                    current = start
+                continue
+
+            if op == OP_ARC:
+                cx, cy, radius, angle1, angle2 = coords[j : j + 5]
+                if radius <= 0.0:
+                    op, x, y = OP_LINETO, cx, cy
+                else:
+                    if angle2 < angle1:
+                        angle2 += ceil((angle1 - angle2) / (2 * _pi)) * 2 * _pi
+                    x, y = cx + radius * cos(angle1), cy + radius * sin(angle1)
+            elif op == OP_ELLIPSE:
+                ex, ey, w, h = coords[j : j + 4]
+                if w == 0.0 or h == 0.0:
+                    continue
+                cx, cy, rx, ry = ex + w / 2.0, ey + h / 2.0, w / 2.0, h / 2.0
+                x, y = cx + rx, cy
+            else:
+                x, y = coords[j], coords[j + 1]
+                if op in (OP_RMOVETO, OP_RLINETO, OP_RCURVETO) and current:
+                    dx, dy = current
+                    x, y = x + dx, y + dy
+
+            if op == OP_MOVETO or op == OP_RMOVETO:
+                polygons.append(polygon)
+                polygon = [x, y]
+                current = start = (x, y)
+                continue
+            if current is None:
+                # cairo starts a subpath where the first element begins.
+                current = start = (x, y)
+                polygon = [x, y]
+                if op == OP_LINETO:
+                    continue
+            elif op in (OP_ARC, OP_ELLIPSE):
+                polygon.extend((x, y))
+
+            if op == OP_LINETO or op == OP_RLINETO:
+                polygon.extend((x, y))
+                current = (x, y)
+            elif op == OP_CURVETO or op == OP_RCURVETO:
+                x0, y0 = current
+                x1, y1, x2, y2, x3, y3 = coords[j : j + 6]
+                if op == OP_RCURVETO:
+                    x1, y1, x2, y2, x3, y3 = x, y, x2 + x0, y2 + y0, x3 + x0, y3 + y0
+                # Enough lines to keep within tolerance of the curve.
+                d = max(
+                    abs(x0 - 2 * x1 + x2),
+                    abs(y0 - 2 * y1 + y2),
+                    abs(x1 - 2 * x2 + x3),
+                    abs(y1 - 2 * y2 + y3),
+                )
+                n = max(1, ceil(sqrt(0.75 * sqrt(2) * d / tolerance)))
+                for k in range(1, n + 1):
+                    t = k / n
+                    mt = 1 - t
+                    a, b, c, d = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+                    polygon.append(a * x0 + b * x1 + c * x2 + d * x3)
+                    polygon.append(a * y0 + b * y1 + c * y2 + d * y3)
+                current = (x3, y3)
+            elif op == OP_ARC or op == OP_ELLIPSE:
+                if op == OP_ARC:
+                    rx = ry = radius
+                    angle2 = min(angle2, angle1 + 2 * _pi)
+                else:
+                    angle1, angle2 = 0.0, 2 * _pi
+                r = max(abs(rx), abs(ry))
+                step = min(2 * acos(max(1 - tolerance / r, -1.0)), _pi / 2)
+                n = max(1, ceil((angle2 - angle1) / step))
+                for k in range(1, n + 1):
+                    a = angle1 + (angle2 - angle1) * k / n
+                    polygon.append(cx + rx * cos(a))
+                    polygon.append(cy + ry * sin(a))
+                if op == OP_ARC:
+                    current = (polygon[-2], polygon[-1])
+                else:
+                    # The ellipse is closed, back to the start of the subpath.
+                    polygons.append(polygon)
+                    polygon = list(start)
+                    current = start
+        polygons.append(polygon)
+        return [polygon for polygon in polygons if len(polygon) > 4]
 
     def _get_center(self):
         """Return cached bounds of this Grob.
@@ -383,49 +662,70 @@ class BezierPath(Grob, ColorMixin):
     center = property(_get_center)
 
     def _render_closure(self):
-        """Use a closure so that draw attributes can be saved."""
-        fillcolor = self.fill
+        """Use a closure so that draw attributes can be saved.
+
+        draw() records the path in the drawqueue directly, this is kept
+        for callers that need the whole path as a single render
+        function.
+        """
+        paint = self._paint_closure()
+
+        def _render(cairo_ctx):
+            # Go to initial point (CORNER or CENTER):
+            transform = self._call_transform_mode(self._transform)
+
+            if self._fillcolor is None and self._strokecolor is None:
+                # Fixes _bug_FillStrokeNofillNostroke.bot
+                return
+
+            cairo_ctx.set_matrix(transform)
+            # Run the path commands on the cairo context:
+            self._traverse(cairo_ctx)
+            paint(cairo_ctx)
+
+        return _render
+
+    def _paint_closure(self):
+        """Return a function that fills and strokes the current path on a
+        context, the draw attributes are saved in the closure."""
+        fillcolor = self._fillcolor
         fillrule = self.fillrule
-        strokecolor = self.stroke
+        fillgradient = self.fillgradient
+        strokecolor = self._strokecolor
         strokewidth = self.strokewidth
         strokecap = self.strokecap
         strokejoin = self.strokejoin
         strokedash = self.strokedash
         dashoffset = self.dashoffset
         blendmode = self.blendmode
+        shadow = self.shadow
 
-        def _render(cairo_ctx):
+        def _paint(cairo_ctx):
             """At the moment this is based on cairo.
 
             TODO: Need to work out how to move the cairo specific
                   bits somewhere else.
             """
-            # Go to initial point (CORNER or CENTER):
-            transform = self._call_transform_mode(self._transform)
-
-            if fillcolor is None and strokecolor is None:
-                # Fixes _bug_FillStrokeNofillNostroke.bot
-                return
+            fillsource = None
+            if fillcolor and fillgradient:
+                # The gradient is in path coordinates, so it uses the path
+                # matrix before it is reset.
+                matrix = cairo_ctx.get_matrix()
+                try:
+                    matrix.invert()
+                except cairo.Error:
+                    # The path is scaled to nothing.
+                    pass
+                else:
+                    fillsource = _gradient_pattern(fillgradient)
+                    fillsource.set_matrix(matrix)
 
-            cairo_ctx.set_matrix(transform)
-            # Run the path commands on the cairo context:
-            self._traverse(cairo_ctx)
             # Matrix affects stroke, so we need to reset it:
             cairo_ctx.set_matrix(cairo.Matrix())
 
-            if blendmode:
-                cairo_ctx.set_operator(BLENDMODES[blendmode])
-
-            if fillcolor:
-                cairo_ctx.set_source_rgba(*fillcolor)
-                if fillrule:
-                    cairo_ctx.set_fill_rule(fillrule)
-                if not strokecolor:
-                    cairo_ctx.fill()
-                else:
-                    cairo_ctx.fill_preserve()
+            if fillrule:
+                cairo_ctx.set_fill_rule(fillrule)
             if strokecolor:
-                cairo_ctx.set_source_rgba(*strokecolor)
                 cairo_ctx.set_line_width(strokewidth)
                 if strokedash:
                     cairo_ctx.set_dash(strokedash, dashoffset)
@@ -435,16 +735,66 @@ class BezierPath(Grob, ColorMixin):
                     cairo_ctx.set_line_cap(STROKE_CAPS[strokecap])
                 if strokejoin:
                     cairo_ctx.set_line_join(STROKE_JOINS[strokejoin])
+
+            if shadow:
+                _paint_shadow(
+                    cairo_ctx,
+                    shadow,
+                    fillcolor.a if fillcolor else 0,
+                    strokecolor.a if strokecolor else 0,
+                )
+
+            if blendmode:
+                cairo_ctx.set_operator(BLENDMODES[blendmode])
+
+            if fillcolor:
+                if fillsource is not None:
+                    cairo_ctx.set_source(fillsource)
+                else:
+                    cairo_ctx.set_source_rgba(*fillcolor)
+                if not strokecolor:
+                    cairo_ctx.fill()
+                else:
+                    cairo_ctx.fill_preserve()
+            if strokecolor:
+                cairo_ctx.set_source_rgba(*strokecolor)
                 cairo_ctx.stroke()
 
             if blendmode:
                 # reset blend mode
                 cairo_ctx.set_operator(cairo.OPERATOR_OVER)
 
-        return _render
+        return _paint
+
+    def _paint_key(self):
+        """Return a key for the draw attributes used by _paint_closure, for
+        retained mode, or None if the path must always be rendered."""
+        if self.blendmode:
+            # Blend modes depend on what is already drawn.
+            return None
+        return (
+            tuple(self._fillcolor) if self._fillcolor else None,
+            self.fillrule,
+            self.fillgradient,
+            tuple(self._strokecolor) if self._strokecolor else None,
+            self.strokewidth,
+            self.strokecap,
+            self.strokejoin,
+            tuple(self.strokedash) if self.strokedash else None,
+            self.dashoffset,
+            self.shadow,
+        )
 
     def draw(self):
-        self._deferred_render(self._render_closure())
+        if self._fillcolor is None and self._strokecolor is None:
+            # Fixes _bug_FillStrokeNofillNostroke.bot
+            return
+        # Go to initial point (CORNER or CENTER):
+        transform = self._call_transform_mode(self._transform)
+        key = self._paint_key() if self._canvas.scene_cache is not None else None
+        self._canvas.deferred_render_path(
+            transform, self._ops, self._coords, self._paint_closure(), key,
+        )
 
     def _get_contours(self):
         """Returns a list of contours in the path, as BezierPath objects.
@@ -496,22 +846,51 @@ class BezierPath(Grob, ColorMixin):
         # Originally from nodebox-gl
         if segments is None:
             segments = self._segment_lengths(relative=True)
+        return self._locate_in_table(t, self._arc_length_table(segments))
+
+    def _arc_length_table(self, segments):
+        """Returns a lookup table for _locate_in_table, given relative
+        segment lengths.
+
+        The table has the end of each segment, as a fraction of the whole
+        path, and the index of the element each segment closes to.
+        """
         if len(segments) == 0:
             raise PathError("The given path is empty")
-        for i, el in enumerate(self._get_elements()):
-            if i == 0 or el.cmd == MOVETO:
-                closeto = Point(el.x, el.y)
-            if t <= segments[i] or i == len(segments) - 1:
-                break
-            else:
-                t -= segments[i]
+        ends = list(accumulate(segments))
+        closeto = []
+        index = 0
+        for i in range(len(segments)):
+            if self._ops[i] == OP_MOVETO:
+                index = i
+            closeto.append(index)
+        return segments, ends, closeto
+
+    def _get_arc_lengths(self):
+        """Returns the lookup table for this path's segments, calculating it
+        the first time it is needed after the path changes."""
+        if self._arc_lengths is None:
+            self._arc_lengths = self._arc_length_table(
+                self._get_length(segmented=True, precision=10),
+            )
+        return self._arc_lengths
+
+    def _locate_in_table(self, t, table):
+        """Same as _locate, finding the segment with a binary search of an
+        arc length table."""
+        segments, ends, closeto = table
+        last = len(segments) - 1
+        i = min(bisect_left(ends, t), last)
+        if i:
+            t -= ends[i - 1]
         try:
             t /= segments[i]
         except ZeroDivisionError:
             pass
-        if i == len(segments) - 1 and segments[i] == 0:
+        el = self[closeto[i]]
+        if i == last and segments[i] == 0:
             i -= 1
-        return (i, t, closeto)
+        return (i, t, Point(el.x, el.y))
 
     def point(self, t, segments=None):
         """Returns the PathElement at time t (0.0-1.0) on the path.
@@ -525,13 +904,18 @@ class BezierPath(Grob, ColorMixin):
         recalculate the length during each iteration.
         """
         # Originally from nodebox-gl
-        if len(self._elements) == 0:
+        if not self._ops:
             raise PathError("The given path is empty")
 
-        if self._segments is None:
-            self._segments = self._get_length(segmented=True, precision=10)
+        if segments is None:
+            table = self._get_arc_lengths()
+        else:
+            table = self._arc_length_table(segments)
+        return self._point_in_table(t, table)
 
-        i, t, closeto = self._locate(t, segments=self._segments)
+    def _point_in_table(self, t, table):
+        """Same as point, using an arc length table."""
+        i, t, closeto = self._locate_in_table(t, table)
         x0, y0 = self[i].x, self[i].y
         p1 = self[i + 1]
         if p1.cmd == CLOSE:
@@ -569,7 +953,7 @@ class BezierPath(Grob, ColorMixin):
         To omit the last point on closed paths: end=1-1.0/amount
         """
         # Originally from nodebox-gl
-        if len(self._elements) == 0:
+        if not self._ops:
             raise PathError("The given path is empty")
         n = end - start
         d = n
@@ -579,8 +963,49 @@ class BezierPath(Grob, ColorMixin):
             # If amount=4, we want the point at t 0.0, 0.33, 0.66 and 1.0.
             # If amount=2, we want the point at t 0.0 and 1.0.
             d = float(n) / (amount - 1)
+        if segments is None:
+            table = self._get_arc_lengths()
+        else:
+            table = self._arc_length_table(segments)
+        for i in range(int(amount)):
+            yield self._point_in_table(start + d * i, table)
+
+    def coordinates(self, amount=100, start=0.0, end=1.0):
+        """Returns a list of (x, y) for amount points evenly spaced on the
+        path, the same as the x, y of each element from points().
+
+        This is much faster than points() for many points, since
+        PathElements are not created.
+        """
+        if not self._ops:
+            raise PathError("The given path is empty")
+        n = end - start
+        d = n
+        if amount > 1:
+            d = float(n) / (amount - 1)
+
+        table = self._get_arc_lengths()
+        elements = list(self._get_elements())
+        coordinates = []
         for i in range(int(amount)):
-            yield self.point(start + d * i, segments)
+            index, t, closeto = self._locate_in_table(start + d * i, table)
+            x0, y0 = elements[index].x, elements[index].y
+            p1 = elements[index + 1]
+            if p1.cmd == CLOSE:
+                coordinates.append(self._linepoint(t, x0, y0, closeto.x, closeto.y))
+            elif p1.cmd in (LINETO, MOVETO):
+                coordinates.append(self._linepoint(t, x0, y0, p1.x, p1.y))
+            elif p1.cmd == ARC:
+                coordinates.append((p1.x, p1.y))
+            elif p1.cmd == CURVETO:
+                coordinates.append(
+                    self._curvepoint(
+                        t, x0, y0, p1.c1x, p1.c1y, p1.c2x, p1.c2y, p1.x, p1.y,
+                    )[:2],
+                )
+            else:
+                raise PathError(f"Unknown cmd '{p1.cmd}' for p1 {p1}")
+        return coordinates
 
     def _linepoint(self, t, x0, y0, x1, y1):
         """Returns coordinates for point at t on the line.
@@ -739,37 +1164,47 @@ class BezierPath(Grob, ColorMixin):
 
     def _get_elements(self):
         """Yields all elements as PathElements."""
-        for index, el in enumerate(self._elements):
-            if isinstance(el, tuple):
-                el = PathElement(*el)
-                self._elements[index] = el
-            yield el
+        for index in range(len(self._ops)):
+            yield self[index]
 
     def extend(self, pathelements):
-        self._elements.extend(pathelements)
+        for el in pathelements:
+            if not isinstance(el, PathElement):
+                el = PathElement(*el)
+            self.append(el)
 
     def __getitem__(self, item):
-        """el is either a PathElement or the parameters to pass to one.
+        """Returns the PathElement at an index, or a list of them for a
+        slice.
 
-        If el is a PathElement return it If el is parameters, create a
-        PathElement and return it
+        PathElements are created from the draw ops the first time they
+        are used.
         """
         if isinstance(item, slice):
             indices = item.indices(len(self))
             return [self.__getitem__(i) for i in range(*indices)]
-        else:
-            el = self._elements[item]
-            if isinstance(el, tuple):
-                el = PathElement(*el)
-                self._elements[item] = el
-            return el
+        if item < 0:
+            item += len(self._ops)
+        el = self._elements.get(item)
+        if el is None:
+            op = self._ops[item]
+            if op == OP_CLOSE:
+                # Closes to the start of the path.
+                first = self[0]
+                el = PathElement(CLOSE, first.x, first.y)
+            else:
+                start = self._offsets[item]
+                coords = self._coords[start : start + OP_COORDS[op]]
+                el = PathElement(OP_CMDS[op], *coords)
+            self._elements[item] = el
+        return el
 
     def __iter__(self):
-        for index in range(len(self._elements)):
+        for index in range(len(self._ops)):
             yield self.__getitem__(index)
 
     def __len__(self):
-        return len(self._elements)
+        return len(self._ops)
 
     bounds = property(_get_bounds)
     contours = property(_get_contours)
@@ -808,6 +1243,9 @@ class ClippingPath(BezierPath):
 
         return render
 
+    def draw(self):
+        self._deferred_render(self._render_closure())
+
 
 class EndClip(Grob):
     def __init__(self, bot, **kwargs):
@@ -930,6 +1368,126 @@ class PathElement:
     ctrl2 = property(get_ctrl2, set_ctrl2)
 
 
+def _gradient_pattern(gradient):
+    """Return a cairo gradient for a BezierPath.fillgradient."""
+    kind, points, stops = gradient[0], gradient[1:-1], gradient[-1]
+    if kind == LINEAR:
+        pattern = cairo.LinearGradient(*points)
+    elif kind == RADIAL:
+        pattern = cairo.RadialGradient(*points)
+    else:
+        raise ValueError(f"gradient must be {LINEAR} or {RADIAL}, got {kind!r}")
+    for offset, r, g, b, a in stops:
+        pattern.add_color_stop_rgba(offset, r, g, b, a)
+    pattern.set_extend(cairo.EXTEND_PAD)
+    return pattern
+
+
+def _paint_shadow(cairo_ctx, shadow, fill_alpha, stroke_alpha):
+    """Paint the shadow of the current path, with the fill and stroke
+    settings of cairo_ctx.
+
+    The path is drawn to an offscreen mask and blurred there, only the part
+    of the shadow inside the clip is drawn.
+    """
+    dx, dy, blur, r, g, b, a = shadow
+    if not (fill_alpha or stroke_alpha) or not a:
+        return
+
+    # Two box blurs, each k pixels either side, are close to a gaussian blur
+    # with a standard deviation of blur / 2.
+    k = (sqrt(1.5 * blur * blur + 1) - 1) / 2 if blur > 0 else 0
+    scale = min(1.0, MAX_SHADOW_BOX / k) if k else 1.0
+    box = round(k * scale)
+    margin = 2 * box / scale
+
+    extents = []
+    if fill_alpha:
+        extents.append(cairo_ctx.fill_extents())
+    if stroke_alpha:
+        extents.append(cairo_ctx.stroke_extents())
+    cx1, cy1, cx2, cy2 = cairo_ctx.clip_extents()
+    x1 = max(min(e[0] for e in extents) - margin, cx1 - dx - margin)
+    y1 = max(min(e[1] for e in extents) - margin, cy1 - dy - margin)
+    x2 = min(max(e[2] for e in extents) + margin, cx2 - dx + margin)
+    y2 = min(max(e[3] for e in extents) + margin, cy2 - dy + margin)
+    if x2 <= x1 or y2 <= y1:
+        return
+
+    width, height = ceil((x2 - x1) * scale), ceil((y2 - y1) * scale)
+    mask = cairo.ImageSurface(cairo.FORMAT_A8, width, height)
+    mask_ctx = cairo.Context(mask)
+    mask_ctx.scale(scale, scale)
+    mask_ctx.translate(-x1, -y1)
+    mask_ctx.append_path(cairo_ctx.copy_path())
+    mask_ctx.set_fill_rule(cairo_ctx.get_fill_rule())
+    mask_ctx.set_line_width(cairo_ctx.get_line_width())
+    mask_ctx.set_line_cap(cairo_ctx.get_line_cap())
+    mask_ctx.set_line_join(cairo_ctx.get_line_join())
+    mask_ctx.set_dash(*cairo_ctx.get_dash())
+    if fill_alpha:
+        mask_ctx.set_source_rgba(0, 0, 0, fill_alpha)
+        mask_ctx.fill_preserve()
+    if stroke_alpha:
+        mask_ctx.set_source_rgba(0, 0, 0, stroke_alpha)
+        mask_ctx.stroke()
+
+    for _ in range(2):
+        mask = _box_blur(mask, box, 1, 0)
+        mask = _box_blur(mask, box, 0, 1)
+
+    pattern = cairo.SurfacePattern(mask)
+    pattern.set_filter(cairo.FILTER_GOOD)
+    pattern.set_matrix(
+        cairo.Matrix(scale, 0, 0, scale, -(x1 + dx) * scale, -(y1 + dy) * scale),
+    )
+    cairo_ctx.set_source_rgba(r, g, b, a)
+    cairo_ctx.mask(pattern)
+
+
+def _box_blur(surface, box, dx, dy):
+    """Return an A8 surface where each pixel is the average of the box
+    pixels either side of it, in the direction dx, dy."""
+    if not box:
+        return surface
+    blurred = cairo.ImageSurface(
+        cairo.FORMAT_A8, surface.get_width(), surface.get_height(),
+    )
+    ctx = cairo.Context(blurred)
+    ctx.set_operator(cairo.OPERATOR_ADD)
+    alpha = 1.0 / (2 * box + 1)
+    for i in range(-box, box + 1):
+        ctx.set_source_surface(surface, i * dx, i * dy)
+        ctx.paint_with_alpha(alpha)
+    return blurred
+
+
+def _cubic_extrema(p0, p1, p2, p3):
+    """Return the values of a cubic bezier at its ends, and where its
+    derivative is zero."""
+    values = [p0, p3]
+    # B'(t) / 3 = a t^2 + b t + c
+    a = -p0 + 3 * p1 - 3 * p2 + p3
+    b = 2 * (p0 - 2 * p1 + p2)
+    c = p1 - p0
+    if abs(a) < 1e-12:
+        roots = [-c / b] if b else []
+    else:
+        discriminant = b * b - 4 * a * c
+        if discriminant < 0:
+            roots = []
+        else:
+            root = sqrt(discriminant)
+            roots = [(-b + root) / (2 * a), (-b - root) / (2 * a)]
+    for t in roots:
+        if 0 < t < 1:
+            mt = 1 - t
+            values.append(
+                mt * mt * mt * p0 + 3 * mt * mt * t * p1 + 3 * mt * t * t * p2 + t * t * t * p3,
+            )
+    return values
+
+
 class PathError(Exception):
     # Originally from nodebox-gl
     pass
@@ -62,20 +62,30 @@ class Grob:
         http://dev.nodebox.net/browser/nodebox-
         java/branches/rewrite/src/java/net/nodebox/graphics/Grob.java."""
         dx, dy = self._get_center()
-        t = cairo.Matrix()
-        t.translate(dx, dy)
-        t = transform * t
-        t.translate(-dx, -dy)
-        return t
+        # Same as translating by -dx, -dy, applying transform and then
+        # translating back, without creating the intermediate matrices.
+        xx, yx, xy, yy, x0, y0 = transform
+        return cairo.Matrix(
+            xx,
+            yx,
+            xy,
+            yy,
+            x0 + dx - xx * dx - xy * dy,
+            y0 + dy - yx * dx - yy * dy,
+        )
 
     def _corner_transform(self, transform):
         """CORNER is the default, so we just return the transform."""
         return transform
 
-    def _deferred_render(self, render_func=None):
+    def _deferred_render(self, render_func=None, key=None):
         """Pass a function to the canvas for deferred rendering, defaults to
-        self._render."""
-        self._canvas.deferred_render(render_func or self._render)
+        self._render.
+
+        key, if set, describes everything the function draws so the canvas
+        can reuse its output in retained mode.
+        """
+        self._canvas.deferred_render(render_func or self._render, key)
 
     def _render(self, ctx):
         """For overriding by GRaphicOBjects."""
@@ -1,6 +1,10 @@
-import array
+import hashlib
 import os.path
-from io import StringIO
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 
 from shoebot.core.backend import cairo, driver, gi
 from shoebot.util import _copy_attrs
@@ -19,17 +23,255 @@ CENTER = "center"
 CORNER = "corner"
 
 
-class SurfaceRef:
-    """Cannot have a weakref to a cairo surface, so wrapper is used."""
+# Default size of the image cache, in bytes of decoded pixels.
+DEFAULT_IMAGE_CACHE_BYTES = 256 * 1024 * 1024
 
-    def __init__(self, surface):
-        self.surface = surface
+# cairo.FORMAT_ARGB32 pixels are native endian 32 bit ints, this is the
+# order of their bytes in memory.
+ARGB32_BYTE_ORDER = "BGRA" if sys.byteorder == "little" else "ARGB"
+
+
+def _surface_from_pil(img):
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+
+    sw, sh = img.size
+    # PIL converts straight into the surfaces memory.
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, sw, sh)
+    surface.flush()
+    surface.get_data()[:] = img.tobytes(
+        "raw", ARGB32_BYTE_ORDER, surface.get_stride(), 1,
+    )
+    surface.mark_dirty()
+    return surface
+
+
+def _surface_from_buffer(buffer):
+    """Wrap a buffer of pixels as a cairo ImageSurface.
+
+    buffer may be any object supporting the buffer protocol, e.g. a NumPy
+    array, memoryview or mmap, containing cairo.FORMAT_ARGB32 pixels -
+    premultiplied alpha, with bytes in ARGB32_BYTE_ORDER.
+
+    It must have a shape of (height, width, 4) bytes, or (height, width)
+    32 bit ints. A flat buffer, like an mmap, can be given a shape with
+    memoryview(buffer).cast("B", (height, width, 4)).
+
+    Writable, C contiguous buffers are used by the surface without copying,
+    changes to the buffer will show in the surface. Other buffers are copied.
+
+    :raise ValueError: if the buffer is not in a supported format.
+    """
+    view = memoryview(buffer)
+    if view.ndim == 3 and view.itemsize == 1 and view.shape[2] == 4:
+        height, width, _ = view.shape
+    elif view.ndim == 2 and view.itemsize == 4:
+        height, width = view.shape
+    else:
+        raise ValueError(
+            "Image buffer must have a shape of (height, width, 4) bytes or "
+            f"(height, width) 32 bit pixels, not shape {view.shape} "
+            f"with {view.itemsize} byte items",
+        )
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Image buffer is empty, shape {view.shape}")
+    if view.strides[1:] != ((4, 1) if view.ndim == 3 else (4,)):
+        raise ValueError(
+            f"Image buffer pixels must be contiguous, got strides {view.strides}",
+        )
+
+    stride = cairo.ImageSurface.format_stride_for_width(cairo.FORMAT_ARGB32, width)
+    contiguous = view.c_contiguous and view.strides[0] == stride
+    if contiguous and not view.readonly:
+        return cairo.ImageSurface.create_for_data(
+            view, cairo.FORMAT_ARGB32, width, height, stride,
+        )
+
+    # Read only, or padded rows: copy into a new surface.
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+    surface.flush()
+    surface.get_data()[:] = view.tobytes()
+    surface.mark_dirty()
+    return surface
+
+
+def _is_pixel_buffer(data):
+    """:return: True if data is a buffer with rows of pixels, rather than
+    the bytes of an image file."""
+    try:
+        return memoryview(data).ndim > 1
+    except TypeError:
+        return False
+
+
+def _surface_from_file(path):
+    """Decode the image file at path to a cairo surface."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".svg" and Rsvg is not None:
+        handle = Rsvg.Handle()
+        svg = handle.new_from_file(path)
+        dimensions = svg.get_dimensions()
+        surface = cairo.RecordingSurface(
+            cairo.CONTENT_COLOR_ALPHA, (0, 0, dimensions.width, dimensions.height),
+        )
+        ctx = cairo.Context(surface)
+        pycairo_ctx = driver.ensure_pycairo_context(ctx)
+        svg.render_cairo(pycairo_ctx)
+        return surface
+    elif extension == ".png":
+        return cairo.ImageSurface.create_from_png(path)
+
+    from PIL import Image as PILImage
+
+    with PILImage.open(path) as img:
+        return _surface_from_pil(img)
+
+
+def _surface_from_data(data):
+    """Decode data containing an entire image file to a cairo surface."""
+    from PIL import Image as PILImage
+
+    with PILImage.open(BytesIO(data)) as img:
+        return _surface_from_pil(img)
+
+
+def _surface_size(surface):
+    """:return: width, height of an ImageSurface or RecordingSurface."""
+    if isinstance(surface, cairo.RecordingSurface):
+        extents = surface.get_extents()
+        # extents has x, y which we dont use right now
+        return extents.width, extents.height
+    return surface.get_width(), surface.get_height()
+
+
+def _surface_bytes(surface):
+    """:return: approximate memory used by the pixels of surface."""
+    if isinstance(surface, cairo.ImageSurface):
+        return surface.get_stride() * surface.get_height()
+    width, height = _surface_size(surface)
+    return int(width * height * 4)
+
+
+class SurfaceCache:
+    """LRU cache of decoded image surfaces, limited to max_bytes of pixels.
+
+    Images loaded from files are keyed on their path and reloaded if the
+    file is modified, images loaded from data are keyed on a hash of the
+    data.
+
+    Images can be decoded ahead of time on a background thread with
+    prefetch.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_IMAGE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key: (surface, size in bytes, mtime)
+        self._pending = {}  # key: Future, for prefetches in progress
+        self._executor = None
+        self._lock = threading.RLock()
+
+    def get(self, path, mtime=None):
+        """:return: surface for the image file at path, decoding it if
+        needed.
+
+        :param mtime: st_mtime_ns of the file, if the caller already has it.
+        """
+        if mtime is None:
+            mtime = os.stat(path).st_mtime_ns
+        return self._get(path, mtime, _surface_from_file, path)
+
+    def get_data(self, data):
+        """:return: surface for an image file in memory, decoding it if
+        needed."""
+        key = hashlib.blake2b(data, digest_size=16).digest()
+        return self._get(key, None, _surface_from_data, data)
+
+    def prefetch(self, paths):
+        """Decode image files on a background thread, so later calls to get
+        return immediately."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="shoebot-images",
+                )
+            for path in paths:
+                if path not in self._entries and path not in self._pending:
+                    self._pending[path] = self._executor.submit(self._prefetch, path)
+
+    def _prefetch(self, path):
+        try:
+            self._get(
+                path, os.stat(path).st_mtime_ns, _surface_from_file, path, wait=False,
+            )
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+
+    def _get(self, key, mtime, load, source, wait=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] == mtime:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            future = self._pending.get(key) if wait else None
+
+        if future is not None:
+            # Already being decoded on the prefetch thread, wait for it.
+            future.result()
+            return self._get(key, mtime, load, source, wait=False)
+
+        surface = load(source)
+        with self._lock:
+            self.misses += 1
+            self._put(key, surface, mtime)
+        return surface
+
+    def _put(self, key, surface, mtime):
+        old_entry = self._entries.pop(key, None)
+        if old_entry is not None:
+            self.bytes -= old_entry[1]
+        size = _surface_bytes(surface)
+        self._entries[key] = (surface, size, mtime)
+        self.bytes += size
+        self._evict()
+
+    def _evict(self):
+        # Evict least recently used surfaces, but always keep the newest.
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """:return: dict of cache statistics."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
 
 
 class Image(Grob, ColorMixin):
-    _surface_cache = (
-        {}
-    )  # Did have a WeakValueDictionary here but this caused a memory leak of images every frame
+    _surface_cache = SurfaceCache()
     _state_attributes = {
         "transform",
     }  # NBX uses transform and transformmode here
@@ -56,6 +298,7 @@ class Image(Grob, ColorMixin):
         self.alpha = alpha
         self.path = path
         self.data = data
+        self._mtime = None  # Modification time of the file at path
         sh = sw = None  # Surface Height and Width
 
         if isinstance(self.data, cairo.ImageSurface):
@@ -64,69 +307,21 @@ class Image(Grob, ColorMixin):
             self._surface = self.data
         else:
             # checks if image data is passed in command call, in this case it wraps
-            # the data in a StringIO oject in order to use it as a file
+            # the data in a BytesIO oject in order to use it as a file
             # the data itself must contain an entire image, not just pixel data
             # it can be useful for example to retrieve images from the web without
             # writing temp files (e.g. using nodebox's web library, see example 1 of the library)
             # if no data is passed the path is used to open a local file
+            # data can also be a buffer of pixels e.g. a NumPy array from a camera,
+            # see _surface_from_buffer
             if self.data is None:
-                surfaceref = self._surface_cache.get(path)
-                if surfaceref:
-                    surface = surfaceref.surface
-                    if isinstance(surface, cairo.RecordingSurface):
-                        extents = surface.get_extents()
-                        # extents has x, y which we dont use right now
-                        sw = extents.width
-                        sh = extents.height
-                    else:
-                        sw = surface.get_width()
-                        sh = surface.get_height()
-                elif os.path.splitext(path)[1].lower() == ".svg" and Rsvg is not None:
-                    handle = Rsvg.Handle()
-                    svg = handle.new_from_file(path)
-                    dimensions = svg.get_dimensions()
-                    sw = dimensions.width
-                    sh = dimensions.height
-                    surface = cairo.RecordingSurface(
-                        cairo.CONTENT_COLOR_ALPHA, (0, 0, sw, sh),
-                    )
-                    ctx = cairo.Context(surface)
-                    pycairo_ctx = driver.ensure_pycairo_context(ctx)
-                    svg.render_cairo(pycairo_ctx)
-                elif os.path.splitext(path)[1].lower() == ".png":
-                    surface = cairo.ImageSurface.create_from_png(path)
-                    sw = surface.get_width()
-                    sh = surface.get_height()
-                else:
-                    from PIL import Image as PILImage
-
-                    with PILImage.open(path) as img:
-                        if img.mode != "RGBA":
-                            img = img.convert("RGBA")
-
-                        sw, sh = img.size
-                        # Would be nice to not have to do some of these conversions :-\
-                        bgra_data = img.tobytes("raw", "BGRA", 0, 1)
-                        bgra_array = array.array("B", bgra_data)
-                        surface = cairo.ImageSurface.create_for_data(
-                            bgra_array, cairo.FORMAT_ARGB32, sw, sh, sw * 4,
-                        )
-
-                self._surface_cache[path] = SurfaceRef(surface)
+                self._mtime = os.stat(path).st_mtime_ns
+                surface = self._surface_cache.get(path, self._mtime)
+            elif _is_pixel_buffer(self.data):
+                surface = _surface_from_buffer(self.data)
             else:
-                from PIL import Image as PILImage
-
-                with PILImage.open(StringIO(self.data)) as img:
-                    if img.mode != "RGBA":
-                        img = img.convert("RGBA")
-
-                    sw, sh = img.size
-                    # Would be nice to not have to do some of these conversions :-\
-                    bgra_data = img.tobytes("raw", "BGRA", 0, 1)
-                    bgra_array = array.array("B", bgra_data)
-                    surface = cairo.ImageSurface.create_for_data(
-                        bgra_array, cairo.FORMAT_ARGB32, sw, sh, sw * 4,
-                    )
+                surface = self._surface_cache.get_data(self.data)
+            sw, sh = _surface_size(surface)
 
             if width is not None or height is not None:
                 if width:
@@ -146,7 +341,7 @@ class Image(Grob, ColorMixin):
             self.height = height or sh
             self._surface = surface
 
-        self._deferred_render()
+        self._deferred_render(key=self._render_key())
 
     def _render(self, ctx):
         if self.width and self.height:
@@ -158,8 +353,25 @@ class Image(Grob, ColorMixin):
             ctx.set_source_surface(self._surface)
             ctx.paint()
 
+    def _render_key(self):
+        """Key for retained mode, images loaded from files are cached until
+        the file changes, other images are always rendered."""
+        if self._canvas.scene_cache is None or self.path is None or self.data is not None:
+            return None
+        transform = self._call_transform_mode(self._transform)
+        return (
+            "image",
+            self.path,
+            self._mtime,
+            self.x,
+            self.y,
+            self.width,
+            self.height,
+            tuple(transform),
+        )
+
     def draw(self):
-        self._deferred_render()
+        self._deferred_render(key=self._render_key())
 
     def _get_center(self):
         """Returns the center point of the path, disregarding transforms."""
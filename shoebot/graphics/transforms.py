@@ -197,7 +197,8 @@ class Transform:
                         t *= m2
                         m = t
                 elif cmd == "push":
-                    m_archived.append(m)
+                    # Save a copy, translate changes m in place.
+                    m_archived.append(cairo.Matrix(*m))
                 elif cmd == "pop":
                     m = m_archived.pop()
 
@@ -209,7 +210,7 @@ class Transform:
         Its centerpoint is presumed to be (0,0), which is the Cairo
         default.
         """
-        return self.get_matrix_with_center(0, 0)
+        return self.get_matrix_with_center(0, 0, CENTER)
 
     def transformBezierPath(self, path):
         # From nodebox
@@ -29,8 +29,9 @@ import locale
 #   OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF
 #   ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 import sys
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 from enum import Enum
+from functools import lru_cache
 
 from cairo import PATH_CLOSE_PATH, PATH_CURVE_TO, PATH_LINE_TO, PATH_MOVE_TO
 
@@ -114,6 +115,78 @@ def _alignment_name_to_pango(alignment):
     return Pango.Alignment.LEFT
 
 
+@lru_cache(maxsize=256)
+def _font_description(font, fontsize):
+    """Return a Pango.FontDescription for font at fontsize.
+
+    Descriptions are shared between Text objects, so must not be modified.
+    """
+    description = Pango.FontDescription.from_string(font)
+    # fontsize is multiplied by Pango.SCALE
+    description.set_absolute_size(fontsize * Pango.SCALE)
+    return description
+
+
+@lru_cache(maxsize=64)
+def _layout_context(font_options, matrix=None, surface_options=None):
+    """Return a PangoCairo context to lay out text.
+
+    Without matrix and surface_options, text is laid out before it is
+    rendered, to measure it.
+
+    :param font_options: (antialias, hintstyle, hintmetrics, subpixelorder)
+    :param matrix: (xx, yx, xy, yy) of the cairo context the text is rendered on,
+                   Pango ignores the translation.
+    :param surface_options: font options of the surface the text is rendered on,
+                            see _surface_font_options.
+    """
+    antialias, hintstyle, hintmetrics, subpixelorder = font_options
+    cr = cairo.Context(cairo.RecordingSurface(cairo.CONTENT_ALPHA, None))
+    cr = driver.ensure_pycairo_context(cr)
+    if matrix is not None:
+        cr.set_matrix(cairo.Matrix(*matrix, 0, 0))
+
+    # apply font options if set
+    if any(font_options) or surface_options is not None:
+        opts = cairo.FontOptions()
+        if surface_options is not None:
+            (
+                surface_antialias,
+                surface_hintstyle,
+                surface_hintmetrics,
+                surface_subpixelorder,
+            ) = surface_options
+            opts.set_antialias(surface_antialias)
+            opts.set_hint_style(surface_hintstyle)
+            opts.set_hint_metrics(surface_hintmetrics)
+            opts.set_subpixel_order(surface_subpixelorder)
+        # map values to Cairo constants
+        if antialias:
+            opts.set_antialias(getattr(cairo.Antialias, antialias.upper()))
+        if hintstyle:
+            opts.set_hint_style(getattr(cairo.HintStyle, hintstyle.upper()))
+        if hintmetrics:
+            opts.set_hint_metrics(getattr(cairo.HintMetrics, hintmetrics.upper()))
+        if subpixelorder:
+            opts.set_subpixel_order(
+                getattr(cairo.SubpixelOrder, subpixelorder.upper()),
+            )
+        cr.set_font_options(opts)
+
+    return pangocairo_create_context(cr)
+
+
+def _surface_font_options(surface):
+    """Return the font options of a cairo surface as a hashable tuple."""
+    opts = surface.get_font_options()
+    return (
+        opts.get_antialias(),
+        opts.get_hint_style(),
+        opts.get_hint_metrics(),
+        opts.get_subpixel_order(),
+    )
+
+
 TextBounds = namedtuple("TextBounds", "x y width height")
 TextBounds.__doc__ = """\
 Text Bounds in pixels.
@@ -132,6 +205,11 @@ class Text(Grob, ColorMixin):
     Implementation of fonts uses Pango instead of Cocoa.
     """
 
+    # Layouts are shared by Text with the same settings, so text drawn
+    # every frame is only shaped once.
+    _layout_cache = OrderedDict()
+    _layout_cache_size = 1024
+
     def __init__(
         self,
         bot,
@@ -188,10 +266,7 @@ class Text(Grob, ColorMixin):
         # Setup hidden vars for Cairo / Pango specific bits:
         self._ctx = ctx
         self._pangocairo_ctx = None
-        self._pango_fontface = Pango.FontDescription.from_string(self.font)
-
-        # then we set fontsize (multiplied by Pango.SCALE)
-        self._pango_fontface.set_absolute_size(self.fontsize * Pango.SCALE)
+        self._pango_fontface = _font_description(self.font, self.fontsize)
 
         # Pre-render some stuff to enable metrics sizing
         self._pre_render()
@@ -202,46 +277,65 @@ class Text(Grob, ColorMixin):
                 self._render(self._ctx)
             else:
                 # Normal rendering, can be deferred
-                self._deferred_render()
+                self._deferred_render(key=self._render_key())
         self._prerendered = draw
 
     # pre rendering is needed to measure the metrics of the text, it's also
     # useful to get the path, without the need to call _render()
     def _pre_render(self):
-        # we use a new CairoContext to pre render the text
-        rs = cairo.RecordingSurface(cairo.CONTENT_ALPHA, None)
-        cr = cairo.Context(rs)
-        cr = driver.ensure_pycairo_context(cr)
-
-        # apply font options if set
-        if self.hintstyle or self.hintmetrics or self.subpixelorder or self.antialias:
-            opts = cairo.FontOptions()
-            # map values to Cairo constants
-            if self.antialias:
-                opts.set_antialias(getattr(cairo.Antialias, self.antialias.upper()))
-            if self.hintstyle:
-                opts.set_hint_style(getattr(cairo.HintStyle, self.hintstyle.upper()))
-            if self.hintmetrics:
-                opts.set_hint_metrics(
-                    getattr(cairo.HintMetrics, self.hintmetrics.upper()),
-                )
-            if self.subpixelorder:
-                opts.set_subpixel_order(
-                    getattr(cairo.SubpixelOrder, self.subpixelorder.upper()),
-                )
-            cr.set_font_options(opts)
-
-        self._pangocairo_ctx = pangocairo_create_context(cr)
-        self._pango_layout = PangoCairo.create_layout(cr)
+        font_options = (
+            self.antialias,
+            self.hintstyle,
+            self.hintmetrics,
+            self.subpixelorder,
+        )
+        key = (
+            self.text,
+            self.font,
+            self.fontsize,
+            self.width,
+            self.indent,
+            self.align,
+            tuple(sorted(self.markup_vars.items())),
+            font_options,
+        )
+        self._font_options = font_options
+        self._layout_key = key
+        self._pangocairo_ctx = _layout_context(font_options)
+        self._pango_layout = self._cached_layout(key, self._pangocairo_ctx)
+
+    def _render_layout(self, pycairo_ctx):
+        """Return the layout laid out for the transform and surface font
+        options of the context it is rendered on, so hinting follows them."""
+        xx, yx, xy, yy, _, _ = pycairo_ctx.get_matrix()
+        matrix = (xx, yx, xy, yy)
+        surface_options = _surface_font_options(pycairo_ctx.get_target())
+        context = _layout_context(self._font_options, matrix, surface_options)
+        return self._cached_layout((self._layout_key, matrix, surface_options), context)
+
+    def _cached_layout(self, key, context):
+        layout_cache = self._layout_cache
+        layout = layout_cache.get(key)
+        if layout is None:
+            layout = self._create_layout(context)
+            layout_cache[key] = layout
+            if len(layout_cache) > self._layout_cache_size:
+                layout_cache.popitem(last=False)
+        else:
+            layout_cache.move_to_end(key)
+        return layout
+
+    def _create_layout(self, context):
+        layout = Pango.Layout.new(context)
         # layout line spacing
         # TODO: the behaviour is not the same as nodebox yet
         # self.layout.set_spacing(int(((self.lineheight-1)*self._fontsize)*Pango.SCALE)) #pango requires an int casting
         # we pass pango font description and the text to the pango layout
-        self._pango_layout.set_font_description(self._pango_fontface)
+        layout.set_font_description(self._pango_fontface)
 
         if not self.markup_vars:
-            self._pango_layout.set_text(self.text, -1)
-            return
+            layout.set_text(self.text, -1)
+            return layout
         # some of the specified settings require a Pango.Markup hack
         # see https://stackoverflow.com/questions/55533312/how-to-create-a-letter-spacing-attribute-with-pycairo
         # and https://developer.gnome.org/pango/1.46/pango-Markup.html
@@ -251,19 +345,20 @@ class Text(Grob, ColorMixin):
         markup_styles = " ".join(
             [f'{setting}="{value}"' for setting, value in self.markup_vars.items()],
         )
-        self._pango_layout.set_markup(f"<span {markup_styles}>{self.text}</span>")
+        layout.set_markup(f"<span {markup_styles}>{self.text}</span>")
 
         # check if max text width is set and pass it to pango layout
         # text will wrap, meanwhile it checks if and indent has to be applied
         # indent is subordinated to width because it makes no sense on a single-line text block
         if self.width:
-            self._pango_layout.set_width(int(self.width) * Pango.SCALE)
+            layout.set_width(int(self.width) * Pango.SCALE)
             if self.indent:
-                self._pango_layout.set_indent(self.indent * Pango.SCALE)
+                layout.set_indent(self.indent * Pango.SCALE)
         # set text alignment
-        self._pango_layout.set_alignment(_alignment_name_to_pango(self.align))
+        layout.set_alignment(_alignment_name_to_pango(self.align))
         if self.align == "justify":
-            self._pango_layout.set_justify(True)
+            layout.set_justify(True)
+        return layout
 
     def _get_context(self):
         self._ctx = self._ctx or cairo.Context(
@@ -271,16 +366,38 @@ class Text(Grob, ColorMixin):
         )
         return self._ctx
 
+    def _render_key(self):
+        """Key for retained mode, describes everything that affects how the
+        text is drawn."""
+        if self._canvas.scene_cache is None:
+            return None
+        transform = self._call_transform_mode(self._transform)
+        return (
+            "text",
+            self.text,
+            self.font,
+            self.fontsize,
+            self.x,
+            self.y,
+            self.width,
+            self.align,
+            self.lineheight,
+            self.indent,
+            tuple(sorted(self.markup_vars.items())),
+            self.hintstyle,
+            self.hintmetrics,
+            self.antialias,
+            self.subpixelorder,
+            self.outline,
+            tuple(self._fillcolor) if self._fillcolor else None,
+            tuple(transform),
+        )
+
     def _render(self, ctx=None):
         if not self._prerendered:
             return
         ctx = ctx or self._get_context()
         pycairo_ctx = driver.ensure_pycairo_context(ctx)
-        # we build a PangoCairo context linked to cairo context
-        # then we create a pango layout.
-        # Update the context as we already used a null one on the pre-rendering
-        # supposedly there should not be a big performance penalty
-        self._pangocairo_ctx = pangocairo_create_context(pycairo_ctx)
 
         if self._fillcolor is None:
             return
@@ -293,8 +410,7 @@ class Text(Grob, ColorMixin):
         if not self.outline:
             # In outline, the caller will stroke the generated path
             ctx.set_source_rgba(*self._fillcolor)
-        PangoCairo.show_layout(pycairo_ctx, self._pango_layout)
-        PangoCairo.update_layout(pycairo_ctx, self._pango_layout)
+        PangoCairo.show_layout(pycairo_ctx, self._render_layout(pycairo_ctx))
 
     # This version is probably more pangoesque, but the layout iterator
     # caused segfaults on some system
@@ -34,6 +34,9 @@ _ = gettext.gettext
 class ShoebotWindow(Gtk.Window, GtkInputDeviceMixin, DrawQueueSink):
     """Create a GTK+ window that contains a ShoebotWidget."""
 
+    # Handle GUI events at 60fps while the bot waits for the next frame.
+    main_iteration_interval = 1.0 / 60
+
     # Draw in response to an expose-event
     def __init__(
         self,
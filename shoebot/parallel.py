@@ -0,0 +1,89 @@
+"""Render the frames of a bot across several processes.
+
+Used by sbot when more than one process is requested with --processes and
+several frames are written to numbered files with --repeat / --outputfile.
+
+The iterations are split into contiguous shards, one per worker process.
+Each worker creates its own bot, canvas and sink and runs the bot from the
+first iteration, but only iterations in its own shard are rendered and
+written.  Earlier iterations still run draw(), so state a bot keeps between
+frames is the same as in a serial run.  The random module is seeded with the
+same value in every worker for the same reason.
+
+Rendering and image encoding happen in parallel, user code in draw() is still
+run up to the end of each shard by its worker.
+"""
+
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+
+def shard_iterations(iterations, processes):
+    """Split iterations into contiguous ranges, one for each process.
+
+    Iteration numbers start at 1, like the ITERATION variable in bots.
+
+    >>> shard_iterations(10, 3)
+    [range(1, 5), range(5, 8), range(8, 11)]
+    """
+    processes = max(1, min(processes, iterations))
+    size, remainder = divmod(iterations, processes)
+    shards = []
+    start = 1
+    for index in range(processes):
+        stop = start + size + (1 if index < remainder else 0)
+        shards.append(range(start, stop))
+        start = stop
+    return shards
+
+
+def _render_shard(create_args, create_kwargs, run_args, run_kwargs, shard, seed):
+    """Worker process, run the bot and render the iterations in shard."""
+    from shoebot import create_bot
+
+    random.seed(seed)
+    bot = create_bot(*create_args, **create_kwargs)
+    run_kwargs = dict(
+        run_kwargs,
+        max_iterations=shard.stop - 1,
+        render_iterations=shard,
+        # Workers would overwrite each others trace files.
+        frame_trace=None,
+    )
+    return bot.run(*run_args, **run_kwargs)
+
+
+def run_parallel(
+    create_args, create_kwargs, run_args, run_kwargs, processes, seed=None,
+):
+    """Run a bot in several processes, each rendering part of the iterations.
+
+    :param create_args: passed to create_bot
+    :param create_kwargs: passed to create_bot
+    :param run_args: passed to bot.run
+    :param run_kwargs: passed to bot.run, must include max_iterations
+    :param processes: number of worker processes to use
+    :param seed: value to seed random with in every worker, if None one is chosen.
+    :return: True if every worker completed successfully.
+    """
+    if seed is None:
+        seed = random.randrange(sys.maxsize)
+
+    shards = shard_iterations(run_kwargs["max_iterations"], processes)
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        futures = [
+            executor.submit(
+                _render_shard,
+                create_args,
+                create_kwargs,
+                run_args,
+                run_kwargs,
+                shard,
+                seed,
+            )
+            for shard in shards
+        ]
+        # Collect results in frame order.
+        results = [future.result() for future in futures]
+    return all(results)
@@ -37,7 +37,7 @@ import sys
 
 DEFAULT_SERVERPORT = 7777
 
-OUTPUT_EXTENSIONS = (".png", ".svg", ".ps", ".pdf")
+OUTPUT_EXTENSIONS = (".png", ".svg", ".ps", ".pdf", ".mp4", ".mov", ".mkv", ".webm", ".gif")
 APP = "shoebot"
 DIR = sys.prefix + "/share/shoebot/locale"
 
@@ -92,10 +92,17 @@ def main():
         "--outputfile",
         dest="outputfile",
         help=_(
-            "run script and output to image file (accepts .png .svg .pdf and .ps extensions)",
+            "run script and output to image file (accepts .png .svg .pdf and .ps extensions), or video file with ffmpeg (.mp4 .mov .mkv .webm .gif)",
         ),
         metavar="FILE",
     )
+    group.add_argument(
+        "--framerate",
+        type=float,
+        dest="framerate",
+        default=None,
+        help=_("frames per second of video output (defaults to the bot speed)"),
+    )
 
     # Shoebot IO - Sockets
     group.add_argument(
@@ -161,6 +168,16 @@ def main():
         default=False,
         help=_("set number of iteration, multiple images will be produced"),
     )
+    group.add_argument(
+        "-j",
+        "--processes",
+        type=int,
+        dest="processes",
+        default=1,
+        help=_(
+            "number of processes to render frames with when used with --repeat and --outputfile",
+        ),
+    )
 
     group = parser.add_argument_group("Window Management")
     group.add_argument(
@@ -227,6 +244,34 @@ def main():
         default=False,
         help=_("Show internal shoebot error information in traceback"),
     )
+    group.add_argument(
+        "-fs",
+        "--frame-stats",
+        action="store_true",
+        dest="frame_stats",
+        default=False,
+        help=_("Print frame timing statistics when the bot finishes."),
+    )
+    group.add_argument(
+        "-ft",
+        "--frame-trace",
+        dest="frame_trace",
+        default=None,
+        help=_(
+            "Write a timeline of frame timings to FILE, in Chrome trace format (open in chrome://tracing or ui.perfetto.dev).",
+        ),
+        metavar="FILE",
+    )
+    group.add_argument(
+        "-fp",
+        "--frame-policy",
+        dest="frame_policy",
+        choices=("skip", "catchup"),
+        default="skip",
+        help=_(
+            "What to do when animation frames run late: skip them, or catchup by running frames without waiting (default skip).",
+        ),
+    )
 
     # get argparse arguments and check for sanity
     args, extra = parser.parse_known_args()
@@ -278,6 +323,11 @@ def main():
         args=shlex.split(args.script_args or ""),
         verbose=args.verbose,
         background_thread=not args.disable_background_thread,
+        processes=args.processes,
+        frame_stats=args.frame_stats,
+        frame_trace=args.frame_trace,
+        frame_policy=args.frame_policy,
+        framerate=args.framerate,
     )
 
     # Return errorcode
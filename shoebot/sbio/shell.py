@@ -208,6 +208,15 @@ class ShoebotCmd(cmd.Cmd):
             self.bot._speed = new_speed
         self.print_response(f"Speed: {self.bot._speed} FPS")
 
+    def do_stats(self, line):
+        """Show frame timing statistics, "stats reset" clears them."""
+        frame_timer = self.bot._frame_timer  # noqa
+        if line.strip() == "reset":
+            frame_timer.reset()
+            self.print_response("Frame statistics reset")
+            return
+        self.print_response(frame_timer.format_stats())
+
     def do_restart(self, line):
         """Attempt to restart bot by clearing its namespace and resetting FRAME
         to 0."""
@@ -1,7 +1,6 @@
 import argparse
 import subprocess
-import tempfile
-from pathlib import Path
+import sys
 
 
 def main():
@@ -23,6 +22,13 @@ def main():
         default=300,
         help="number of frames to export (default 300)",
     )
+    parser.add_argument(
+        "-r",
+        "--framerate",
+        dest="framerate",
+        default=30,
+        help="frames per second of the video (default 30)",
+    )
 
     args, extra = parser.parse_known_args()
 
@@ -31,21 +37,20 @@ def main():
     else:
         outfile = args.outputfile
 
-    with tempfile.TemporaryDirectory() as tmpdirname:
-        tmpdirpath = Path(tmpdirname)
-
-        image_name = tmpdirpath / Path(args.script).with_suffix(".png").name
-        cmd = f"sbot {args.script} --repeat {args.framenumber} \
-            --outputfile {image_name}"
-        result = subprocess.call(cmd, shell=True)
-        if result != 0:
-            sys.exit(1)
-
-        fileglob = tmpdirpath / "*.png"
-        cmd = f"ffmpeg -y -loglevel 24 -r 30 -f image2 -pattern_type glob \
-          -i '{fileglob}' -c:v libx264 -crf 20 -movflags faststart -c:a aac \
-          -pix_fmt yuv420p {outfile}"
-        subprocess.call(cmd, shell=True)
+    # Frames are streamed straight to ffmpeg by shoebot's video sink.
+    cmd = [
+        "sbot",
+        args.script,
+        "--repeat",
+        str(args.framenumber),
+        "--framerate",
+        str(args.framerate),
+        "--outputfile",
+        outfile,
+    ]
+    result = subprocess.call(cmd)
+    if result != 0:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
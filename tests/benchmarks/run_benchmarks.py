@@ -0,0 +1,230 @@
+"""Benchmark shoebot by rendering a set of reference bots headless.
+
+Like run_all_example_bots this is NOT run with the unittests, run it from
+the root directory of Shoebot:
+
+    $ python3 -m tests.benchmarks.run_benchmarks --output results.json
+
+Compare against a baseline saved from an earlier run, the exit code is 1 if
+any benchmark regressed by more than the thresholds:
+
+    $ python3 -m tests.benchmarks.run_benchmarks --baseline baseline.json
+
+Each bot runs in its own process, so peak RSS is measured per bot.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import sys
+import tempfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+BENCHMARKS_DIR = Path(__file__).absolute().parent
+BOTS_DIR = BENCHMARKS_DIR / "bots"
+PROJECT_DIR = BENCHMARKS_DIR.parent.parent
+
+# Benchmark name: bot to render
+BENCHMARK_BOTS = {
+    "paths": BOTS_DIR / "paths.bot",
+    "text": BOTS_DIR / "text.bot",
+    "images": BOTS_DIR / "images.bot",
+    "colors": BOTS_DIR / "colors.bot",
+    "graph": BOTS_DIR / "graph.bot",
+    "boids": BOTS_DIR / "boids.bot",
+}
+
+DEFAULT_FRAMES = 30
+DEFAULT_SEED = 0
+
+# Maximum fraction a measurement may get worse than the baseline before
+# it counts as a regression.
+DEFAULT_THRESHOLDS = {
+    "fps": 0.10,
+    "peak_rss_kb": 0.10,
+    "peak_allocated_kb": 0.10,
+}
+
+# True if higher values are better.
+HIGHER_IS_BETTER = {
+    "fps": True,
+    "peak_rss_kb": False,
+    "peak_allocated_kb": False,
+}
+
+
+def peak_rss_kb():
+    """:return: peak resident set size of this process in KB, or None if
+    it can't be measured on this platform."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # bytes on macOS, KB elsewhere.
+        return maxrss // 1024
+    return maxrss
+
+
+def _run_bot(bot_path, frames, seed, outputdir):
+    """Render frames of bot_path to PNG files in outputdir.
+
+    :return: the bot, after it has run.
+    """
+    from shoebot import create_bot
+
+    random.seed(seed)
+    bot = create_bot(
+        str(bot_path),
+        outputfile=str(Path(outputdir) / f"{bot_path.stem}.png"),
+        iterations=frames,
+    )
+    if not bot.run(str(bot_path), max_iterations=frames):
+        raise RuntimeError(f"{bot_path} failed to run")
+    return bot
+
+
+def run_benchmark(bot_path, frames=DEFAULT_FRAMES, seed=DEFAULT_SEED):
+    """Render a bot and measure it, this should be called in a new process.
+
+    The bot is run twice, once for timing and once with tracemalloc which
+    slows everything down.
+
+    :return: dict of measurements.
+    """
+    bot_path = Path(bot_path)
+    with tempfile.TemporaryDirectory() as outputdir:
+        start = perf_counter()
+        bot = _run_bot(bot_path, frames, seed, outputdir)
+        seconds = perf_counter() - start
+        rss = peak_rss_kb()
+        frame_stats = bot._frame_timer.stats()
+
+        tracemalloc.start()
+        _run_bot(bot_path, frames, seed, outputdir)
+        _, peak_allocated = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "bot": str(bot_path.relative_to(PROJECT_DIR)),
+        "frames": frames,
+        "seconds": seconds,
+        "fps": frames / seconds,
+        "peak_rss_kb": rss,
+        "peak_allocated_kb": peak_allocated // 1024,
+        "phases_ms": {
+            phase: frame_stats[phase] for phase in ("draw", "render", "sink")
+        },
+        "primitives": frame_stats["primitives"],
+    }
+
+
+def run_benchmarks(names, frames=DEFAULT_FRAMES, seed=DEFAULT_SEED):
+    """Run the named benchmarks, each in a fresh process.
+
+    :return: results dict, suitable for saving as JSON.
+    """
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": {},
+    }
+    # spawn, so that memory used by the parent or earlier bots is not counted.
+    mp_context = multiprocessing.get_context("spawn")
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp_context) as executor:
+            result = executor.submit(
+                run_benchmark, BENCHMARK_BOTS[name], frames, seed,
+            ).result()
+        results["benchmarks"][name] = result
+        print(
+            f"{name:<8} {result['fps']:8.2f} fps  "
+            f"peak rss {result['peak_rss_kb']} KB  "
+            f"peak allocated {result['peak_allocated_kb']} KB",
+        )
+    return results
+
+
+def compare_results(results, baseline, thresholds=None):
+    """Compare results with a baseline.
+
+    :param thresholds: dict of measurement: maximum fraction it may get worse,
+                       defaults to DEFAULT_THRESHOLDS.
+    :return: list of messages describing each regression.
+    """
+    thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    regressions = []
+    for name, result in results["benchmarks"].items():
+        baseline_result = baseline["benchmarks"].get(name)
+        if baseline_result is None:
+            continue
+        for measurement, threshold in thresholds.items():
+            value = result.get(measurement)
+            baseline_value = baseline_result.get(measurement)
+            if not value or not baseline_value:
+                continue
+            if HIGHER_IS_BETTER[measurement]:
+                change = (baseline_value - value) / baseline_value
+            else:
+                change = (value - baseline_value) / baseline_value
+            if change > threshold:
+                regressions.append(
+                    f"{name}: {measurement} {value:.2f} is {change:.0%} worse "
+                    f"than baseline {baseline_value:.2f}",
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "names",
+        nargs="*",
+        help=f"benchmarks to run, from {', '.join(BENCHMARK_BOTS)} (default: all)",
+    )
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="save results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    for measurement, threshold in DEFAULT_THRESHOLDS.items():
+        parser.add_argument(
+            f"--{measurement.replace('_', '-')}-threshold",
+            dest=f"{measurement}_threshold",
+            type=float,
+            default=threshold,
+            help=f"maximum fraction {measurement} may regress by (default: {threshold})",
+        )
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARK_BOTS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = run_benchmarks(
+        args.names or list(BENCHMARK_BOTS), frames=args.frames, seed=args.seed,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        thresholds = {
+            measurement: getattr(args, f"{measurement}_threshold")
+            for measurement in DEFAULT_THRESHOLDS
+        }
+        regressions = compare_results(results, baseline, thresholds)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
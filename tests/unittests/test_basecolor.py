@@ -4,6 +4,7 @@ import unittest
 from parameterized import parameterized
 
 from shoebot.graphics.basecolor import Color
+from shoebot.graphics.basecolor import FrozenColor
 
 
 class TestBaseColor(unittest.TestCase):
@@ -88,6 +89,30 @@ class TestBaseColor(unittest.TestCase):
 
         self.assertColorAlmostEqualsRGBA(actual_rgba, expected_rgba)
 
+    def test_hsb_follows_rgb_changes(self):
+        color = Color(1.0, 0.0, 0.0)
+        self.assertEqual((0.0, 1.0, 1.0), (color.h, color.s, color.brightness))
+
+        color.b = 1.0
+        self.assertAlmostEqual(5 / 6, color.hue)
+
+        color.brightness = 0.5
+        self.assertColorAlmostEqualsRGBA(color, (0.5, 0.0, 0.5, 1.0))
+        self.assertAlmostEqual(0.5, color.blue)
+
+    def test_frozen_colors_are_shared_and_immutable(self):
+        frozen = Color(0.1, 0.2, 0.3).frozen()
+
+        self.assertIsInstance(frozen, FrozenColor)
+        self.assertIs(frozen, Color(0.1, 0.2, 0.3, 1.0).frozen())
+        with self.assertRaises(AttributeError):
+            frozen.r = 1.0
+
+        # Copies can be changed.
+        color = Color(frozen)
+        color.r = 1.0
+        self.assertColorAlmostEqualsRGBA(color, (1.0, 0.2, 0.3, 1.0))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from tests.benchmarks.run_benchmarks import compare_results
+
+
+class TestCompareResults(unittest.TestCase):
+    baseline = {
+        "benchmarks": {
+            "paths": {"fps": 100.0, "peak_rss_kb": 1000, "peak_allocated_kb": 500},
+        },
+    }
+
+    def test_within_thresholds(self):
+        results = {
+            "benchmarks": {
+                "paths": {"fps": 95.0, "peak_rss_kb": 1050, "peak_allocated_kb": 400},
+                "new": {"fps": 1.0, "peak_rss_kb": 1, "peak_allocated_kb": 1},
+            },
+        }
+
+        self.assertEqual([], compare_results(results, self.baseline))
+
+    def test_regressions(self):
+        """Lower fps and higher memory use than the thresholds allow are
+        reported."""
+        results = {
+            "benchmarks": {
+                "paths": {"fps": 80.0, "peak_rss_kb": 1200, "peak_allocated_kb": 500},
+            },
+        }
+
+        regressions = compare_results(results, self.baseline)
+
+        self.assertEqual(2, len(regressions))
+        self.assertTrue(regressions[0].startswith("paths: fps"))
+        self.assertTrue(regressions[1].startswith("paths: peak_rss_kb"))
+
+    def test_custom_threshold(self):
+        results = {
+            "benchmarks": {
+                "paths": {"fps": 80.0, "peak_rss_kb": 1000, "peak_allocated_kb": 500},
+            },
+        }
+
+        self.assertEqual([], compare_results(results, self.baseline, {"fps": 0.25}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,5 @@
+import copy
+import pickle
 import random
 import unittest
 
@@ -5,13 +7,17 @@ from parameterized import parameterized
 
 from shoebot.core import CairoCanvas
 from shoebot.core import CairoImageSink
+from shoebot.core.backend import cairo
 from shoebot.graphics import BezierPath
 from shoebot.graphics import CLOSE
+from shoebot.graphics import CURVETO
 from shoebot.graphics import LINETO
 from shoebot.graphics import MOVETO
 from shoebot.graphics import PathElement
 from shoebot.graphics import RLINETO
 from shoebot.graphics import RMOVETO
+from shoebot.graphics.bezierpath import EVENODD
+from shoebot.graphics.bezierpath import LINEAR
 from shoebot.grammar import NodeBot
 
 
@@ -35,6 +41,168 @@ class TestBezier(unittest.TestCase):
         self.assertIsNot(path, copied_path)
         self.assertCountEqual(path, copied_path)
 
+    def test_copy_is_independent(self):
+        """Changing a path or its copy leaves the other path unchanged."""
+        path = BezierPath(self.bot)
+        path.moveto(0, 0)
+        path.lineto(10, 10)
+        copied_path = path.copy()
+
+        path.lineto(20, 0)
+        copied_path.curveto(0, 0, 5, 5, 0, 10)
+        copied_path.closepath()
+
+        self.assertEqual(
+            [
+                PathElement(MOVETO, 0, 0),
+                PathElement(LINETO, 10, 10),
+                PathElement(LINETO, 20, 0),
+            ],
+            list(path),
+        )
+        self.assertEqual(
+            [
+                PathElement(MOVETO, 0, 0),
+                PathElement(LINETO, 10, 10),
+                PathElement(CURVETO, 0, 0, 5, 5, 0, 10),
+                PathElement(CLOSE, 0, 0),
+            ],
+            list(copied_path),
+        )
+        self.assertIs(copied_path[-1], copied_path[3])
+
+    def test_point_after_path_changes(self):
+        """Points are measured along the whole path, after it changes."""
+        path = BezierPath(self.bot)
+        path.moveto(0, 0)
+        path.lineto(10, 0)
+        self.assertEqual((5, 0), (path.point(0.5).x, path.point(0.5).y))
+
+        path.lineto(10, 10)
+
+        self.assertEqual((10, 0), (path.point(0.5).x, path.point(0.5).y))
+
+    def test_coordinates_match_points(self):
+        path = BezierPath(self.bot)
+        path.moveto(0, 0)
+        path.lineto(10, 0)
+        path.curveto(20, 0, 20, 20, 10, 20)
+        path.closepath()
+
+        expected = [(pt.x, pt.y) for pt in path.points(50)]
+
+        self.assertEqual(expected, path.coordinates(50))
+
+    def test_colors_can_be_changed(self):
+        """Paths drawn with the same colors can change them independently,
+        and so can the bot."""
+        self.bot.fill(1, 0, 0)
+        path1 = self.bot.rect(0, 0, 10, 10, draw=False)
+        path2 = self.bot.rect(0, 0, 10, 10, draw=False)
+
+        path1.fill.alpha = 0.5
+
+        self.assertEqual((1, 0, 0, 0.5), tuple(path1.fill))
+        self.assertEqual((1, 0, 0, 1), tuple(path2.fill))
+
+        stroke = self.bot.stroke(0, 0, 1)
+        stroke.a = 0.25
+
+        path3 = self.bot.rect(0, 0, 10, 10, draw=False)
+        self.assertEqual((0, 0, 1, 0.25), tuple(path3.stroke))
+
+    def test_frozen_colors_can_be_copied(self):
+        """The colors paths share can be copied and pickled, copies are the
+        same color."""
+        self.bot.fill(1, 0, 0.5, 0.25)
+        path = self.bot.rect(0, 0, 10, 10, draw=False)
+        color = path._fillcolor
+
+        self.assertIs(color, copy.copy(color))
+        self.assertIs(color, copy.deepcopy(color))
+        self.assertEqual([color], copy.deepcopy([color]))
+        self.assertEqual((1, 0, 0.5, 0.25), tuple(pickle.loads(pickle.dumps(color))))
+        with self.assertRaises(AttributeError):
+            color.r = 0
+
+    def test_bounds_match_cairo(self):
+        """Bounds are measured from the path, and match cairo's path_extents
+        as elements are added."""
+        path = BezierPath(self.bot)
+        path.moveto(0, 0)
+        for i in range(20):
+            path.curveto(*[random.uniform(-50, 50) for _ in range(6)])
+            path.arc(random.uniform(-50, 50), random.uniform(-50, 50), 10, 0, i)
+            if i % 5 == 0:
+                path.moveto(random.uniform(-50, 50), random.uniform(-50, 50))
+
+            recording = cairo.RecordingSurface(
+                cairo.CONTENT_COLOR_ALPHA, (-1, -1, 1, 1),
+            )
+            ctx = cairo.Context(recording)
+            path._traverse(ctx)
+            for expected, actual in zip(ctx.path_extents(), path.bounds):
+                self.assertAlmostEqual(expected, actual, delta=0.01)
+
+    def test_contains(self):
+        path = BezierPath(self.bot)
+        path.rect(0, 0, 100, 100)
+        path.ellipse(25, 25, 50, 50)
+
+        self.assertTrue(path.contains(10, 10))
+        self.assertTrue(path.contains(50, 50))
+        self.assertFalse(path.contains(110, 50))
+
+        path.fillrule = EVENODD
+
+        self.assertTrue(path.contains(10, 10))
+        self.assertFalse(path.contains(50, 50))
+
+    def render(self, path, width, height):
+        """Render path on a new image surface, return a function that gets
+        the (r, g, b, a) of a pixel."""
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        path._render_closure()(cairo.Context(surface))
+        surface.flush()
+        data, stride = surface.get_data(), surface.get_stride()
+
+        def pixel(x, y):
+            b, g, r, a = data[y * stride + x * 4 : y * stride + x * 4 + 4]
+            return r, g, b, a
+
+        return pixel
+
+    def test_fillgradient(self):
+        path = BezierPath(self.bot, fill=(1, 1, 1))
+        path.rect(0, 0, 100, 10)
+        path.fillgradient = (LINEAR, 0, 0, 100, 0, ((0, 1, 0, 0, 1), (1, 0, 0, 1, 1)))
+
+        pixel = self.render(path, 100, 10)
+
+        self.assertGreater(pixel(1, 5)[0], 240)
+        self.assertLess(pixel(1, 5)[2], 15)
+        self.assertAlmostEqual(pixel(50, 5)[0], pixel(50, 5)[2], delta=5)
+        self.assertGreater(pixel(98, 5)[2], 240)
+
+    def test_shadow(self):
+        path = BezierPath(self.bot, fill=(0, 0, 0), shadow=(20, 0, 0, 0, 0, 0, 0.5))
+        path.rect(10, 10, 20, 20)
+
+        pixel = self.render(path, 60, 40)
+
+        self.assertEqual(255, pixel(15, 20)[3])
+        self.assertAlmostEqual(128, pixel(45, 20)[3], delta=2)
+        self.assertEqual(0, pixel(55, 20)[3])
+
+        # A blurred shadow fades out at its edges.
+        path.shadow = (20, 0, 4, 0, 0, 0, 0.5)
+        pixel = self.render(path, 60, 40)
+
+        self.assertAlmostEqual(128, pixel(40, 20)[3], delta=2)
+        self.assertLess(0, pixel(52, 20)[3])
+        self.assertLess(pixel(52, 20)[3], pixel(48, 20)[3])
+        self.assertLess(pixel(48, 20)[3], 128)
+
 
 class TestPathElement(unittest.TestCase):
     # Test the Bezier API directly.
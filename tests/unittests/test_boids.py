@@ -0,0 +1,79 @@
+import unittest
+from unittest import mock
+
+from tests.unittests.helpers import ShoebotTestCase
+from tests.unittests.helpers import test_as_bot
+
+
+def _state(flock):
+    return [(b.x, b.y, b.z, b.vx, b.vy, b.vz, b.is_perching) for b in flock]
+
+
+class TestBoids(ShoebotTestCase):
+    @test_as_bot()
+    def test_update_matches_boid_rules(self):
+        """Boids.update moves each boid by the Boid rules, calculated from
+        where the flock was before the update."""
+        boids = ximport("boids")
+        flock = boids.flock(50, 0, 0, 200, 200)
+        flock.goal(100, 100, 0)
+        for b in flock:
+            b.vx, b.vy, b.vz = random(-5, 5), random(-5, 5), random(-5, 5)
+
+        expected = []
+        for b in flock:
+            vx, vy, vz = b.vx, b.vy, b.vz
+            for rule in (
+                b.cohesion(100),
+                b.separation(10),
+                b.alignment(5),
+                b.goal(100, 100, 0, 20),
+            ):
+                vx, vy, vz = vx + rule[0], vy + rule[1], vz + rule[2]
+            vx, vy, vz = [max(-30, min(v, 30)) for v in (vx, vy, vz)]
+            expected.append((b.x + vx, b.y + vy, b.z + vz))
+
+        flock.noscatter()
+        with mock.patch.object(flock, "constrain"):
+            flock.update(shuffled=False)
+
+        for (x, y, z), b in zip(expected, flock):
+            self.assertAlmostEqual(x, b.x)
+            self.assertAlmostEqual(y, b.y)
+            self.assertAlmostEqual(z, b.z)
+
+    @test_as_bot()
+    def test_numpy_matches_python(self):
+        boids = ximport("boids")
+        if boids.np is None:
+            self.skipTest("NumPy is not installed.")
+        flock = boids.flock(100, 0, 0, 200, 200)
+        for b in flock[:10]:
+            b.is_perching = True
+            b._perch_t = 2
+        other = flock.copy()
+
+        for _ in range(5):
+            flock._move_numpy([b._i for b in flock], (1, 1, 1, 1), 100, 10, 5, 20, 30)
+            other._move([b._i for b in other], (1, 1, 1, 1), 100, 10, 5, 20, 30)
+
+        for expected, actual in zip(_state(other), _state(flock)):
+            for expected_value, actual_value in zip(expected, actual):
+                self.assertAlmostEqual(expected_value, actual_value)
+
+    @test_as_bot()
+    def test_boid_appended_from_another_flock(self):
+        boids = ximport("boids")
+        flock, other = boids.flock(3, 0, 0, 10, 10), boids.flock(3, 0, 0, 10, 10)
+        boid = other[0]
+        boid.x = 5.0
+        flock.append(boid)
+
+        flock.update()
+
+        self.assertIs(flock, boid.boids)
+        self.assertEqual(4, len(flock))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+import unittest
+from unittest import mock
+
+from tests.unittests.helpers import ShoebotTestCase
+from tests.unittests.helpers import test_as_bot
+
+
+def _rgba(clrs):
+    return [(clr.r, clr.g, clr.b, clr.a) for clr in clrs]
+
+
+class TestColorList(ShoebotTestCase):
+    @test_as_bot()
+    def test_numpy_matches_python(self):
+        colors = ximport("colors")
+        if colors.np is None:
+            self.skipTest("NumPy is not installed.")
+        clrs = colors.list(
+            [colors.color(random(), random(), random(), random()) for _ in range(50)],
+        )
+        clrs.append(colors.color(0.3, 0, 0.5, mode="hsb"))
+
+        def sorted_lists():
+            return [
+                clrs.sort_by_distance(),
+                clrs.sort_by_distance(reversed=True),
+                clrs.sort("hue"),
+                clrs.sort("brightness", reversed=True),
+                clrs.cluster_sort(),
+                colors.gradient(clrs[:3], steps=25, spread=0.3),
+            ]
+
+        expected = sorted_lists()
+        with mock.patch.object(colors, "np", None):
+            actual = sorted_lists()
+
+        for expected_colors, actual_colors in zip(expected, actual):
+            self.assertEqual(_rgba(expected_colors), _rgba(actual_colors))
+
+    @test_as_bot()
+    def test_sort_keeps_names(self):
+        colors = ximport("colors")
+        clrs = colors.list([colors.color("red"), colors.color("navy"), colors.color("gold")])
+
+        def sorted_names():
+            return [
+                [clr.name for clr in sorted_colors]
+                for sorted_colors in (clrs.sort("hue"), clrs.cluster_sort())
+            ]
+
+        self.assertEqual([["red", "gold", "navy"]] * 2, sorted_names())
+        with mock.patch.object(colors, "np", None):
+            self.assertEqual([["red", "gold", "navy"]] * 2, sorted_names())
+
+    @test_as_bot()
+    def test_blend(self):
+        colors = ximport("colors")
+        clrs = colors.list([colors.color(1, 0, 0), colors.color(0, 0, 1)])
+
+        blended = clrs.blend(0.5)
+
+        self.assertEqual([(0.5, 0, 0.5, 1), (0.25, 0, 0.75, 1)], _rgba(blended))
+
+    @test_as_bot()
+    def test_color_array(self):
+        colors = ximport("colors")
+        if colors.np is None:
+            self.skipTest("NumPy is not installed.")
+        clrs = colors.list([colors.color(0, 0, 1), colors.color(1, 0, 0, 0.5)])
+
+        array = colors.ColorArray(clrs)
+
+        self.assertEqual(2, len(array))
+        self.assertEqual(_rgba(clrs), _rgba(array))
+        self.assertEqual([(1, 0, 0, 0.5)], _rgba(array.sort("hue")[:1]))
+        for clr, distance in zip(clrs, array.distance(clrs[0])):
+            self.assertAlmostEqual(clr.distance(clrs[0]), distance)
+
+    @test_as_bot()
+    def test_context_to_rgb(self):
+        colors = ximport("colors")
+
+        clrs = colors.list().context_to_rgb("anger")
+
+        self.assertCountEqual(["black", "orange", "red"], [clr.name for clr in clrs])
+
+
+class TestDepth(ShoebotTestCase):
+    @test_as_bot()
+    def test_gradientpath(self):
+        colors = ximport("colors")
+        path = rect(0, 0, 100, 50, draw=False)
+
+        colors.gradientpath(
+            path, colors.color(1, 0, 0), colors.color(0, 0, 1), type="linear", angle=90,
+        )
+
+        kind, x0, y0, x1, y1, stops = path.fillgradient
+        self.assertEqual("linear", kind)
+        for expected, actual in zip((0, 0, 50, 0), (x0, y0, x1, y1)):
+            self.assertAlmostEqual(expected, actual)
+        self.assertEqual(((0, 0, 0, 1, 1), (1, 1, 0, 0, 1)), stops)
+
+    @test_as_bot()
+    def test_shadow(self):
+        colors = ximport("colors")
+
+        colors.shadow(dx=5, dy=5, alpha=0.5, blur=2)
+        self.assertEqual((5, 5, 2, 0, 0, 0, 0.5), rect(0, 0, 10, 10).shadow)
+
+        colors.noshadow()
+        self.assertIsNone(rect(0, 0, 10, 10).shadow)
+
+
+class TestBatches(ShoebotTestCase):
+    @test_as_bot()
+    def test_shader(self):
+        colors = ximport("colors")
+        xs = [random() * 1000 - 500 for _ in range(200)]
+        ys = [random() * 1000 - 500 for _ in range(200)]
+
+        for angle, spread in ((135, 90), (None, 90), (10, 45), (350, 45), (0, 0)):
+            expected = [
+                colors.shader(x, y, 0, 0, angle=angle, spread=spread)
+                for x, y in zip(xs, ys)
+            ]
+            for actual in colors.shader(xs, ys, 0, 0, angle=angle, spread=spread):
+                self.assertAlmostEqual(expected.pop(0), actual)
+
+    @test_as_bot()
+    def test_pathpoints(self):
+        colors = ximport("colors")
+        path = rect(0, 0, 100, 50, draw=False)
+        path.curveto(120, 0, 120, 50, 100, 50)
+        t = [0, 0.25, 0.5, 0.8, 0.9999999, 1]
+
+        expected = [(pt.x, pt.y) for pt in [path.point(ti) for ti in t]]
+
+        for (x, y), (actual_x, actual_y) in zip(expected, colors.pathpoints(path, t)):
+            self.assertAlmostEqual(x, actual_x)
+            self.assertAlmostEqual(y, actual_y)
+
+
+class TestColorTheme(ShoebotTestCase):
+    @test_as_bot()
+    def test_theme_parsed_once(self):
+        colors = ximport("colors")
+
+        def ranges(theme):
+            return [(tuple(clr), rng.name, weight) for clr, rng, weight in theme.ranges]
+
+        with mock.patch.object(colors, "_parse_theme", wraps=colors._parse_theme) as parse:
+            theme1 = colors.theme("love")
+            theme2 = colors.theme("love")
+
+        self.assertLessEqual(parse.call_count, 1)
+        self.assertEqual(15, len(theme1.ranges))
+        self.assertEqual(ranges(theme1), ranges(theme2))
+        self.assertIsNot(theme1.ranges[0][0], theme2.ranges[0][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
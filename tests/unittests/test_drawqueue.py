@@ -0,0 +1,81 @@
+import unittest
+from array import array
+from unittest.mock import Mock, call
+
+from shoebot.core.drawqueue import (
+    DrawQueue,
+    OP_CLOSE,
+    OP_CURVETO,
+    OP_LINETO,
+    OP_MOVETO,
+)
+
+
+class TestDrawQueue(unittest.TestCase):
+    def test_render_replays_ops_and_render_funcs_in_order(self):
+        """Render functions and path ops are replayed on the context in the
+        order they were added."""
+        ctx = Mock()
+        queue = DrawQueue()
+        queue.append(lambda c: c.paint())
+        queue.append_path(
+            (1, 0, 0, 1, 0, 0),
+            bytes([OP_MOVETO, OP_LINETO, OP_CURVETO, OP_CLOSE]),
+            array("d", [0, 0, 10, 0, 10, 5, 5, 10, 0, 10]),
+            lambda c: c.fill(),
+        )
+
+        queue.render(ctx)
+
+        self.assertEqual(
+            [
+                call.paint(),
+                call.set_matrix(unittest.mock.ANY),
+                call.move_to(0, 0),
+                call.line_to(10, 0),
+                call.curve_to(10, 5, 5, 10, 0, 10),
+                call.close_path(),
+                call.fill(),
+            ],
+            ctx.method_calls,
+        )
+
+    def test_scene_cache_marks_end_of_each_command(self):
+        """With a scene cache, the end of every command is marked with its
+        key and rendering is delegated to the cache."""
+        scene_cache = Mock()
+        queue = DrawQueue(scene_cache=scene_cache)
+        queue.append(lambda c: c.paint())
+        queue.append_path(
+            (1, 0, 0, 1, 0, 0),
+            bytes([OP_MOVETO, OP_LINETO]),
+            array("d", [0, 0, 10, 0]),
+            lambda c: c.fill(),
+            key="red",
+        )
+
+        self.assertEqual(
+            [
+                (1, 0, 1, None),
+                (
+                    5,
+                    10,
+                    2,
+                    (
+                        (1, 0, 0, 1, 0, 0),
+                        bytes([OP_MOVETO, OP_LINETO]),
+                        array("d", [0, 0, 10, 0]).tobytes(),
+                        "red",
+                    ),
+                ),
+            ],
+            queue.marks,
+        )
+
+        ctx = Mock()
+        queue.render(ctx)
+        scene_cache.render.assert_called_once_with(ctx, queue)
+
+
+if __name__ == "__main__":
+    unittest.main()
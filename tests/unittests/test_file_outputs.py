@@ -1,10 +1,12 @@
 """Check if shoebot can create files in it's supported output formats and that
 none are zero bytes long."""
+import shutil
 import tempfile
 import unittest
 
 from parameterized import parameterized
 from parameterized import parameterized_class
+from shoebot.core import CairoVideoSink
 from tests.unittests.helpers import RUNNING_IN_CI
 from tests.unittests.helpers import shoebot_named_testclass
 from tests.unittests.helpers import shoebot_named_testfunction
@@ -32,5 +34,32 @@ class TestOutputFormats(ShoebotTestCase):
             self.assertFileSize(f.name)
 
 
+class TestVideoOutput(ShoebotTestCase):
+    @parameterized.expand(["mp4", "webm"], name_func=shoebot_named_testfunction)
+    def test_video_output(self, file_format):
+        """Run a simple animated bot with video output and verify the
+        output."""
+        if shutil.which("ffmpeg") is None:
+            self.skipTest("ffmpeg is not installed.")
+
+        code = "size(64, 64)\ndef draw():\n    background(FRAME / 10.0)"
+        with tempfile.NamedTemporaryFile(suffix=f".{file_format}") as f:
+            self.run_code(code, outputfile=f.name)
+
+            self.assertFileSize(f.name)
+
+    def test_encoder_failure_raises(self):
+        """A video that ffmpeg fails to encode raises an error when the
+        run finishes."""
+        if shutil.which("false") is None:
+            self.skipTest("false is not installed.")
+
+        sink = CairoVideoSink("output.mp4", ffmpeg="false")
+        sink.rendering_finished((8, 8), 1, sink.create_rcontext((8, 8), 1))
+
+        with self.assertRaises(IOError):
+            sink.run_finished()
+
+
 if __name__ == "__main__":
     unittest.main(buffer=False)
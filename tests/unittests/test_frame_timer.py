@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+import unittest
+
+from shoebot.core.frame_timer import CATCH_UP, FramePacer, FrameTimer, percentile
+
+
+class TestFrameTimer(unittest.TestCase):
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(50, percentile(values, 50))
+        self.assertEqual(95, percentile(values, 95))
+        self.assertEqual(0, percentile([], 50))
+
+    def test_frames_over_budget_are_dropped(self):
+        """Frames whose work takes longer than the budget are counted as
+        dropped, time spent sleeping is not work."""
+        timer = FrameTimer()
+        for primitives in (10, 20):
+            timer.begin_frame(1)
+            timer._frame["draw"] = 0.02
+            timer._frame["sleep"] = 1.0
+            timer.set_primitives(primitives)
+            timer.end_frame(budget=0.03)
+        timer.begin_frame(3)
+        timer._frame["render"] = 0.05
+        timer.end_frame(budget=0.03)
+
+        stats = timer.stats()
+        self.assertEqual(3, stats["frames"])
+        self.assertEqual(1, stats["dropped_frames"])
+        self.assertEqual(20, stats["primitives"]["max"])
+        self.assertAlmostEqual(50.0, stats["render"]["max"])
+
+    def test_write_trace(self):
+        """Phases and frames are written as Chrome trace complete events."""
+        timer = FrameTimer(trace=True)
+        timer.begin_frame(1)
+        with timer.phase("draw"):
+            pass
+        timer.end_frame()
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "trace.json")
+            timer.write_trace(filename)
+            with open(filename) as f:
+                trace = json.load(f)
+
+        self.assertEqual(
+            ["draw", "frame"], [event["name"] for event in trace["traceEvents"]],
+        )
+        self.assertEqual({"X"}, {event["ph"] for event in trace["traceEvents"]})
+
+
+class TestFramePacer(unittest.TestCase):
+    def test_deadlines_do_not_drift(self):
+        """Each frame is due one period after the last deadline, however
+        long the frame took."""
+        pacer = FramePacer()
+
+        for now, expected in ((1.0, 1.1), (1.15, 1.2), (1.21, 1.3)):
+            deadline, skipped = pacer.next_deadline(0.1, now=now)
+            self.assertAlmostEqual(expected, deadline)
+            self.assertEqual(0, skipped)
+
+    def test_skip_late_frames(self):
+        pacer = FramePacer()
+        pacer.next_deadline(0.1, now=0.0)
+
+        # The frame due at 0.1 finished at 0.45, frames due at 0.2 and 0.3
+        # are skipped and the next frame is due straight away.
+        deadline, skipped = pacer.next_deadline(0.1, now=0.45)
+
+        self.assertAlmostEqual(0.4, deadline)
+        self.assertEqual(2, skipped)
+
+    def test_catch_up_late_frames(self):
+        pacer = FramePacer(CATCH_UP, max_catch_up=2)
+        pacer.next_deadline(0.1, now=0.0)
+
+        deadline, skipped = pacer.next_deadline(0.1, now=0.45)
+        self.assertAlmostEqual(0.2, deadline)
+        self.assertEqual(0, skipped)
+
+        # Too far behind to catch up.
+        deadline, skipped = pacer.next_deadline(0.1, now=1.05)
+        self.assertAlmostEqual(0.8, deadline)
+        self.assertEqual(5, skipped)
+
+    def test_speed_change_starts_new_schedule(self):
+        pacer = FramePacer()
+        pacer.next_deadline(0.1, now=0.0)
+
+        self.assertEqual((5.5, 0), pacer.next_deadline(0.5, now=5.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import random
+import unittest
+
+from tests.unittests.helpers import ShoebotTestCase
+from tests.unittests.helpers import test_as_bot
+
+
+class TestNodeAt(ShoebotTestCase):
+    @test_as_bot()
+    def test_node_at_matches_checking_every_node(self):
+        """The spatial index finds the same node as checking every node in
+        order."""
+        graph = ximport("graph")
+        g = graph.create()
+        random.seed(0)
+        for i in range(300):
+            n = g.add_node(str(i), radius=random.choice([4, 8, 12]))
+            n.vx, n.vy = random.uniform(-10, 10), random.uniform(-10, 10)
+        g.x, g.y = 200, 150
+
+        for _ in range(500):
+            pt = graph.event.Point(random.uniform(0, 400), random.uniform(0, 300))
+            expected = next((n for n in g.nodes if pt in n), None)
+            self.assertIs(expected, g.events.node_at(pt))
+
+    @test_as_bot()
+    def test_node_at_after_nodes_move(self):
+        """Nodes are found at their new position after they are moved
+        without iterating the layout."""
+        graph = ximport("graph")
+        g = graph.create()
+        n = g.add_node("a")
+        n.vx, n.vy = 0, 0
+        g.x, g.y = 200, 150
+        self.assertIs(n, g.events.node_at(graph.event.Point(200, 150)))
+
+        n.vx = 10
+
+        self.assertIsNone(g.events.node_at(graph.event.Point(200, 150)))
+        self.assertIs(n, g.events.node_at(graph.event.Point(200 + 10 * g.d, 150)))
+
+    @test_as_bot()
+    def test_within(self):
+        graph = ximport("graph")
+        g = graph.create()
+        a, b, c = g.add_node("a"), g.add_node("b"), g.add_node("c")
+        a.vx, a.vy = 0, 0
+        b.vx, b.vy = 3, 4
+        c.vx, c.vy = 10, 0
+
+        index = graph.event.grid(g.nodes, 2.0)
+
+        self.assertEqual([a, b], index.within(0, 0, 5))
+        self.assertEqual([c], index.within(11, 1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import random
+import unittest
+from unittest import mock
+
+from tests.unittests.helpers import ShoebotTestCase
+from tests.unittests.helpers import test_as_bot
+
+
+def _create_graph(graph, positions):
+    g = graph.create()
+    for i, (x, y) in enumerate(positions):
+        g.add_node(str(i))
+        g.nodes[-1].vx, g.nodes[-1].vy = x, y
+    for i in range(1, len(positions)):
+        g.add_edge(str(i), str(i // 2))
+    return g
+
+
+def _iterate_all_pairs(spring_layout):
+    """spring_layout.iterate, comparing every pair of nodes."""
+    nodes = spring_layout.graph.nodes
+    for i, n1 in enumerate(nodes):
+        for n2 in nodes[i + 1 :]:
+            spring_layout._repulse(n1, n2)
+    for e in spring_layout.graph.edges:
+        spring_layout._attract(
+            e.node1, e.node2, spring_layout.w * e.weight, 1.0 / e.length,
+        )
+    for n in nodes:
+        n.vx += max(-spring_layout.d, min(spring_layout.m * n.force.x, spring_layout.d))
+        n.vy += max(-spring_layout.d, min(spring_layout.m * n.force.y, spring_layout.d))
+        n.force.x = n.force.y = 0
+
+
+class TestSpringLayout(ShoebotTestCase):
+    @test_as_bot()
+    def test_grid_matches_all_pairs(self):
+        """Repulsion using the grid, with and without NumPy, gives the same
+        result as comparing every pair of nodes."""
+        graph = ximport("graph")
+        random.seed(0)
+        positions = [(random.uniform(0, 60), random.uniform(0, 60)) for _ in range(200)]
+
+        expected = _create_graph(graph, positions)
+        expected.layout.prepare()
+        _iterate_all_pairs(expected.layout)
+
+        for use_numpy in (False, True):
+            if use_numpy and graph.layout.np is None:
+                continue
+            with self.subTest(numpy=use_numpy), mock.patch.object(
+                graph.layout, "NUMPY_MIN_NODES", 1 if use_numpy else float("inf"),
+            ):
+                g = _create_graph(graph, positions)
+                g.layout.prepare()
+                g.layout.iterate()
+
+                for actual_node, expected_node in zip(g.nodes, expected.nodes):
+                    self.assertAlmostEqual(expected_node.vx, actual_node.vx)
+                    self.assertAlmostEqual(expected_node.vy, actual_node.vy)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from tests.unittests.helpers import ShoebotTestCase
+from tests.unittests.helpers import test_as_bot
+
+
+class TestBetweennessCentrality(ShoebotTestCase):
+    @test_as_bot()
+    def test_breadth_first_matches_dijkstra(self):
+        """Without edge weights, the breadth first search finds the same
+        shortest paths as Dijkstra's algorithm."""
+        graph = ximport("graph")
+        g = graph.create()
+        for i in range(1, 40):
+            g.add_edge(str(i), str(i // 3))
+            g.add_edge(str(i), str((i * 7) % 40))
+        W = graph.proximity.adjacency(g)
+
+        expected = graph.proximity._betweenness_from_sources(W, list(W), weighted=True)
+        actual = graph.proximity._betweenness_from_sources(W, list(W), weighted=False)
+
+        for id in W:
+            self.assertAlmostEqual(expected[id], actual[id])
+
+    @test_as_bot()
+    def test_cached_until_edges_change(self):
+        """Centrality is recalculated when nodes or edges are added or
+        removed."""
+        graph = ximport("graph")
+        g = graph.create()
+        g.add_edge("a", "b")
+        g.add_edge("b", "c")
+
+        self.assertEqual(1.0, g.b.betweenness)
+        self.assertIs(g.betweenness_centrality(), g.betweenness_centrality())
+
+        # a - b - c - d, and now c is as central as b.
+        g.add_edge("c", "d")
+        self.assertEqual(1.0, g.c.betweenness)
+
+        g.remove_node("d")
+        self.assertEqual(0.0, g.c.betweenness)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from tests.unittests.helpers import ShoebotTestCase
+from tests.unittests.helpers import test_as_bot
+
+
+class TestGraphStyles(ShoebotTestCase):
+    @test_as_bot()
+    def test_nodes_grouped_by_style(self):
+        graph = ximport("graph")
+        g = graph.create()
+        for i in range(1, 6):
+            g.add_edge("root", str(i))
+        g.node("1").style = graph.style.IMPORTANT
+        g.node("3").style = graph.style.IMPORTANT
+        g.node("4").style = "no such style"
+
+        groups = [
+            (s.name, [n.id for n in nodes]) for s, nodes in g._nodes_by_style()
+        ]
+
+        self.assertEqual(
+            [
+                (graph.style.DEFAULT, ["root", "2", "5"]),
+                (graph.style.IMPORTANT, ["1", "3"]),
+                (graph.style.DEFAULT, ["4"]),
+            ],
+            groups,
+        )
+
+    @test_as_bot()
+    def test_draw_batched_and_custom_styles(self):
+        """Graphs with default and custom node functions can be drawn."""
+        graph = ximport("graph")
+        g = graph.create()
+        for i in range(1, 20):
+            g.add_edge(str(i), str(i // 2), label=f"edge {i}")
+        g.styles.apply()
+        g.node("3").style = graph.style.IMPORTANT
+
+        g.solve()
+        g.draw(weighted=True, directed=True, traffic=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+from shoebot.graphics.image import _surface_from_buffer
+
+
+class TestSurfaceFromBuffer(unittest.TestCase):
+    def test_writable_buffer_is_not_copied(self):
+        """Changes to a writable buffer show in the surface."""
+        pixels = bytearray(3 * 2 * 4)
+        surface = _surface_from_buffer(memoryview(pixels).cast("B", (2, 3, 4)))
+
+        pixels[0] = 255
+
+        self.assertEqual((3, 2), (surface.get_width(), surface.get_height()))
+        self.assertEqual(255, surface.get_data()[0])
+
+    def test_readonly_buffer_is_copied(self):
+        pixels = bytes(range(2 * 2 * 4))
+
+        surface = _surface_from_buffer(memoryview(pixels).cast("B", (2, 2, 4)))
+
+        self.assertEqual(pixels, bytes(surface.get_data()))
+
+    def test_32_bit_pixels(self):
+        pixels = bytearray(4 * 5 * 4)
+
+        surface = _surface_from_buffer(memoryview(pixels).cast("I", (5, 4)))
+
+        self.assertEqual((4, 5), (surface.get_width(), surface.get_height()))
+
+    def test_invalid_shape(self):
+        with self.assertRaises(ValueError):
+            _surface_from_buffer(memoryview(bytearray(12)).cast("B", (2, 2, 3)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+from shoebot.core import CairoCanvas
+from shoebot.core import CairoImageSink
+from shoebot.core.backend import cairo
+from shoebot.grammar import NodeBot
+from shoebot.graphics.image import SurfaceCache
+
+
+class TestSurfaceCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def make_png(self, name, width=10, height=10):
+        path = os.path.join(self.directory.name, name)
+        cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height).write_to_png(path)
+        return path
+
+    def test_hit_and_miss(self):
+        cache = SurfaceCache()
+        path = self.make_png("a.png")
+
+        surface = cache.get(path)
+
+        self.assertIs(surface, cache.get(path))
+        self.assertEqual(1, cache.stats()["misses"])
+        self.assertEqual(1, cache.stats()["hits"])
+
+    def test_evicts_least_recently_used(self):
+        """When the cache is over budget the least recently used surfaces
+        are evicted first."""
+        # Each 10x10 ARGB32 surface uses 400 bytes.
+        cache = SurfaceCache(max_bytes=800)
+        a, b, c = (self.make_png(name) for name in ("a.png", "b.png", "c.png"))
+
+        cache.get(a)
+        cache.get(b)
+        cache.get(a)
+        cache.get(c)
+
+        stats = cache.stats()
+        self.assertEqual(1, stats["evictions"])
+        self.assertEqual(2, stats["entries"])
+        self.assertEqual(800, stats["bytes"])
+        cache.get(a)
+        self.assertEqual(3, cache.stats()["misses"])
+
+    def test_reloads_modified_file(self):
+        cache = SurfaceCache()
+        path = self.make_png("a.png")
+        cache.get(path)
+
+        self.make_png("a.png", width=20)
+        os.utime(path, ns=(0, 0))
+
+        self.assertEqual(20, cache.get(path).get_width())
+        self.assertEqual(2, cache.stats()["misses"])
+
+    def test_prefetch(self):
+        cache = SurfaceCache()
+        path = self.make_png("a.png")
+
+        cache.prefetch([path])
+        cache.get(path)
+
+        stats = cache.stats()
+        self.assertEqual(1, stats["misses"])
+        self.assertEqual(1, stats["hits"])
+
+    def test_render_key_follows_file_changes(self):
+        """In retained mode an image is drawn again after its file
+        changes."""
+        bot = NodeBot(canvas=CairoCanvas(CairoImageSink("output-image.png")))
+        bot.retainedmode()
+        path = self.make_png("a.png")
+        key = bot.image(path, 0, 0)._render_key()
+        self.assertEqual(key, bot.image(path, 0, 0)._render_key())
+
+        self.make_png("a.png")
+        os.utime(path, ns=(0, 0))
+
+        self.assertNotEqual(key, bot.image(path, 0, 0)._render_key())
+
+
+if __name__ == "__main__":
+    unittest.main()
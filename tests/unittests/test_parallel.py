@@ -0,0 +1,23 @@
+import unittest
+
+from shoebot.parallel import shard_iterations
+
+
+class TestShardIterations(unittest.TestCase):
+    def test_shards_cover_all_iterations_in_order(self):
+        """Shards are contiguous, start at iteration 1 and cover every
+        iteration exactly once."""
+        shards = shard_iterations(10, 3)
+
+        self.assertEqual([range(1, 5), range(5, 8), range(8, 11)], shards)
+
+    def test_no_more_shards_than_iterations(self):
+        """Asking for more processes than iterations gives one shard per
+        iteration."""
+        shards = shard_iterations(2, 8)
+
+        self.assertEqual([range(1, 2), range(2, 3)], shards)
+
+
+if __name__ == "__main__":
+    unittest.main()
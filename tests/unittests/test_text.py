@@ -6,6 +6,7 @@ from tests.unittests.helpers import ShoebotTestCase
 from textwrap import dedent
 
 from shoebot.core import CairoCanvas, CairoImageSink
+from shoebot.core.backend import cairo
 from shoebot.graphics import Text
 from shoebot.grammar import NodeBot
 
@@ -34,6 +35,35 @@ class TestText(unittest.TestCase):
         self.assertEqual(text.font, "Bitstream Vera")
         self.assertEqual(text.fontsize, 64)
 
+    def test_layout_shared_between_identical_text(self):
+        """Text with the same settings reuses the same Pango layout, text
+        with different settings does not."""
+        text1 = self.bot.text("Handgloves", 10, 20, fontsize=24, draw=False)
+        text2 = self.bot.text("Handgloves", 30, 40, fontsize=24, draw=False)
+        text3 = self.bot.text("Handgloves", 10, 20, fontsize=12, draw=False)
+
+        self.assertIs(text1._pango_layout, text2._pango_layout)
+        self.assertIsNot(text1._pango_layout, text3._pango_layout)
+        self.assertEqual(text1.metrics, text2.metrics)
+
+    def test_render_layout_follows_context(self):
+        """Text is laid out again for the transform of the context it is
+        rendered on, the layout used to measure it is left unchanged."""
+        text = self.bot.text("Handgloves", 10, 20, fontsize=24, draw=False)
+        metrics = text.metrics
+
+        ctx = cairo.Context(cairo.ImageSurface(cairo.FORMAT_ARGB32, 10, 10))
+        layout = text._render_layout(ctx)
+        ctx.translate(50, 50)
+        self.assertIs(layout, text._render_layout(ctx))
+
+        ctx.scale(3, 3)
+        scaled_layout = text._render_layout(ctx)
+
+        self.assertIsNot(layout, scaled_layout)
+        self.assertIsNot(text._pango_layout, scaled_layout)
+        self.assertEqual(metrics, text.metrics)
+
 
 if __name__ == "__main__":
     unittest.main()
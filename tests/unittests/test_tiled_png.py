@@ -0,0 +1,59 @@
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+from PIL import Image as PILImage
+
+from shoebot.core.backend import cairo
+from shoebot.core import tiled_png
+from shoebot.core.tiled_png import _adler32_combine, write_png_tiled
+
+
+class TestTiledPNG(unittest.TestCase):
+    def test_adler32_combine(self):
+        first, second = b"shoebot" * 100, b"nodebox" * 77
+
+        self.assertEqual(
+            zlib.adler32(first + second),
+            _adler32_combine(zlib.adler32(first), zlib.adler32(second), len(second)),
+        )
+
+    def test_tiled_png_matches_write_to_png(self):
+        """A PNG written in several bands has the same pixels as one written
+        by cairo, give or take rounding when alpha is unpremultiplied."""
+        width, height = 64, 50
+        surface = cairo.RecordingSurface(
+            cairo.CONTENT_COLOR_ALPHA, (0, 0, width, height),
+        )
+        ctx = cairo.Context(surface)
+        ctx.set_source_rgba(1, 0, 0, 0.5)
+        ctx.arc(32, 25, 20, 0, 6.3)
+        ctx.fill()
+
+        image = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        ctx = cairo.Context(image)
+        ctx.set_source_surface(surface)
+        ctx.paint()
+
+        with tempfile.NamedTemporaryFile(
+            suffix=".png",
+        ) as expected, tempfile.NamedTemporaryFile(suffix=".png") as actual:
+            image.write_to_png(expected.name)
+            # 7 rows per band.
+            with mock.patch.object(tiled_png, "BAND_BYTES", width * 4 * 7):
+                write_png_tiled(surface, width, height, actual.name, workers=2)
+
+            with PILImage.open(expected.name) as expected_image, PILImage.open(
+                actual.name,
+            ) as actual_image:
+                self.assertEqual(expected_image.size, actual_image.size)
+                expected_bytes = expected_image.convert("RGBA").tobytes()
+                actual_bytes = actual_image.convert("RGBA").tobytes()
+                self.assertLessEqual(
+                    max(abs(a - b) for a, b in zip(expected_bytes, actual_bytes)), 1,
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
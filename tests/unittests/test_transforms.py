@@ -0,0 +1,57 @@
+import unittest
+from math import pi
+
+from shoebot.core.backend import cairo
+from shoebot.graphics import Transform
+from shoebot.graphics.transforms import CENTER, CORNER
+
+
+class TestTransform(unittest.TestCase):
+    def assertMatrixEqual(self, expected, actual):
+        for expected_value, actual_value in zip(expected, actual):
+            self.assertAlmostEqual(expected_value, actual_value)
+
+    def test_center_mode_rotates_around_center(self):
+        transform = Transform()
+        transform.translate(10, 20)
+        transform.rotate(pi / 2)
+
+        matrix = transform.get_matrix_with_center(5, 5, CENTER)
+
+        # The center is translated, but not moved by the rotation.
+        self.assertMatrixEqual((15, 25), matrix.transform_point(5, 5))
+        self.assertMatrixEqual((15, 24), matrix.transform_point(4, 5))
+
+    def test_corner_mode(self):
+        transform = Transform()
+        transform.translate(10, 20)
+        transform.scale(2, 3)
+
+        expected = cairo.Matrix(2, 0, 0, 3, 20, 60)
+
+        self.assertMatrixEqual(expected, transform.get_matrix_with_center(5, 5, CORNER))
+
+    def test_matrix_updated_as_stack_grows(self):
+        transform = Transform()
+        transform.translate(10, 0)
+        self.assertMatrixEqual(
+            cairo.Matrix(1, 0, 0, 1, 10, 0),
+            transform.get_matrix_with_center(0, 0, CORNER),
+        )
+
+        transform.push()
+        transform.translate(5, 5)
+        self.assertMatrixEqual(
+            cairo.Matrix(1, 0, 0, 1, 15, 5),
+            transform.get_matrix_with_center(0, 0, CORNER),
+        )
+
+        transform.pop()
+        self.assertMatrixEqual(
+            cairo.Matrix(1, 0, 0, 1, 10, 0),
+            transform.get_matrix_with_center(0, 0, CORNER),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()